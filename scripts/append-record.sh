@@ -0,0 +1,48 @@
+#!/bin/bash
+# Concurrent-safe record appends for log files shared by parallel processes
+# Used by claude-metrics.sh and security-monitor.sh, same rules as
+# append_lines() in claude_metrics.py
+
+# Records up to this size (PIPE_BUF) are written with a single O_APPEND
+# write(2), which concurrent writers can't interleave: no lock needed
+APPEND_ATOMIC_MAX=${APPEND_ATOMIC_MAX:-4096}
+
+# Append one record (a newline is added) to a file
+# printf and echo split longer records into buffer-sized writes, which the
+# lock-free short records could land between: they are copied by cat, in a
+# single write, under an exclusive flock(2) of the file (or a mkdir lock of
+# its directory when flock(1) is not available)
+append_record() {
+    local file="$1"
+    local record="$2"$'\n'
+    local LC_ALL=C  # ${#record} in bytes
+
+    if [ "${#record}" -le "$APPEND_ATOMIC_MAX" ]; then
+        printf '%s' "$record" >> "$file"
+        return
+    fi
+
+    local status=0
+    if command -v flock >/dev/null 2>&1; then
+        # Fixed descriptor on a brace group: {var}>> needs bash 4.1
+        {
+            flock -x 9
+            cat <<<"$2" >&9 || status=$?
+        } 9>>"$file" || return 1
+        return $status
+    fi
+
+    local lock_dir="$(dirname "$file")/.lock.d"
+    local attempts=0
+    until mkdir "$lock_dir" 2>/dev/null; do
+        attempts=$((attempts + 1))
+        if [ "$attempts" -ge 500 ]; then
+            rmdir "$lock_dir" 2>/dev/null || true
+            attempts=0
+        fi
+        sleep 0.01
+    done
+    cat <<<"$2" >> "$file" || status=$?
+    rmdir "$lock_dir" 2>/dev/null || true
+    return $status
+}
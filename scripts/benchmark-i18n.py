@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+i18n Lookup Benchmark
+Measures cold and warm message lookup latency for every i18n access path
+
+- cold: a fresh process per lookup (interpreter start, helper loading,
+  catalog loading and one lookup), median wall-clock time in milliseconds
+- warm: repeated lookups inside one already-initialized process, mean
+  time per lookup in microseconds
+
+Every path runs against a temporary copy of i18n/ so generated catalogs
+never touch the working tree.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shlex
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from claude_i18n import BINARY_CATALOG_FILENAME, flatten_messages, write_binary_catalog
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+
+# Representative lookups: two placeholders, and a security message key
+MESSAGE_KEY = "metrics.template.used"
+MESSAGE_PARAMS = ("CLAUDE.md", "read")
+SECURITY_KEY = "scan_started"
+
+# Paths that spawn an interpreter per lookup are capped when warm
+SPAWN_ITERATIONS = 20
+
+
+class BenchmarkPath:
+    """One access path: a cold command and a warm loop printing total ns"""
+
+    def __init__(self, name: str, requires: str, cold: List[str], warm,
+                 spawns: bool = False, compiled: bool = True):
+        self.name = name
+        self.requires = requires
+        self.cold = cold
+        self.warm = warm
+        self.spawns = spawns
+        self.compiled = compiled
+
+    def available(self) -> bool:
+        return shutil.which(self.requires) is not None
+
+
+def extract_security_function(integration_script: Path) -> str:
+    """get_security_message as installed by i18n-integration.sh (heredoc body)"""
+    content = integration_script.read_text(encoding="utf-8")
+    match = re.search(r"^get_security_message\(\) \{\n.*?^\}\n", content, re.MULTILINE | re.DOTALL)
+    if not match:
+        raise ValueError(f"get_security_message not found in {integration_script}")
+    return match.group(0)
+
+
+def bash_loop(setup: str, call: str) -> callable:
+    """Warm bash loop timed with EPOCHREALTIME (bash 5)"""
+    def command(iterations: int) -> List[str]:
+        script = (
+            f"{setup}\n{call} >/dev/null\n"
+            "start=$EPOCHREALTIME\n"
+            f"for ((i = 0; i < {iterations}; i++)); do {call} >/dev/null; done\n"
+            "end=$EPOCHREALTIME\n"
+            'echo "${start/[.,]/} ${end/[.,]/}"'
+        )
+        return ["bash", "-c", script]
+    return command
+
+
+def python_loop(setup: str, call: str) -> callable:
+    """Warm Python loop timed with perf_counter_ns"""
+    def command(iterations: int) -> List[str]:
+        script = (
+            f"import sys, time\nsys.path.insert(0, {str(SCRIPTS_DIR)!r})\n{setup}\n{call}\n"
+            "start = time.perf_counter_ns()\n"
+            f"for _ in range({iterations}):\n    {call}\n"
+            "print(time.perf_counter_ns() - start)"
+        )
+        return [sys.executable, "-c", script]
+    return command
+
+
+def node_loop(setup: str, call: str) -> callable:
+    """Warm Node loop timed with process.hrtime.bigint"""
+    def command(iterations: int) -> List[str]:
+        script = (
+            f"{setup}\n{call};\n"
+            "const start = process.hrtime.bigint();\n"
+            f"for (let i = 0; i < {iterations}; i++) {{ {call}; }}\n"
+            "console.log(String(process.hrtime.bigint() - start));"
+        )
+        return ["node", "-e", script]
+    return command
+
+
+def build_paths(i18n_dir: Path) -> List[BenchmarkPath]:
+    """All i18n access paths, binary catalogs read from i18n_dir"""
+    helper = shlex.quote(str(SCRIPTS_DIR / "i18n-helper.sh"))
+    detect = shlex.quote(str(SCRIPTS_DIR / "detect-locale.sh"))
+    security_function = extract_security_function(SCRIPTS_DIR / "i18n-integration.sh")
+    params = " ".join(shlex.quote(param) for param in MESSAGE_PARAMS)
+    message_call = f"get_message {MESSAGE_KEY} {params}"
+    no_catalog = "_i18n_load_catalog() { return 1; }"
+    security_setup = f"source {detect}\n{security_function}"
+    security_call = f"get_security_message {SECURITY_KEY}"
+
+    py_args = ", ".join(repr(param) for param in (MESSAGE_KEY,) + MESSAGE_PARAMS)
+    py_setup = "import claude_i18n"
+    py_call = f"claude_i18n.get_message({py_args})"
+    cat_path = str(i18n_dir / "{locale}" / BINARY_CATALOG_FILENAME)
+    cat_setup = f"import os, claude_i18n\ncatalog = claude_i18n.BinaryCatalog({cat_path!r}.format(locale=os.environ['CLAUDE_LOCALE']))"
+    cat_call = f"catalog.get({MESSAGE_KEY!r}).format(*{MESSAGE_PARAMS!r})"
+
+    wizard = json.dumps(str(SCRIPTS_DIR / "setup-wizard.js"))
+    js_args = ", ".join(json.dumps(value) for value in (MESSAGE_KEY,) + MESSAGE_PARAMS)
+    js_setup = f"const {{ I18n }} = require({wizard});\nconst i18n = new I18n();"
+    js_call = f"i18n.get({js_args})"
+
+    def bash(setup, call):
+        return ["bash", "-c", f"{setup}\n{call} >/dev/null"]
+
+    def python(setup, call):
+        return [sys.executable, "-c", f"import sys\nsys.path.insert(0, {str(SCRIPTS_DIR)!r})\n{setup}\n{call}"]
+
+    def node(setup, call):
+        return ["node", "-e", f"{setup}\n{call};"]
+
+    return [
+        BenchmarkPath("bash get_message (compiled catalog)", "bash",
+                      bash(f"source {helper}", message_call),
+                      bash_loop(f"source {helper}", message_call)),
+        BenchmarkPath("bash get_message (python fallback)", "bash",
+                      bash(f"source {helper}\n{no_catalog}", message_call),
+                      bash_loop(f"source {helper}\n{no_catalog}", message_call), spawns=True),
+        BenchmarkPath("bash get_security_message", "bash",
+                      bash(security_setup, security_call),
+                      bash_loop(security_setup, security_call), spawns=True),
+        BenchmarkPath("node I18n.get (messages.json)", "node",
+                      node(js_setup, js_call), node_loop(js_setup, js_call), compiled=False),
+        BenchmarkPath("node I18n.get (binary catalog)", "node",
+                      node(js_setup, js_call), node_loop(js_setup, js_call)),
+        BenchmarkPath("python claude_i18n.get_message", sys.executable,
+                      python(py_setup, py_call), python_loop(py_setup, py_call)),
+        BenchmarkPath("python BinaryCatalog.get", sys.executable,
+                      python(cat_setup, cat_call), python_loop(cat_setup, cat_call)),
+    ]
+
+
+def prepare_i18n_dirs(source: Path, work_dir: Path):
+    """Copy i18n/ twice: with compiled catalogs, and messages.json only"""
+    compiled = work_dir / "compiled"
+    plain = work_dir / "plain"
+    for target in (compiled, plain):
+        for locale_dir in source.iterdir():
+            messages = locale_dir / "messages.json"
+            if messages.is_file():
+                (target / locale_dir.name).mkdir(parents=True)
+                shutil.copy(messages, target / locale_dir.name / "messages.json")
+    for locale_dir in compiled.iterdir():
+        with open(locale_dir / "messages.json", "r", encoding="utf-8") as f:
+            write_binary_catalog(flatten_messages(json.load(f)), locale_dir / BINARY_CATALOG_FILENAME)
+    return compiled, plain
+
+
+def path_env(path: BenchmarkPath, compiled: Path, plain: Path, locale: str, cache_dir: Path) -> Dict[str, str]:
+    """Environment of a benchmark run: temp i18n dir, fixed locale, no inherited cache"""
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith(("CLAUDE_I18N_LOCALE", "CLAUDE_DETECTED_LOCALE"))}
+    env.update({
+        "CLAUDE_LOCALE": locale,
+        "I18N_DIR": str(compiled if path.compiled else plain),
+        "XDG_CACHE_HOME": str(cache_dir),
+    })
+    return env
+
+
+def run_checked(command: List[str], env: Dict[str, str]) -> str:
+    result = subprocess.run(command, capture_output=True, text=True, env=env, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"exit status {result.returncode}")
+    return result.stdout
+
+
+def measure_cold(path: BenchmarkPath, env: Dict[str, str], runs: int) -> float:
+    """Median wall-clock time of a fresh process, in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter_ns()
+        run_checked(path.cold, env)
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    return statistics.median(samples)
+
+
+def measure_warm(path: BenchmarkPath, env: Dict[str, str], iterations: int) -> float:
+    """Mean time per lookup in an initialized process, in microseconds"""
+    output = run_checked(path.warm(iterations), env).split()
+    if path.requires == "bash":
+        start_us, end_us = (int(value) for value in output)
+        return (end_us - start_us) / iterations
+    return int(output[0]) / 1e3 / iterations
+
+
+def run_benchmarks(runs: int = 10, iterations: int = 1000, locale: str = "en",
+                   only: Optional[List[str]] = None, i18n_dir=None) -> dict:
+    """Benchmark every available path and return the report"""
+    source = Path(i18n_dir) if i18n_dir else PROJECT_ROOT / "i18n"
+    report = {"locale": locale, "runs": runs, "iterations": iterations, "paths": []}
+
+    with tempfile.TemporaryDirectory(prefix="i18n-bench-") as work_dir:
+        compiled, plain = prepare_i18n_dirs(source, Path(work_dir))
+        for path in build_paths(compiled):
+            if only and not any(pattern in path.name for pattern in only):
+                continue
+            entry = {"path": path.name}
+            if not path.available():
+                entry["skipped"] = f"{path.requires} not available"
+                report["paths"].append(entry)
+                continue
+            env = path_env(path, compiled, plain, locale, Path(work_dir) / "cache")
+            warm_iterations = min(iterations, SPAWN_ITERATIONS) if path.spawns else iterations
+            try:
+                entry["cold_ms"] = round(measure_cold(path, env, runs), 3)
+                entry["warm_us"] = round(measure_warm(path, env, warm_iterations), 3)
+                entry["warm_iterations"] = warm_iterations
+            except (RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+                entry["error"] = str(e)
+            report["paths"].append(entry)
+    return report
+
+
+def print_report(report: dict):
+    """Aligned text table"""
+    print(f"i18n lookup latency (locale={report['locale']}, cold runs={report['runs']}, "
+          f"warm iterations={report['iterations']})")
+    width = max(len(entry["path"]) for entry in report["paths"]) if report["paths"] else 10
+    print(f"{'path':<{width}}  {'cold (ms)':>10}  {'warm (us)':>10}")
+    for entry in report["paths"]:
+        if "cold_ms" in entry:
+            print(f"{entry['path']:<{width}}  {entry['cold_ms']:>10.2f}  {entry['warm_us']:>10.2f}")
+        else:
+            print(f"{entry['path']:<{width}}  {entry.get('skipped') or entry.get('error')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark i18n message lookup latency")
+    parser.add_argument("--runs", type=int, default=10, help="Cold runs per path")
+    parser.add_argument("--iterations", type=int, default=1000, help="Warm lookups per path")
+    parser.add_argument("--locale", default="en", help="Locale to benchmark")
+    parser.add_argument("--only", action="append", help="Only paths whose name contains this (repeatable)")
+    parser.add_argument("--i18n-dir", help="i18n root to copy (default: the repository's)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.runs < 1 or args.iterations < 1:
+        parser.error("--runs and --iterations must be positive")
+
+    report = run_benchmarks(args.runs, args.iterations, args.locale, args.only, args.i18n_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    sys.exit(1 if any("error" in entry for entry in report["paths"]) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+i18n Catalog Consistency Checker
+Checks every i18n/<locale> against the default locale: flattened message
+keys, placeholders per key and the localized templates/ and security/ files
+
+Each catalog is read once and every comparison is a set operation, so the
+check is cheap enough to run on every CI push.
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, FrozenSet, List, Set
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from claude_i18n import DEFAULT_LOCALE, PLACEHOLDER_PATTERN, flatten_messages
+
+# Localized document trees compared file by file
+LOCALIZED_DIRS = ("templates", "security")
+
+
+def load_config(i18n_dir: str) -> dict:
+    """i18n/config.json, or an empty config"""
+    try:
+        with open(os.path.join(i18n_dir, "config.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def discover_locales(i18n_dir: str, config: dict) -> List[str]:
+    """Supported locales from the config plus any directory with a catalog"""
+    locales = set(config.get("supportedLocales", []))
+    for entry in os.listdir(i18n_dir):
+        if os.path.isfile(os.path.join(i18n_dir, entry, "messages.json")):
+            locales.add(entry)
+    return sorted(locales)
+
+
+def load_messages(i18n_dir: str, locale: str):
+    """Flattened messages of a locale, or None if the catalog is missing or invalid"""
+    try:
+        with open(os.path.join(i18n_dir, locale, "messages.json"), "r", encoding="utf-8") as f:
+            return flatten_messages(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def placeholder_sets(messages: Dict[str, str]) -> Dict[str, FrozenSet[str]]:
+    """Placeholders ({0}, {name}) used by each message"""
+    return {key: frozenset(PLACEHOLDER_PATTERN.findall(text)) for key, text in messages.items()}
+
+
+def localized_files(i18n_dir: str, locale: str) -> Set[str]:
+    """Files under the localized trees, relative to the locale directory"""
+    files = set()
+    locale_dir = os.path.join(i18n_dir, locale)
+    for tree in LOCALIZED_DIRS:
+        for root, _, names in os.walk(os.path.join(locale_dir, tree)):
+            for name in names:
+                files.add(os.path.relpath(os.path.join(root, name), locale_dir).replace(os.sep, "/"))
+    return files
+
+
+def compare_locale(reference: Dict[str, FrozenSet[str]], candidate: Dict[str, FrozenSet[str]],
+                   reference_files: Set[str], candidate_files: Set[str]) -> dict:
+    """Differences of one locale against the reference locale"""
+    reference_keys = reference.keys()
+    candidate_keys = candidate.keys()
+
+    placeholders = {}
+    for key in reference_keys & candidate_keys:
+        expected, found = reference[key], candidate[key]
+        if expected != found:
+            placeholders[key] = {
+                "missing": sorted(expected - found),
+                "extra": sorted(found - expected),
+            }
+
+    result = {
+        "missing_keys": sorted(reference_keys - candidate_keys),
+        "extra_keys": sorted(candidate_keys - reference_keys),
+        "placeholder_mismatches": dict(sorted(placeholders.items())),
+        "missing_files": sorted(reference_files - candidate_files),
+        "extra_files": sorted(candidate_files - reference_files),
+    }
+    result["consistent"] = not any(result.values())
+    return result
+
+
+def check_catalogs(i18n_dir: str, default_locale: str = None) -> dict:
+    """Consistency report of every locale against the default one"""
+    config = load_config(i18n_dir)
+    default_locale = default_locale or config.get("defaultLocale", DEFAULT_LOCALE)
+    locales = discover_locales(i18n_dir, config)
+
+    catalogs = {locale: load_messages(i18n_dir, locale) for locale in locales}
+    reference_messages = catalogs.get(default_locale)
+    if reference_messages is None:
+        raise ValueError(f"Default locale catalog not found: {i18n_dir}/{default_locale}/messages.json")
+
+    reference = placeholder_sets(reference_messages)
+    reference_files = localized_files(i18n_dir, default_locale)
+
+    report = {"default_locale": default_locale, "keys": len(reference), "locales": {}}
+    for locale in locales:
+        if locale == default_locale:
+            continue
+        if catalogs[locale] is None:
+            report["locales"][locale] = {"missing_catalog": True, "consistent": False}
+            continue
+        report["locales"][locale] = compare_locale(
+            reference, placeholder_sets(catalogs[locale]),
+            reference_files, localized_files(i18n_dir, locale),
+        )
+    report["consistent"] = all(result["consistent"] for result in report["locales"].values())
+    return report
+
+
+def print_report(report: dict):
+    """Human-readable summary"""
+    print(f"Reference locale: {report['default_locale']} ({report['keys']} keys)")
+    for locale, result in report["locales"].items():
+        if result["consistent"]:
+            print(f"[OK] {locale}")
+            continue
+        print(f"[ERROR] {locale}")
+        if result.get("missing_catalog"):
+            print("  missing messages.json")
+            continue
+        for label in ("missing_keys", "extra_keys", "missing_files", "extra_files"):
+            for item in result[label]:
+                print(f"  {label.replace('_', ' ')}: {item}")
+        for key, diff in result["placeholder_mismatches"].items():
+            print(f"  placeholders: {key} (missing: {', '.join(diff['missing']) or '-'}, "
+                  f"extra: {', '.join(diff['extra']) or '-'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check i18n catalogs against the default locale")
+    parser.add_argument("--i18n-dir", default="i18n", help="i18n root directory")
+    parser.add_argument("--default-locale", help="Reference locale (default: from config.json)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = check_catalogs(args.i18n_dir, args.default_locale)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+    sys.exit(0 if report["consistent"] else 1)
+
+
+if __name__ == "__main__":
+    main()
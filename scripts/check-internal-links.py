@@ -6,9 +6,19 @@ Vérifie que tous les liens internes pointent vers des fichiers existants
 import os
 import re
 import sys
+import json
 import argparse
 from pathlib import Path
 
+# Répertoires ignorés lors de la construction du graphe de liens
+IGNORED_DIRS = {'.git', 'node_modules', 'htmlcov', '.pytest_cache', '__pycache__'}
+
+# Suffixe des traductions françaises (README.md <-> README-FR.md)
+FR_SUFFIX = '-FR'
+
+# Pattern générique des liens markdown [texte](cible)
+LINK_PATTERN = re.compile(r'\[[^\]]*\]\(([^)\s]+)[^)]*\)')
+
 def find_internal_links(content):
     """Trouve tous les liens internes dans le contenu markdown"""
     # Pattern pour les liens markdown [text](file.md) et [text](./file.md)
@@ -60,10 +70,144 @@ def check_file_links(filepath, lang='fr'):
     
     return len(broken_links) == 0, broken_links
 
+def find_markdown_files(root='.'):
+    """Liste tous les documents markdown du dépôt (chemins relatifs)"""
+    markdown_files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in IGNORED_DIRS)
+        for filename in sorted(filenames):
+            if filename.endswith('.md'):
+                path = os.path.relpath(os.path.join(dirpath, filename), root)
+                markdown_files.append(path.replace(os.sep, '/'))
+    return markdown_files
+
+def normalize_translation(path):
+    """Ramène un chemin traduit à son équivalent anglais (X-FR.md -> X.md)"""
+    stem, ext = os.path.splitext(path)
+    if stem.endswith(FR_SUFFIX):
+        return stem[:-len(FR_SUFFIX)] + ext
+    return path
+
+def extract_link_targets(content, source_path):
+    """Extrait les cibles sortantes et les ancres d'un document
+
+    Les cibles internes sont résolues en chemins relatifs à la racine pour
+    pouvoir comparer des documents situés dans des répertoires différents.
+    """
+    links = set()
+    anchors = set()
+    base_dir = os.path.dirname(source_path)
+
+    for target in LINK_PATTERN.findall(content):
+        target, _, anchor = target.partition('#')
+        if target.startswith(('http://', 'https://', 'mailto:')):
+            links.add(target)
+            continue
+        if target:
+            if target.startswith('/'):
+                resolved = target.lstrip('/')
+            else:
+                resolved = os.path.normpath(os.path.join(base_dir, target))
+            target = resolved.replace(os.sep, '/')
+            links.add(target)
+        else:
+            target = source_path
+        if anchor:
+            anchors.add(f"{target}#{anchor}")
+
+    return links, anchors
+
+def build_link_graph(filepaths, root='.'):
+    """Construit le graphe des liens sortants de tous les documents
+
+    Chaque fichier n'est lu et analysé qu'une seule fois; le résultat associe
+    à chaque chemin ses ensembles de liens et d'ancres sortants.
+    """
+    graph = {}
+    for filepath in filepaths:
+        full_path = os.path.join(root, filepath)
+        if not os.path.exists(full_path):
+            continue
+        with open(full_path, 'r', encoding='utf-8') as f:
+            links, anchors = extract_link_targets(f.read(), filepath)
+        graph[filepath] = {'links': links, 'anchors': anchors}
+    return graph
+
+def pair_translations(filepaths):
+    """Associe chaque document anglais à sa traduction -FR"""
+    available = set(filepaths)
+    pairs = []
+    for filepath in sorted(available):
+        stem, ext = os.path.splitext(filepath)
+        if stem.endswith(FR_SUFFIX):
+            continue
+        translated = f"{stem}{FR_SUFFIX}{ext}"
+        if translated in available:
+            pairs.append((filepath, translated))
+    return pairs
+
+def link_parity(graph, pairs):
+    """Compare les liens et ancres de chaque paire EN/FR
+
+    Les cibles françaises sont normalisées (X-FR.md -> X.md) avant la
+    comparaison, qui se fait par différence d'ensembles sur le graphe.
+    """
+    report = []
+    for en_path, fr_path in pairs:
+        en_node = graph.get(en_path, {'links': set(), 'anchors': set()})
+        fr_node = graph.get(fr_path, {'links': set(), 'anchors': set()})
+
+        fr_links = {normalize_translation(link) for link in fr_node['links']}
+        fr_anchors = set()
+        for anchor in fr_node['anchors']:
+            target, _, fragment = anchor.partition('#')
+            fr_anchors.add(f"{normalize_translation(target)}#{fragment}")
+
+        entry = {
+            'en': en_path,
+            'fr': fr_path,
+            'missing_links_fr': sorted(en_node['links'] - fr_links),
+            'extra_links_fr': sorted(fr_links - en_node['links']),
+            'missing_anchors_fr': sorted(en_node['anchors'] - fr_anchors),
+            'extra_anchors_fr': sorted(fr_anchors - en_node['anchors']),
+        }
+        entry['in_parity'] = not any(
+            entry[key] for key in ('missing_links_fr', 'extra_links_fr',
+                                   'missing_anchors_fr', 'extra_anchors_fr')
+        )
+        report.append(entry)
+    return report
+
+def run_parity_report(root='.', output=None):
+    """Génère le rapport de parité EN/FR au format JSON pour la CI"""
+    filepaths = find_markdown_files(root)
+    graph = build_link_graph(filepaths, root)
+    report = link_parity(graph, pair_translations(filepaths))
+
+    payload = json.dumps({
+        'pairs': report,
+        'total_pairs': len(report),
+        'pairs_in_parity': sum(1 for entry in report if entry['in_parity']),
+    }, indent=2, ensure_ascii=False)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(payload + '\n')
+    else:
+        print(payload)
+
+    return all(entry['in_parity'] for entry in report)
+
 def main():
     parser = argparse.ArgumentParser(description='Vérifie les liens internes des documents')
     parser.add_argument('--lang', default='fr', help='Langue des documents à vérifier')
+    parser.add_argument('--parity', action='store_true',
+                        help='Compare les liens des paires EN/FR (sortie JSON)')
+    parser.add_argument('--output', help='Fichier de sortie du rapport de parité JSON')
     args = parser.parse_args()
+
+    if args.parity:
+        sys.exit(0 if run_parity_report(output=args.output) else 1)
     
     # Fichiers français à vérifier
     french_files = [
@@ -6,115 +6,294 @@ Vérifie l'utilisation cohérente des termes techniques français
 import os
 import re
 import sys
+import json
+import pickle
+import hashlib
 import argparse
 import glob
-from collections import defaultdict
-
-# Dictionnaire de terminologie technique française standardisée
-FRENCH_TERMINOLOGY = {
-    # Termes techniques généraux
-    'workflow': 'flux de travail',
-    'framework': 'framework',  # Anglicisme accepté
-    'pipeline': 'pipeline',    # Anglicisme accepté
-    'dashboard': 'tableau de bord',
-    'monitoring': 'surveillance',
-    'testing': 'tests',
-    'debugging': 'débogage',
-    
-    # Termes Claude Code spécifiques
-    'hallucination': 'hallucination',
-    'prompt': 'prompt',        # Anglicisme accepté
-    'agent': 'agent',
-    'subagent': 'sous-agent',
-    
-    # Termes de développement
-    'commit': 'commit',        # Anglicisme accepté
-    'merge': 'fusion',
-    'branch': 'branche',
-    'repository': 'dépôt',
-    'pull request': 'pull request',  # Anglicisme accepté
-    
-    # Actions et états
-    'failed': 'échoué',
-    'success': 'succès',
-    'error': 'erreur',
-    'warning': 'avertissement',
-    'critical': 'critique',
-    
-    # Structures
-    'pattern': 'pattern',      # Anglicisme accepté
-    'template': 'modèle',
-    'configuration': 'configuration',
-    'settings': 'paramètres',
-}
-
-# Patterns à détecter (termes anglais qui devraient être traduits)
-ENGLISH_PATTERNS = {
-    r'\bworkflow\b': 'flux de travail',
-    r'\bdashboard\b': 'tableau de bord', 
-    r'\bmonitoring\b': 'surveillance',
-    r'\btesting\b': 'tests',
-    r'\bdebugging\b': 'débogage',
-    r'\bmerge\b': 'fusion',
-    r'\bbranch\b': 'branche',
-    r'\brepository\b': 'dépôt',
-    r'\bfailed\b': 'échoué',
-    r'\bsuccess\b': 'succès',
-    r'\berror\b': 'erreur',
-    r'\bwarning\b': 'avertissement',
-    r'\bcritical\b': 'critique',
-    r'\btemplate\b': 'modèle',
-    r'\bsettings\b': 'paramètres',
-}
-
-# Termes français requis (doivent apparaître)
-REQUIRED_FRENCH_TERMS = [
-    'configuration',
-    'instructions',
-    'règles',
-    'validation',
-    'structure',
-    'sécurité',
-    'surveillance',
-    'métriques',
-    'performance',
-    'qualité'
-]
-
-def check_terminology_in_file(filepath):
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+# Racine du dépôt: les chemins par défaut en dépendent, pas du répertoire courant
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuration i18n: déclare les glossaires par paire de langues
+I18N_CONFIG = os.path.join(PROJECT_ROOT, 'i18n', 'config.json')
+
+# Langue cible des documents vérifiés par ce script
+TARGET_LOCALE = 'fr'
+
+# Caches du script: glossaires compilés (clé: empreinte des glossaires) et
+# résultats par fichier
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.claude', 'cache')
+GLOSSARY_CACHE_DIR = CACHE_DIR
+
+def load_glossaries(config_path=I18N_CONFIG):
+    """Charge tous les glossaires déclarés dans i18n/config.json"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    base_dir = os.path.dirname(config_path)
+    glossaries = {}
+    for pair, relative_path in sorted(config.get('glossaries', {}).items()):
+        with open(os.path.join(base_dir, relative_path), 'r', encoding='utf-8') as f:
+            glossaries[pair] = json.load(f)
+    return glossaries
+
+def glossary_hash(glossaries):
+    """Empreinte stable de l'ensemble des glossaires"""
+    return hashlib.sha256(json.dumps(
+        glossaries, sort_keys=True, ensure_ascii=False
+    ).encode('utf-8')).hexdigest()[:16]
+
+def trie_pattern(terms):
+    """Construit une expression régulière en arbre préfixe
+
+    Les préfixes communs sont factorisés: le moteur ne réessaie pas chaque
+    terme à chaque position, le coût ne croît donc pas avec le nombre de termes.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def render(node):
+        branches = [re.escape(char) + render(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = f"(?:{'|'.join(branches)})"
+        return f"{group}?" if '' in node else group
+
+    return render(trie)
+
+def word_matcher(terms):
+    """Source de l'expression reconnaissant les termes en mots entiers"""
+    if not terms:
+        return r'(?!)'
+    return rf"\b{trie_pattern(sorted(terms))}\b"
+
+def compile_glossary_tables(glossaries):
+    """Fusionne les glossaires en tables indexées par locale cible
+
+    Tous les termes interdits, toutes langues confondues, partagent un seul
+    automate; la table de remplacements indique pour quelle locale un terme
+    est interdit et par quoi le remplacer.
+    """
+    tables = {'forbidden': {}, 'required': {}, 'terminology': {}}
+    for glossary in glossaries.values():
+        target = glossary['target']
+        for term, replacement in glossary.get('forbidden', {}).items():
+            tables['forbidden'].setdefault(term.casefold(), {})[target] = replacement
+        tables['required'].setdefault(target, []).extend(glossary.get('required', []))
+        tables['terminology'].setdefault(target, {}).update(glossary.get('terminology', {}))
+
+    tables['forbidden_pattern'] = word_matcher(tables['forbidden'])
+    tables['required_patterns'] = {
+        target: '|'.join(re.escape(term) for term in sorted(
+            {term.casefold() for term in terms}, key=len, reverse=True))
+        for target, terms in tables['required'].items()
+    }
+    return tables
+
+class CompiledGlossary:
+    """Glossaires compilés une fois et partagés par toutes les locales"""
+
+    def __init__(self, tables, version):
+        self.version = version
+        self.forbidden = tables['forbidden']
+        self.required = tables['required']
+        self.terminology = tables['terminology']
+        self.matcher = re.compile(tables['forbidden_pattern'], re.IGNORECASE)
+        self.required_matchers = {
+            target: re.compile(pattern or r'(?!)')
+            for target, pattern in tables['required_patterns'].items()
+        }
+
+    def replacement(self, term, target):
+        """Terme recommandé pour la locale cible, ou None s'il est accepté"""
+        return self.forbidden.get(term.casefold(), {}).get(target)
+
+def load_compiled_glossary(config_path=I18N_CONFIG, cache_dir=GLOSSARY_CACHE_DIR):
+    """Charge les glossaires compilés depuis le cache disque si possible"""
+    glossaries = load_glossaries(config_path)
+    version = glossary_hash(glossaries)
+    cache_path = os.path.join(cache_dir, f"glossary-{version}.json") if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return CompiledGlossary(json.load(f), version)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    tables = compile_glossary_tables(glossaries)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(tables, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return CompiledGlossary(tables, version)
+
+_glossary = None
+
+def get_glossary():
+    """Glossaire compilé, chargé au premier usage plutôt qu'à l'import"""
+    global _glossary
+    if _glossary is None:
+        _glossary = load_compiled_glossary(I18N_CONFIG, GLOSSARY_CACHE_DIR)
+    return _glossary
+
+def required_terms():
+    """Termes français requis dans chaque document"""
+    return get_glossary().required.get(TARGET_LOCALE, [])
+
+def __getattr__(name):
+    """Vues historiques sur le glossaire français (compatibilité)
+
+    GLOSSARY_VERSION est la version des règles: toute modification du
+    glossaire invalide le cache des résultats.
+    """
+    if name == 'GLOSSARY':
+        return get_glossary()
+    if name == 'FRENCH_TERMINOLOGY':
+        return get_glossary().terminology.get(TARGET_LOCALE, {})
+    if name == 'ENGLISH_PATTERNS':
+        return {
+            rf"\b{re.escape(term)}\b": targets[TARGET_LOCALE]
+            for term, targets in get_glossary().forbidden.items() if TARGET_LOCALE in targets
+        }
+    if name == 'REQUIRED_FRENCH_TERMS':
+        return required_terms()
+    if name == 'GLOSSARY_VERSION':
+        return get_glossary().version
+    if name == 'REQUIRED_TERMS_MATCHER':
+        return get_glossary().required_matchers.get(TARGET_LOCALE, re.compile(r'(?!)'))
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Cache des résultats par fichier (clé: empreinte du contenu + glossaire)
+DEFAULT_CACHE_FILE = os.path.join(CACHE_DIR, 'terminology.json')
+
+# Blocs de code markdown (```...```) puis code en ligne (`...`)
+CODE_BLOCK_PATTERN = re.compile(r'```[\s\S]*?```')
+INLINE_CODE_PATTERN = re.compile(r'`[^`]*`')
+
+def _blank_code(match):
+    """Remplace du code par des espaces en conservant les retours à la ligne"""
+    return re.sub(r'[^\n]', ' ', match.group())
+
+def strip_code(content):
+    """Masque le code markdown sans décaler les positions du texte
+
+    Le contenu masqué garde la même longueur que l'original, ce qui permet
+    de convertir directement une position de correspondance en numéro de ligne.
+    """
+    content = CODE_BLOCK_PATTERN.sub(_blank_code, content)
+    return INLINE_CODE_PATTERN.sub(_blank_code, content)
+
+def newline_offsets(content):
+    """Table triée des positions de chaque retour à la ligne"""
+    offsets = []
+    position = content.find('\n')
+    while position != -1:
+        offsets.append(position)
+        position = content.find('\n', position + 1)
+    return offsets
+
+def line_number(offsets, position):
+    """Numéro de ligne (1-based) d'une position, par dichotomie"""
+    return bisect_left(offsets, position) + 1
+
+def scan_english_terms(stripped, offsets, target=TARGET_LOCALE):
+    """Parcourt un texte déjà masqué avec l'automate des termes interdits"""
+    found = []
+    glossary = get_glossary()
+    for match in glossary.matcher.finditer(stripped):
+        replacement = glossary.replacement(match.group(), target)
+        if replacement is not None:
+            found.append((line_number(offsets, match.start()), match.group(), replacement))
+    return found
+
+def find_english_terms(content):
+    """Trouve tous les termes anglais en une seule passe sur le texte
+
+    Retourne une liste de tuples (ligne, terme trouvé, terme français).
+    """
+    return scan_english_terms(strip_code(content), newline_offsets(content))
+
+TITLE_PATTERN = re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE)
+
+class Document:
+    """Vues pré-calculées d'un fichier: brute, sans code, en casse repliée"""
+
+    def __init__(self, path, content):
+        self.path = path
+        self.content = content
+        self.stripped = strip_code(content)
+        self.offsets = newline_offsets(content)
+        self.folded = content.casefold()
+        # Une seule tokenisation pour tous les termes requis
+        matcher = get_glossary().required_matchers.get(TARGET_LOCALE, re.compile(r'(?!)'))
+        self.term_counts = Counter(matcher.findall(self.folded))
+
+    def term_count(self, term):
+        """Nombre d'occurrences d'un terme requis (insensible à la casse)"""
+        return self.term_counts.get(term.casefold(), 0)
+
+    def english_terms(self):
+        """Termes anglais trouvés hors code, avec leur numéro de ligne"""
+        return scan_english_terms(self.stripped, self.offsets)
+
+class DocumentCache:
+    """Cache lecture-unique des documents partagé par toutes les vérifications"""
+
+    def __init__(self):
+        self._documents = {}
+
+    def get(self, filepath):
+        """Retourne le document (lu et analysé une seule fois) ou None"""
+        if filepath not in self._documents:
+            if not os.path.exists(filepath):
+                return None
+            with open(filepath, 'r', encoding='utf-8') as f:
+                self._documents[filepath] = Document(filepath, f.read())
+        return self._documents[filepath]
+
+def check_terminology_in_file(filepath, cache=None):
     """Vérifie la terminologie dans un fichier"""
-    if not os.path.exists(filepath):
+    document = (cache or DocumentCache()).get(filepath)
+    if document is None:
         return False, f"Fichier {filepath} introuvable"
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
+    return check_document(document)
+
+def check_document(document):
+    """Vérifie la terminologie d'un document déjà chargé"""
     issues = []
     warnings = []
     
     # Vérifier les termes anglais non traduits (hors blocs de code)
-    # Exclure les blocs de code markdown ```
-    content_without_code = re.sub(r'```[\s\S]*?```', '', content)
-    content_without_inline_code = re.sub(r'`[^`]*`', '', content_without_code)
-    
-    for pattern, french_term in ENGLISH_PATTERNS.items():
-        matches = re.finditer(pattern, content_without_inline_code, re.IGNORECASE)
-        for match in matches:
-            line_num = content[:match.start()].count('\n') + 1
-            issues.append(f"Ligne {line_num}: '{match.group()}' devrait être '{french_term}'")
+    for line_num, term, french_term in document.english_terms():
+        issues.append(f"Ligne {line_num}: '{term}' devrait être '{french_term}'")
     
     # Vérifier la présence des termes français requis
-    missing_terms = []
-    for term in REQUIRED_FRENCH_TERMS:
-        if term.lower() not in content.lower():
-            missing_terms.append(term)
+    missing_terms = [term for term in required_terms() if not document.term_count(term)]
     
     if missing_terms:
         warnings.append(f"Termes français recommandés manquants: {', '.join(missing_terms)}")
     
     # Vérifier la cohérence des majuscules pour les titres
-    title_pattern = r'^#{1,6}\s+(.+)$'
-    titles = re.findall(title_pattern, content, re.MULTILINE)
+    titles = TITLE_PATTERN.findall(document.content)
     
     for i, title in enumerate(titles):
         # Les titres devraient commencer par une majuscule (ignorer ceux avec emojis)
@@ -126,24 +305,147 @@ def check_terminology_in_file(filepath):
     
     return len(issues) == 0, issues + warnings
 
-def analyze_terminology_usage(filepaths):
+def analyze_terminology_usage(filepaths, cache=None):
     """Analyse l'usage global de la terminologie"""
+    cache = cache or DocumentCache()
     term_usage = defaultdict(int)
     
     for filepath in filepaths:
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
-                
-            for term in REQUIRED_FRENCH_TERMS:
-                count = content.count(term.lower())
-                term_usage[term] += count
+        document = cache.get(filepath)
+        if document is not None:
+            for term in required_terms():
+                term_usage[term] += document.term_count(term)
     
     return term_usage
 
+def content_digest(data):
+    """Empreinte SHA-256 du contenu brut d'un fichier"""
+    return hashlib.sha256(data).hexdigest()
+
+def validate_content(filepath, content):
+    """Valide un contenu et retourne un résultat sérialisable
+
+    Exécutée dans les processus du pool: le résultat ne contient que des
+    types JSON pour pouvoir être fusionné puis persisté dans le cache.
+    """
+    document = Document(filepath, content)
+    is_valid, messages = check_document(document)
+    return {
+        'valid': is_valid,
+        'messages': messages,
+        'term_counts': {term: document.term_count(term) for term in required_terms()},
+    }
+
+class ResultCache:
+    """Résultats par fichier persistés, invalidés par contenu ou glossaire"""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, version=None):
+        self.path = path
+        self.version = version if version is not None else get_glossary().version
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('glossary_version') == self.version:
+                    self.entries = data.get('files', {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def lookup(self, filepath, digest):
+        """Résultat mémorisé si le fichier n'a pas changé, sinon None"""
+        entry = self.entries.get(filepath)
+        if entry and entry.get('hash') == digest:
+            return entry['result']
+        return None
+
+    def store(self, filepath, digest, result):
+        self.entries[filepath] = {'hash': digest, 'result': result}
+        self.dirty = True
+
+    def save(self):
+        """Écriture atomique (fichier temporaire puis renommage)"""
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'glossary_version': self.version, 'files': self.entries},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+def validate_files(filepaths, jobs=None, result_cache=None):
+    """Valide les fichiers en parallèle en sautant ceux déjà validés
+
+    Retourne (résultats par fichier, nombre de fichiers servis par le cache).
+    """
+    results = {}
+    pending = {}
+    hits = 0
+
+    for filepath in filepaths:
+        if not os.path.exists(filepath):
+            continue
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        digest = content_digest(data)
+        cached = result_cache.lookup(filepath, digest) if result_cache else None
+        if cached is not None:
+            results[filepath] = cached
+            hits += 1
+        else:
+            pending[filepath] = (digest, data.decode('utf-8'))
+
+    jobs = jobs or os.cpu_count() or 1
+    computed = None
+    if jobs > 1 and len(pending) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+                futures = {
+                    filepath: pool.submit(validate_content, filepath, content)
+                    for filepath, (_, content) in pending.items()
+                }
+                computed = {filepath: future.result() for filepath, future in futures.items()}
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            # Pas de pool disponible (environnement restreint): mode séquentiel
+            computed = None
+        except pickle.PicklingError:
+            # Fonctions non importables par les workers (script chargé hors
+            # de sys.modules, via importlib): mode séquentiel
+            computed = None
+    if computed is None:
+        computed = {
+            filepath: validate_content(filepath, content)
+            for filepath, (_, content) in pending.items()
+        }
+
+    for filepath, result in computed.items():
+        results[filepath] = result
+        if result_cache:
+            result_cache.store(filepath, pending[filepath][0], result)
+
+    return results, hits
+
+def merge_term_usage(results):
+    """Fusionne les compteurs d'usage des résultats par fichier"""
+    term_usage = Counter({term: 0 for term in required_terms()})
+    for result in results.values():
+        term_usage.update(result['term_counts'])
+    return term_usage
+
 def main():
     parser = argparse.ArgumentParser(description='Vérifie la cohérence terminologique')
     parser.add_argument('--files', default='*-FR.md', help='Pattern des fichiers à vérifier')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Nombre de processus de validation (défaut: nombre de CPU)')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE,
+                        help='Cache des résultats par fichier')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Revalide tous les fichiers sans lire ni écrire le cache')
     args = parser.parse_args()
     
     # Trouver les fichiers français
@@ -170,11 +472,20 @@ def main():
     valid_files = 0
     all_issues = []
     
+    # Les fichiers inchangés depuis la dernière exécution sont ignorés
+    result_cache = None if args.no_cache else ResultCache(args.cache_file)
+    results, cache_hits = validate_files(french_files, args.jobs, result_cache)
+    if result_cache:
+        try:
+            result_cache.save()
+        except OSError as e:
+            print(f"[WARN] Cache non enregistre: {e}")
+    
     print("=== Validation de la cohérence terminologique ===")
     
-    for filepath in sorted(french_files):
+    for filepath in sorted(results):
         total_files += 1
-        is_valid, issues = check_terminology_in_file(filepath)
+        is_valid, issues = results[filepath]['valid'], results[filepath]['messages']
         
         if is_valid:
             valid_files += 1
@@ -187,7 +498,7 @@ def main():
     
     # Analyse globale de l'usage terminologique
     print(f"\n=== Analyse de l'usage terminologique ===")
-    term_usage = analyze_terminology_usage(french_files)
+    term_usage = merge_term_usage(results)
     
     for term, count in sorted(term_usage.items(), key=lambda x: x[1], reverse=True):
         if count > 0:
@@ -197,6 +508,7 @@ def main():
     
     print(f"\n=== Résumé ===")
     print(f"Fichiers vérifiés: {total_files}")
+    print(f"Fichiers inchangés (cache): {cache_hits}")
     print(f"Fichiers conformes: {valid_files}")
     print(f"Problèmes total: {len(all_issues)}")
     
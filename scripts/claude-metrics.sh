@@ -39,7 +39,12 @@ validate_debug_environment() {
     fi
 }
 METRICS_DIR="${CLAUDE_METRICS_DIR:-.claude/metrics}"
-METRICS_FILE="$METRICS_DIR/claude-metrics.log"
+METRICS_FILE="$METRICS_DIR/claude-metrics.log"  # pre-segments single log, imported on startup
+SEGMENTS_DIR="$METRICS_DIR/segments"             # one YYYY-MM-DD.log per day (see claude_metrics.py)
+METRICS_CLI="$SCRIPT_DIR/claude_metrics.py"
+COUNTERS_DIR="$METRICS_DIR/counters"
+# Categorical metrics counted per (date, type, value) in $COUNTERS_DIR/<date>/<type>.<value>
+COUNTED_METRICS=" hallucination config_error "
 DAILY_REPORT="$METRICS_DIR/daily-$(date +%Y%m%d).json"
 ALERT_THRESHOLD_HALLUCINATIONS=${HALLUCINATION_THRESHOLD:-5}
 ALERT_THRESHOLD_RESPONSE_TIME=${RESPONSE_TIME_THRESHOLD:-10.0}
@@ -52,13 +57,20 @@ BLUE='[0;34m'
 NC='[0m'
 
 # Ensure metrics directory exists
-mkdir -p "$METRICS_DIR"
+mkdir -p "$METRICS_DIR" "$SEGMENTS_DIR"
+
+# Event writes and counters (collector client with direct-append fallback)
+source "$SCRIPT_DIR/metrics-client.sh"
+
+# Move a pre-segments log into daily segments (once)
+if [[ -f "$METRICS_FILE" ]] && command -v python3 >/dev/null 2>&1; then
+    python3 "$METRICS_CLI" --metrics-dir "$METRICS_DIR" import-legacy >/dev/null || true
+fi
 
 # Validate debug environment
 validate_debug_environment
 
 log_metric() {
-    local timestamp=$(date -Iseconds)
     local metric_type="$1"
     local value="$2"
     local context="$3"
@@ -67,10 +79,27 @@ log_metric() {
     
     # Security: Only log to file if not in debug mode or if explicitly safe
     if [[ $DEBUG_MODE == 'true' ]]; then
-        debug_log "SENSITIVE: Writing to metrics file: $METRICS_FILE"
+        debug_log "SENSITIVE: Writing to metrics segment or collector: $SEGMENTS_DIR"
     fi
     
-    echo "$timestamp|$metric_type|$value|$context" >> "$METRICS_FILE"
+    # Through metrics-collector.py when it runs, appended directly otherwise
+    send_metric "$metric_type" "$value" "$context"
+}
+
+# Total of a metric type for a day over all its values; sets COUNTER_TOTAL
+# O(number of values): no log scan
+counter_total() {
+    local day="$1"
+    local metric_type="${2//[^A-Za-z0-9_-]/_}"
+    local file count
+    
+    COUNTER_TOTAL=0
+    for file in "$COUNTERS_DIR/$day/$metric_type".*; do
+        [[ -f "$file" && "$file" != *.tmp.* ]] || continue
+        count=0
+        read -r count < "$file" || true
+        [[ "$count" =~ ^[0-9]+$ ]] && COUNTER_TOTAL=$((COUNTER_TOTAL + count))
+    done
 }
 
 # 📊 Hallucination Counter
@@ -89,14 +118,19 @@ track_hallucination() {
     
     log_metric "hallucination" "$severity" "$type:$context"
     
-    localized_echo "metrics.hallucination.detected" "error"
-    echo "  $(get_message "metrics.hallucination.type" "$type")"
-    echo "  $(get_message "metrics.hallucination.severity" "$severity")"
-    echo "  $(get_message "metrics.hallucination.context" "$context")"
+    # One batch lookup for the whole notice
+    get_messages --array \
+        0 "metrics.hallucination.detected" \
+        1 "metrics.hallucination.type" "$type" \
+        1 "metrics.hallucination.severity" "$severity" \
+        1 "metrics.hallucination.context" "$context"
+    safe_echo "${I18N_MESSAGES[0]}" "error"
+    printf '  %s\n' "${I18N_MESSAGES[@]:1}"
     echo "  Time: $(date)"
     
-    # Check daily threshold
-    local today_count=$(grep "$(date +%Y-%m-%d)" "$METRICS_FILE" | grep "hallucination" | wc -l)
+    # Check daily threshold (persisted counters, updated by log_metric)
+    counter_total "$(date +%Y-%m-%d)" "hallucination"
+    local today_count="$COUNTER_TOTAL"
     if [ "$today_count" -ge "$ALERT_THRESHOLD_HALLUCINATIONS" ]; then
         localized_echo "metrics.hallucination.threshold" "error" "$today_count" "$ALERT_THRESHOLD_HALLUCINATIONS"
         send_alert "hallucination_threshold" "$today_count"
@@ -162,7 +196,7 @@ generate_daily_report() {
     local date_filter="${1:-$(date +%Y-%m-%d)}"
     
     debug_log "Starting daily report generation for $date_filter"
-    debug_log "Metrics file: $METRICS_FILE"
+    debug_log "Metrics segment: $SEGMENTS_DIR/$date_filter.log"
     
     # Security: Validate date format to prevent injection
     if ! [[ "$date_filter" =~ ^[0-9]{4}-[0-9]{2}-[0-9]{2}$ ]]; then
@@ -172,8 +206,18 @@ generate_daily_report() {
     
     localized_echo "metrics.generatingReport" "info"
     
-    # Extract metrics for the day
-    local day_metrics=$(grep "$date_filter" "$METRICS_FILE" 2>/dev/null || echo "")
+    # Computed from the incremental rollups when Python is available
+    if command -v python3 >/dev/null 2>&1; then
+        python3 "$METRICS_CLI" --metrics-dir "$METRICS_DIR" report --date "$date_filter" \
+            --hallucination-threshold "$ALERT_THRESHOLD_HALLUCINATIONS" \
+            --response-time-threshold "$ALERT_THRESHOLD_RESPONSE_TIME" > "$DAILY_REPORT"
+        localized_echo "metrics.reportGenerated" "success" "$DAILY_REPORT"
+        cat "$DAILY_REPORT"
+        return
+    fi
+    
+    # Extract metrics for the day: only that day's segment is read
+    local day_metrics=$(cat "$SEGMENTS_DIR/$date_filter.log" 2>/dev/null || echo "")
     
     local metrics_count=$(echo "$day_metrics" | wc -l)
     debug_log "Found $metrics_count metrics for $date_filter"
@@ -239,7 +283,7 @@ send_alert() {
     local alert_file="$METRICS_DIR/alerts.log"
     local timestamp=$(date -Iseconds)
     
-    echo "$timestamp|$alert_type|$details" >> "$alert_file"
+    append_record "$alert_file" "$timestamp|$alert_type|$details"
     
     # Hook for external alerting (webhook, email, etc.)
     if [ -f ".claude/hooks/alert.sh" ]; then
@@ -256,9 +300,15 @@ dashboard_data() {
     
     safe_echo "Last $hours hours dashboard data:" "info"
     
+    # Indexed range read of the covered segments
+    if command -v python3 >/dev/null 2>&1; then
+        python3 "$METRICS_CLI" --metrics-dir "$METRICS_DIR" dashboard --hours "$hours"
+        return
+    fi
+    
     # Get recent metrics
     local since_time=$(date -d "$hours hours ago" -Iseconds 2>/dev/null || date -v-${hours}H -Iseconds)
-    local recent_metrics=$(awk -F'|' -v since="$since_time" '$1 >= since' "$METRICS_FILE" 2>/dev/null || echo "")
+    local recent_metrics=$(cat "$SEGMENTS_DIR"/*.log 2>/dev/null | awk -F'|' -v since="$since_time" '$1 >= since' || echo "")
     
     echo "Hallucinations: $(echo "$recent_metrics" | grep "hallucination" | wc -l)"
     echo "Config Errors: $(echo "$recent_metrics" | grep "config_error" | wc -l)"
@@ -288,7 +338,7 @@ cleanup_old_metrics() {
     if [[ $DEBUG_MODE == 'true' ]]; then
         safe_echo "DEBUG MODE: Cleanup operations logged but not executed" "warn"
         debug_log "Would archive: $(find "$METRICS_DIR" -name "daily-*.json" -mtime +$keep_days 2>/dev/null | wc -l) files"
-        debug_log "Would trim log file: $METRICS_FILE"
+        debug_log "Would remove segments older than $keep_days days from: $SEGMENTS_DIR"
         return 0
     fi
     
@@ -298,13 +348,57 @@ cleanup_old_metrics() {
     # Archive old daily reports
     find "$METRICS_DIR" -name "daily-*.json" -mtime +$keep_days -exec mv {} "$METRICS_DIR/archive/" \; 2>/dev/null || true
     
-    # Trim main log file
-    local cutoff_date=$(date -d "$keep_days days ago" -Iseconds 2>/dev/null || date -v-${keep_days}d -Iseconds)
-    awk -F'|' -v cutoff="$cutoff_date" '$1 >= cutoff' "$METRICS_FILE" > "$METRICS_FILE.tmp" && mv "$METRICS_FILE.tmp" "$METRICS_FILE"
+    # Archive (gzip) or drop expired daily segments as whole files
+    if command -v python3 >/dev/null 2>&1; then
+        local retention_args=(--keep-days "$keep_days")
+        [[ "${CLAUDE_METRICS_ARCHIVE:-true}" == "false" ]] && retention_args+=(--drop)
+        if python3 "$METRICS_CLI" --metrics-dir "$METRICS_DIR" retention "${retention_args[@]}" >/dev/null; then
+            localized_echo "metrics.cleanup.completed" "success"
+            return 0
+        fi
+    fi
+    
+    # Fallback: drop expired daily segments with their indexes and rollups
+    local cutoff_day=$(date -d "$keep_days days ago" +%Y-%m-%d 2>/dev/null || date -v-${keep_days}d +%Y-%m-%d)
+    local segment
+    for segment in "$SEGMENTS_DIR"/*.log; do
+        [[ -f "$segment" ]] || continue
+        local day="${segment##*/}"
+        day="${day%.log}"
+        if [[ "$day" < "$cutoff_day" ]]; then
+            rm -f "$segment" "$SEGMENTS_DIR/$day.idx" "$METRICS_DIR/rollups/$day.json"
+        fi
+    done
     
     localized_echo "metrics.cleanup.completed" "success"
 }
 
+# Indexed query over the segments (see claude_metrics.py query --help)
+query_metrics() {
+    debug_log "Querying metrics: $*"
+    
+    if ! command -v python3 >/dev/null 2>&1; then
+        safe_echo "ERROR: python3 is required for metrics queries" "error"
+        return 1
+    fi
+    python3 "$METRICS_CLI" --metrics-dir "$METRICS_DIR" query "$@"
+}
+
+# Dashboard feed: update it and print the changes since CURSOR (JSON)
+dashboard_feed() {
+    local cursor="${1:-0}"
+    
+    if ! [[ "$cursor" =~ ^[0-9]+$ ]]; then
+        safe_echo "ERROR: Invalid cursor. Must be a feed sequence number" "error"
+        return 1
+    fi
+    if ! command -v python3 >/dev/null 2>&1; then
+        safe_echo "ERROR: python3 is required for the dashboard feed" "error"
+        return 1
+    fi
+    python3 "$METRICS_CLI" --metrics-dir "$METRICS_DIR" feed --cursor "$cursor"
+}
+
 # 📖 Usage function
 usage() {
     echo "Usage: $0 [COMMAND] [OPTIONS]"
@@ -314,6 +408,8 @@ usage() {
     echo "                           ⚠️  WARNING: Only use in secure dev environments"
     echo "                           [ALERT] NEVER enable in production or CI/CD"
     echo "  CLAUDE_METRICS_DIR=path   Custom metrics directory (default: .claude/metrics)"
+    echo "  CLAUDE_METRICS_ARCHIVE=false  Drop expired segments on cleanup instead of gzip-archiving them"
+    echo "  CLAUDE_METRICS_SOCKET=path    metrics-collector.py socket (default: \$CLAUDE_METRICS_DIR/collector.sock)"
     echo ""
     echo "Commands:"
     echo "  hallucination TYPE SEVERITY [CONTEXT]  - Track hallucination event"
@@ -323,6 +419,10 @@ usage() {
     echo "  report [DATE]                         - Generate daily report"
     echo "  dashboard [HOURS]                     - Show dashboard data"
     echo "  cleanup [DAYS]                        - Clean old metrics"
+    echo "  feed [CURSOR]                         - Dashboard changes since CURSOR (JSON)"
+    echo "  query [FILTERS] [--group-by G]        - Filter and aggregate events"
+    echo "        --type T --since T --until T --context S --severity S"
+    echo "        --aggregate count|sum|avg|min|max|p50|p95|p99 --sort A --limit N --json"
     echo ""
     echo "Examples:"
     echo "  $0 hallucination function_invention high 'invented calculateScore()'"
@@ -332,6 +432,8 @@ usage() {
     echo "  $0 report 2024-01-15"
     echo "  $0 dashboard 12"
     echo "  $0 cleanup 14"
+    echo "  $0 query --type response_time --since yesterday --until yesterday \\"
+    echo "           --group-by context --aggregate count avg --sort p95 --limit 10"
     echo ""
     echo "Debug Mode Examples:"
     echo "  DEBUG_MODE=true $0 report"
@@ -361,6 +463,13 @@ case "${1:-}" in
     "cleanup")
         cleanup_old_metrics "$2"
         ;;
+    "query")
+        shift
+        query_metrics "$@"
+        ;;
+    "feed")
+        dashboard_feed "$2"
+        ;;
     "")
         dashboard_data 24
         ;;
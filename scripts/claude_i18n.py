@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Claude i18n Library
+Python access to i18n/<locale>/messages.json for scripts, checkers and tests
+
+Catalogs are flattened into dotted keys on first use and cached per locale
+for the life of the process; templates are pre-parsed so a warm lookup is a
+dict access plus a str.format call, with no file I/O.
+"""
+
+import os
+import re
+import json
+import mmap
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_LOCALE = "en"
+SUPPORTED_LOCALES = ("en", "fr")
+
+# i18n directory: I18N_DIR (read once, like the shell helper) or the repository
+DEFAULT_I18N_DIR = os.environ.get("I18N_DIR") or str(Path(__file__).resolve().parent.parent / "i18n")
+
+# {0}, {1}... (positional) and {name} (named) placeholders
+PLACEHOLDER_PATTERN = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*|[0-9]+)\}")
+
+# Binary catalog (.mo-like), little-endian:
+#   header | hash table (slots) | entries sorted by key | UTF-8 string blob
+# A slot holds (FNV-1a hash, entry index + 1), 0 meaning empty; an entry
+# holds (key offset, key length, value offset, value length) in the blob.
+BINARY_CATALOG_FILENAME = "messages.cat"
+BINARY_MAGIC = b"CLMC"
+BINARY_VERSION = 1
+_HEADER = struct.Struct("<4sIIIIII")
+_SLOT = struct.Struct("<II")
+_ENTRY = struct.Struct("<IIII")
+
+
+def flatten_messages(data: dict, prefix: str = "") -> Dict[str, str]:
+    """Flatten nested catalogs into dotted keys ({'a': {'b': 'x'}} -> {'a.b': 'x'})"""
+    flat = {}
+    for key, value in data.items():
+        dotted = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten_messages(value, dotted))
+        elif isinstance(value, str):
+            flat[dotted] = value
+    return flat
+
+
+def placeholder_indexes(message: str) -> Dict[str, int]:
+    """Map every placeholder to its positional index
+
+    Explicit {N} placeholders keep N; named placeholders take the next free
+    index in order of appearance, so "{template} ({action})" is filled by
+    two positional parameters exactly like the shell helpers do.
+    """
+    names = PLACEHOLDER_PATTERN.findall(message)
+    used = {int(name) for name in names if name.isdigit()}
+    indexes = {str(index): index for index in used}
+    next_index = 0
+    for name in names:
+        if name in indexes:
+            continue
+        while next_index in used:
+            next_index += 1
+        indexes[name] = next_index
+        used.add(next_index)
+    return indexes
+
+
+def positional_template(message: str) -> str:
+    """Rewrite named placeholders as positional ones ({template} -> {0})"""
+    indexes = placeholder_indexes(message)
+    return PLACEHOLDER_PATTERN.sub(lambda match: "{%d}" % indexes[match.group(1)], message)
+
+
+class MessageTemplate:
+    """A message parsed once into a positional format string"""
+
+    __slots__ = ("text", "format_string", "names", "arity")
+
+    def __init__(self, text: str):
+        self.text = text
+        indexes = placeholder_indexes(text)
+        self.arity = max(indexes.values(), default=-1) + 1
+        self.names = [str(index) for index in range(self.arity)]
+        for name, index in indexes.items():
+            if not name.isdigit():
+                self.names[index] = name
+
+        # Literal braces are doubled so only placeholders reach str.format
+        parts = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            literal = text[position:match.start()]
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            parts.append("{%d}" % indexes[match.group(1)])
+            position = match.end()
+        parts.append(text[position:].replace("{", "{{").replace("}", "}}"))
+        self.format_string = "".join(parts)
+
+    def render(self, *args, **kwargs) -> str:
+        """Fill placeholders by name (kwargs) or position (args)
+
+        Placeholders without a value are left as written.
+        """
+        if not self.arity:
+            return self.text
+        if not kwargs and len(args) >= self.arity:
+            return self.format_string.format(*args)
+        values = []
+        for index, name in enumerate(self.names):
+            if name in kwargs:
+                values.append(kwargs[name])
+            elif index < len(args):
+                values.append(args[index])
+            else:
+                values.append("{%s}" % name)
+        return self.format_string.format(*values)
+
+
+def resolve_i18n_dir(i18n_dir=None) -> str:
+    """i18n root: explicit argument, then DEFAULT_I18N_DIR"""
+    return str(i18n_dir) if i18n_dir else DEFAULT_I18N_DIR
+
+
+def detect_locale(environ=None) -> str:
+    """Detect the locale with the same priority rules as i18n-helper.sh
+
+    CLAUDE_LOCALE, then LANG, LANGUAGE and LC_ALL; unsupported values fall
+    back to the default locale. Results are cached per process, keyed by
+    those four variables.
+    """
+    environ = os.environ if environ is None else environ
+    return _resolve_locale(environ.get("CLAUDE_LOCALE"), environ.get("LANG"),
+                           environ.get("LANGUAGE"), environ.get("LC_ALL"))
+
+
+@lru_cache(maxsize=32)
+def _resolve_locale(claude_locale, lang, language, lc_all) -> str:
+    if claude_locale:
+        locale = claude_locale
+    elif lang:
+        locale = lang.split(".")[0].split("_")[0]
+    elif language:
+        locale = language.split(":")[0].split("_")[0]
+    elif lc_all:
+        locale = lc_all.split(".")[0].split("_")[0]
+    else:
+        locale = DEFAULT_LOCALE
+    return locale if locale in SUPPORTED_LOCALES else DEFAULT_LOCALE
+
+
+@lru_cache(maxsize=None)
+def _load_catalog(i18n_dir: str, locale: str) -> Dict[str, MessageTemplate]:
+    messages_file = os.path.join(i18n_dir, locale, "messages.json")
+    try:
+        with open(messages_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        # Missing or unreadable locale: default catalog, like the shell and Node helpers
+        return _load_catalog(i18n_dir, DEFAULT_LOCALE) if locale != DEFAULT_LOCALE else {}
+    return {key: MessageTemplate(text) for key, text in flatten_messages(data).items()}
+
+
+def load_catalog(locale: Optional[str] = None, i18n_dir=None) -> Dict[str, MessageTemplate]:
+    """Flattened, pre-parsed catalog of a locale (loaded once per process)
+
+    A locale without a readable messages.json gets the default locale's catalog.
+    """
+    return _load_catalog(resolve_i18n_dir(i18n_dir), locale or detect_locale())
+
+
+def clear_cache():
+    """Forget loaded catalogs and locales (after editing messages.json in long-lived processes)"""
+    _load_catalog.cache_clear()
+    _resolve_locale.cache_clear()
+
+
+def get_message(key: str, *args, locale: Optional[str] = None, i18n_dir=None, **kwargs) -> str:
+    """Localized message for a dotted key, or "[Missing i18n: key]"
+
+    Usage: get_message("metrics.template.used", "CLAUDE.md", "read")
+           get_message("setup.apiKeyPrompt", service="Exa", locale="fr")
+    """
+    template = load_catalog(locale, i18n_dir).get(key)
+    if template is None:
+        return f"[Missing i18n: {key}]"
+    return template.render(*args, **kwargs)
+
+
+def fnv1a_32(data: bytes) -> int:
+    """32-bit FNV-1a hash (shared with the Node reader in i18n-catalog.js)"""
+    value = 0x811C9DC5
+    for byte in data:
+        value = ((value ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return value
+
+
+def write_binary_catalog(messages: Dict[str, str], path) -> None:
+    """Write flattened messages as a memory-mappable binary catalog
+
+    Values are stored as positional templates, like the shell catalog. The
+    hash table is kept at most half full so lookups probe O(1) slots
+    whatever the catalog size.
+    """
+    keys = sorted(messages)
+    table_size = 8
+    while table_size < 2 * len(keys):
+        table_size *= 2
+
+    blob = bytearray()
+    entries = []
+    for key in keys:
+        key_bytes = key.encode("utf-8")
+        value_bytes = positional_template(messages[key]).encode("utf-8")
+        entries.append((len(blob), len(key_bytes), len(blob) + len(key_bytes), len(value_bytes)))
+        blob += key_bytes + value_bytes
+
+    slots = [(0, 0)] * table_size
+    for index, key in enumerate(keys):
+        key_hash = fnv1a_32(key.encode("utf-8"))
+        slot = key_hash & (table_size - 1)
+        while slots[slot][1]:
+            slot = (slot + 1) & (table_size - 1)
+        slots[slot] = (key_hash, index + 1)
+
+    table_offset = _HEADER.size
+    entries_offset = table_offset + table_size * _SLOT.size
+    strings_offset = entries_offset + len(entries) * _ENTRY.size
+
+    data = bytearray(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(keys), table_size,
+                                  table_offset, entries_offset, strings_offset))
+    for slot in slots:
+        data += _SLOT.pack(*slot)
+    for entry in entries:
+        data += _ENTRY.pack(*entry)
+    data += blob
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class BinaryCatalog:
+    """Read-only, memory-mapped view of a binary catalog
+
+    Nothing is parsed up front: a lookup hashes the key, probes the table
+    and slices the mapped string blob.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, self.count, self.table_size, self.table_offset,
+             self.entries_offset, self.strings_offset) = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self._map.close()
+            raise ValueError(f"Truncated binary catalog: {self.path}")
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            self._map.close()
+            raise ValueError(f"Unsupported binary catalog: {self.path}")
+
+    def _entry(self, index: int) -> Tuple[bytes, int, int]:
+        key_offset, key_length, value_offset, value_length = _ENTRY.unpack_from(
+            self._map, self.entries_offset + index * _ENTRY.size)
+        start = self.strings_offset
+        key = self._map[start + key_offset:start + key_offset + key_length]
+        return key, start + value_offset, value_length
+
+    def get(self, key: str) -> Optional[str]:
+        """Positional template for a key, or None"""
+        key_bytes = key.encode("utf-8")
+        key_hash = fnv1a_32(key_bytes)
+        mask = self.table_size - 1
+        slot = key_hash & mask
+        for _ in range(self.table_size):
+            slot_hash, index = _SLOT.unpack_from(self._map, self.table_offset + slot * _SLOT.size)
+            if not index:
+                return None
+            if slot_hash == key_hash:
+                entry_key, value_offset, value_length = self._entry(index - 1)
+                if entry_key == key_bytes:
+                    return self._map[value_offset:value_offset + value_length].decode("utf-8")
+            slot = (slot + 1) & mask
+        return None
+
+    def keys(self):
+        """Keys in sorted order"""
+        return [self._entry(index)[0].decode("utf-8") for index in range(self.count)]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class I18n:
+    """Locale-bound accessor, mirroring the I18n class of setup-wizard.js"""
+
+    def __init__(self, locale: Optional[str] = None, i18n_dir=None):
+        self.locale = locale or detect_locale()
+        self.messages = load_catalog(self.locale, i18n_dir)
+
+    def get(self, key: str, *args, **kwargs) -> str:
+        template = self.messages.get(key)
+        if template is None:
+            return f"[Missing i18n: {key}]"
+        return template.render(*args, **kwargs)
+
+    def has(self, key: str) -> bool:
+        return key in self.messages
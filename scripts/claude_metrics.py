@@ -0,0 +1,1517 @@
+#!/usr/bin/env python3
+"""
+Claude Metrics Library
+Python client for the metrics written by claude-metrics.sh
+
+Events use the same "timestamp|type|value|context" lines as the shell
+script. Writes are buffered and flushed in batches (on size, on interval
+or at exit), each batch being a single append instead of one
+open/write/close per event.
+
+The log is partitioned into daily segments (segments/YYYY-MM-DD.log), each
+with a sparse timestamp -> byte offset index kept up to date by readers.
+Index blocks also list the metric types they hold, so a query opens only
+the days it covers and reads only the blocks of its time range and types.
+Per-minute and per-day rollups are ingested incrementally from each
+segment, so reports and dashboards never re-read raw events. Retention
+drops or gzip-archives whole expired segments (archive/segments/), listed
+in archive/manifest.json; the day rollups of archived segments are kept.
+Dashboards poll a static JSON feed (feed/) of rollup changes keyed by a
+sequence cursor instead of reloading the metrics.
+
+In-process code records timings with timed() (context manager or
+decorator), which feeds the buffered writer.
+
+Usage: python3 claude_metrics.py dashboard [--hours N]
+       python3 claude_metrics.py report [--date YYYY-MM-DD]
+       python3 claude_metrics.py import-legacy
+       python3 claude_metrics.py query [--type T] [--since T] [--until T] [--context S]
+                                       [--severity S] [--group-by G] [--aggregate A ...]
+       python3 claude_metrics.py retention [--keep-days N] [--drop]
+       python3 claude_metrics.py feed [--cursor N]
+"""
+
+import os
+import re
+import gzip
+import json
+import math
+import shutil
+import socket
+import hashlib
+import atexit
+import argparse
+import functools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: mkdir locks, like claude-metrics.sh without flock
+    fcntl = None
+
+# Metrics directory: CLAUDE_METRICS_DIR, like claude-metrics.sh
+METRICS_DIR = os.environ.get("CLAUDE_METRICS_DIR") or ".claude/metrics"
+METRICS_FILENAME = "claude-metrics.log"  # single-file log used before segments
+SEGMENTS_DIRNAME = "segments"
+ROLLUPS_DIRNAME = "rollups"
+COUNTERS_DIRNAME = "counters"
+ARCHIVE_DIRNAME = "archive"
+FEED_DIRNAME = "feed"
+COLLECTOR_SOCKET_FILENAME = "collector.sock"  # metrics-collector.py, see CLAUDE_METRICS_SOCKET
+MANIFEST_FILENAME = "manifest.json"
+
+# Days of segments kept by retention, as cleanup_old_metrics in claude-metrics.sh
+KEEP_DAYS = 30
+
+# Appends up to PIPE_BUF bytes are a single atomic write: no lock taken
+ATOMIC_APPEND_SIZE = 4096
+
+# Bytes of segment between two sparse index entries
+INDEX_INTERVAL = 4096
+
+# Categorical metrics counted per (date, type, value), see claude-metrics.sh
+COUNTED_METRICS = ("hallucination", "config_error")
+UNSAFE_NAME_PATTERN = re.compile(r"[^A-Za-z0-9_-]")
+
+# Operation names of response times, sanitized like track_response_time
+# in claude-metrics.sh unless DEBUG_MODE=true
+MAX_OPERATION_LENGTH = 50
+
+# Numeric metric values get sum/min/max, the others per-value counts
+NUMBER_PATTERN = re.compile(r"^-?\d+(\.\d+)?([eE][-+]?\d+)?$")
+
+# Latency metrics also get a quantile sketch (p50/p95/p99)
+SKETCHED_METRICS = ("response_time",)
+SKETCH_ACCURACY = 0.01   # relative error of the quantile estimates
+SKETCH_MAX_BINS = 2048   # bounded memory: lowest bins are collapsed beyond this
+SKETCH_MIN_VALUE = 1e-9  # values at or below go to the zero bin
+REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+# Bump when the rollup layout changes: older rollups are rebuilt
+ROLLUP_VERSION = 2
+
+# Dashboard feed: deltas kept for catching up, minutes and events in a snapshot
+FEED_MAX_DELTAS = 1000
+FEED_WINDOW_MINUTES = 24 * 60
+FEED_MAX_EVENTS = 200
+
+# Report thresholds, as in claude-metrics.sh
+HALLUCINATION_THRESHOLD = int(os.environ.get("HALLUCINATION_THRESHOLD") or 5)
+RESPONSE_TIME_THRESHOLD = float(os.environ.get("RESPONSE_TIME_THRESHOLD") or 10.0)
+
+# Default flush policy
+MAX_BUFFERED_EVENTS = 100
+FLUSH_INTERVAL = 1.0
+
+
+def timestamp() -> str:
+    """Local time with offset, as written by `date -Iseconds`"""
+    return datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def format_event(metric_type: str, value, context: str = "", when: Optional[str] = None) -> str:
+    """One metrics log line; newlines in fields are flattened to spaces"""
+    fields = [when or timestamp(), str(metric_type), str(value), str(context)]
+    return "|".join(field.replace("\r", " ").replace("\n", " ") for field in fields) + "\n"
+
+
+class Event(NamedTuple):
+    timestamp: str
+    epoch: float
+    type: str
+    value: str
+    context: str
+
+
+def parse_epoch(when: str) -> Optional[float]:
+    """Epoch seconds of an ISO timestamp (naive ones are local time)"""
+    try:
+        return datetime.fromisoformat(when).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_event(line: str) -> Optional[Event]:
+    """Event of a metrics line, or None for malformed lines"""
+    fields = line.rstrip("\n").split("|", 3)
+    if len(fields) < 3:
+        return None
+    epoch = parse_epoch(fields[0])
+    if epoch is None:
+        return None
+    return Event(fields[0], epoch, fields[1], fields[2], fields[3] if len(fields) > 3 else "")
+
+
+def segment_path(metrics_dir: str, day: str) -> str:
+    return os.path.join(metrics_dir, SEGMENTS_DIRNAME, f"{day}.log")
+
+
+def append_lines(path: str, data: bytes) -> None:
+    """Append data to a file with a single O_APPEND write
+
+    Up to ATOMIC_APPEND_SIZE bytes the write can't be interleaved with
+    other appends and no lock is taken. Larger data is still one write,
+    made under an exclusive flock(2) of the file as append_record in
+    append-record.sh does: long records never race each other or segment
+    archiving.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if len(data) <= ATOMIC_APPEND_SIZE:
+            _write_all(fd, data)
+        elif fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            _write_all(fd, data)  # closing the fd releases the lock
+        else:
+            with directory_lock(os.path.dirname(path) or "."):
+                _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+@contextmanager
+def directory_lock(directory: str, timeout: float = 5.0):
+    """Exclusive lock of a directory, shared with the shell script
+
+    flock(2) on <directory>/.lock when available, mkdir of
+    <directory>/.lock.d otherwise (broken after timeout).
+    """
+    if fcntl is not None:
+        fd = os.open(os.path.join(directory, ".lock"), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+        return
+
+    lock_dir = os.path.join(directory, ".lock.d")
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.mkdir(lock_dir)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                try:
+                    os.rmdir(lock_dir)
+                except OSError:
+                    pass
+                deadline = time.monotonic() + timeout
+                continue
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.rmdir(lock_dir)
+
+
+def _read_count(path: str) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            value = f.read().strip()
+    except OSError:
+        return 0
+    return int(value) if value.isdigit() else 0
+
+
+class CounterStore:
+    """Persisted daily counters in <metrics_dir>/counters/<date>/<type>.<value>
+
+    Each counter is one small file holding an integer, incremented under
+    the day lock with an atomic replace. Totals cost one read per distinct
+    value instead of a scan of the metrics log.
+    """
+
+    def __init__(self, metrics_dir: Optional[str] = None):
+        self.root = os.path.join(str(metrics_dir or METRICS_DIR), COUNTERS_DIRNAME)
+
+    @staticmethod
+    def _name(metric_type: str, value) -> str:
+        safe_value = UNSAFE_NAME_PATTERN.sub("_", str(value)) or "none"
+        return f"{UNSAFE_NAME_PATTERN.sub('_', metric_type)}.{safe_value}"
+
+    def increment_many(self, day: str, counts: Dict[Tuple[str, str], int]) -> None:
+        """Add several (type, value) counts of one day under a single lock"""
+        directory = os.path.join(self.root, day)
+        os.makedirs(directory, exist_ok=True)
+        with directory_lock(directory):
+            for (metric_type, value), amount in counts.items():
+                path = os.path.join(directory, self._name(metric_type, value))
+                tmp_path = f"{path}.tmp.{os.getpid()}"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(f"{_read_count(path) + amount}\n")
+                os.replace(tmp_path, path)
+
+    def increment(self, metric_type: str, value, day: Optional[str] = None, amount: int = 1) -> None:
+        self.increment_many(day or timestamp()[:10], {(metric_type, str(value)): amount})
+
+    def get(self, metric_type: str, value, day: Optional[str] = None) -> int:
+        return _read_count(os.path.join(self.root, day or timestamp()[:10], self._name(metric_type, value)))
+
+    def total(self, metric_type: str, day: Optional[str] = None) -> int:
+        """Count of a type over all its values for a day"""
+        directory = os.path.join(self.root, day or timestamp()[:10])
+        prefix = UNSAFE_NAME_PATTERN.sub("_", metric_type) + "."
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return 0
+        return sum(_read_count(os.path.join(directory, name)) for name in names
+                   if name.startswith(prefix) and ".tmp." not in name)
+
+
+class AppendError(OSError):
+    """append_events failed part way; unwritten holds the lines in no segment"""
+
+    def __init__(self, error: OSError, unwritten: List[str]):
+        super().__init__(*error.args)
+        self.filename = error.filename
+        self.unwritten = unwritten
+
+
+def append_events(metrics_dir: str, lines: List[str]) -> None:
+    """Append formatted lines to their daily segments and update counters
+
+    Raises AppendError with the lines not appended to their segment. When
+    only a counter update fails, the lines already in the segment are not
+    reported: writing them again would count them twice.
+    """
+    by_day: Dict[str, List[str]] = {}
+    counts: Dict[str, Counter] = {}
+    for line in lines:
+        when, metric_type, value, _ = line.split("|", 3)
+        day = when[:10]
+        by_day.setdefault(day, []).append(line)
+        if metric_type in COUNTED_METRICS:
+            counts.setdefault(day, Counter())[(metric_type, value)] += 1
+
+    days = list(by_day)
+    try:
+        os.makedirs(os.path.join(metrics_dir, SEGMENTS_DIRNAME), exist_ok=True)
+    except OSError as e:
+        raise AppendError(e, lines) from e
+    counters = CounterStore(metrics_dir)
+    for position, day in enumerate(days):
+        try:
+            append_lines(segment_path(metrics_dir, day), "".join(by_day[day]).encode("utf-8"))
+        except OSError as e:
+            raise AppendError(e, [line for later in days[position:] for line in by_day[later]]) from e
+        try:
+            if day in counts:
+                counters.increment_many(day, counts[day])
+        except OSError as e:
+            raise AppendError(e, [line for later in days[position + 1:] for line in by_day[later]]) from e
+
+
+class MetricsWriter:
+    """Buffered metrics writer
+
+    Events are kept in memory and flushed when max_events are buffered,
+    at the latest flush_interval seconds after being buffered (a timer
+    thread flushes idle writers), on flush()/close() and at interpreter
+    exit. Each batch is one append per daily segment it spans (normally
+    one), and updates the daily counters of COUNTED_METRICS.
+    """
+
+    def __init__(self, metrics_dir: Optional[str] = None, max_events: int = MAX_BUFFERED_EVENTS,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.metrics_dir = str(metrics_dir or METRICS_DIR)
+        self.max_events = max_events
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def log(self, metric_type: str, value, context: str = "", when: Optional[str] = None) -> None:
+        """Buffer one event, flushing when the batch is full or due"""
+        line = format_event(metric_type, value, context, when)
+        with self._lock:
+            if self._closed:
+                raise ValueError("MetricsWriter is closed")
+            self._buffer.append(line)
+            due = (len(self._buffer) >= self.max_events
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if not due and (self._timer is None or not self._timer.is_alive()):
+                # Timers don't survive fork(): is_alive() restarts them in children
+                self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _flush_on_timer(self) -> None:
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+        try:
+            self.flush()
+        except OSError:
+            pass  # kept in the buffer for the next flush
+
+    def flush(self) -> int:
+        """Write buffered events as one batch; returns the number written
+
+        When the write fails (OSError), the events not written to their
+        segment go back to the buffer for the next flush and the error is
+        raised.
+        """
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if self._timer is not None and self._timer is not threading.current_thread():
+                self._timer.cancel()
+            self._timer = None
+            if not lines:
+                return 0
+            try:
+                append_events(self.metrics_dir, lines)
+            except AppendError as e:
+                self._buffer = e.unwritten + self._buffer
+                raise
+            except OSError:
+                self._buffer = lines + self._buffer
+                raise
+        return len(lines)
+
+    def flush_if_due(self) -> int:
+        """Flush when flush_interval elapsed since the last flush (idle writers)"""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def pending(self) -> int:
+        """Number of buffered, unwritten events"""
+        return len(self._buffer)
+
+    def close(self) -> None:
+        """Flush and stop accepting events"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_writer: Optional[MetricsWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def get_writer() -> MetricsWriter:
+    """Process-wide writer on METRICS_DIR, created on first use"""
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None or _default_writer._closed:
+            _default_writer = MetricsWriter()
+        return _default_writer
+
+
+def log_metric(metric_type: str, value, context: str = "") -> None:
+    """Buffered equivalent of log_metric in claude-metrics.sh"""
+    get_writer().log(metric_type, value, context)
+
+
+def sanitize_operation(operation: str) -> str:
+    """Operation name as track_response_time logs it"""
+    if os.environ.get("DEBUG_MODE") == "true":
+        return operation
+    return UNSAFE_NAME_PATTERN.sub("", operation)[:MAX_OPERATION_LENGTH]
+
+
+class Timer:
+    """Wall time of a block or function, logged as a response_time event
+
+    Used through timed(). The duration is measured with perf_counter_ns
+    and logged in seconds, also when the block raises. elapsed holds the
+    last duration in seconds.
+    """
+
+    def __init__(self, operation: Optional[str] = None, writer: Optional[MetricsWriter] = None):
+        self.operation = sanitize_operation(operation) if operation is not None else None
+        self.writer = writer
+        self.elapsed: Optional[float] = None
+        self._start = 0
+
+    def __enter__(self) -> "Timer":
+        if self.operation is None:
+            raise ValueError("timed() needs an operation name outside of a decorator")
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        elapsed_ns = time.perf_counter_ns() - self._start
+        self.elapsed = elapsed_ns / 1e9
+        (self.writer or get_writer()).log("response_time", f"{self.elapsed:.6f}", self.operation)
+        return False
+
+    def __call__(self, func):
+        operation = self.operation if self.operation is not None else func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Timer(operation, self.writer):  # one timer per call: reentrant and thread-safe
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def timed(operation=None, writer: Optional[MetricsWriter] = None):
+    """Record the wall time of a block or function as response_time
+
+        with timed("file_search"):
+            ...
+
+        @timed("score_pattern")      # or @timed / @timed(): the function name
+        def score(pattern): ...
+
+    Events go through writer, or the process-wide buffered writer.
+    """
+    if callable(operation):
+        return Timer(None, writer)(operation)
+    return Timer(operation, writer)
+
+
+def collector_socket_path(metrics_dir: Optional[str] = None) -> str:
+    """Socket of metrics-collector.py: CLAUDE_METRICS_SOCKET or <metrics_dir>/collector.sock"""
+    return os.environ.get("CLAUDE_METRICS_SOCKET") or \
+        os.path.join(str(metrics_dir or METRICS_DIR), COLLECTOR_SOCKET_FILENAME)
+
+
+class CollectorClient:
+    """Streams events to metrics-collector.py over its Unix socket
+
+    The connection is opened on the first event and kept until close(),
+    so an event costs one send. When the collector is not running (or
+    goes away), events are appended to the segments directly instead.
+    """
+
+    def __init__(self, metrics_dir: Optional[str] = None, socket_path: Optional[str] = None,
+                 timeout: float = 2.0):
+        self.metrics_dir = str(metrics_dir or METRICS_DIR)
+        self.socket_path = socket_path or collector_socket_path(self.metrics_dir)
+        self.timeout = timeout
+        self._socket = None
+        self._connected = None  # unknown until the first event
+
+    def _connect(self) -> bool:
+        if self._connected is None:
+            try:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.settimeout(self.timeout)
+                self._socket.connect(self.socket_path)
+                self._connected = True
+            except (OSError, AttributeError):  # AttributeError: no AF_UNIX (Windows)
+                self._discard()
+        return bool(self._connected)
+
+    def _discard(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+        self._socket = None
+        self._connected = False
+
+    def send(self, metric_type: str, value, context: str = "") -> None:
+        line = format_event(metric_type, value, context)
+        if self._connect():
+            try:
+                self._socket.sendall(line.encode("utf-8"))
+                return
+            except OSError:
+                self._discard()
+        append_events(self.metrics_dir, [line])
+
+    def close(self) -> Optional[str]:
+        """End the stream; returns the collector reply ("ok <accepted> <rejected>")"""
+        if not self._connected:
+            return None
+        reply = b""
+        try:
+            self._socket.shutdown(socket.SHUT_WR)
+            while not reply.endswith(b"\n"):
+                chunk = self._socket.recv(1024)
+                if not chunk:
+                    break
+                reply += chunk
+        except OSError:
+            pass
+        self._discard()
+        self._connected = None
+        return reply.decode("utf-8", "replace").strip() or None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def send_metric(metric_type: str, value, context: str = "", metrics_dir: Optional[str] = None) -> bool:
+    """One event through the collector; returns False if it was appended directly"""
+    client = CollectorClient(metrics_dir)
+    client.send(metric_type, value, context)
+    return client.close() is not None
+
+
+class SegmentIndex:
+    """Sparse timestamp -> byte offset index of one segment
+
+    Stored next to the segment as <day>.idx. Each entry starts a block of
+    about INDEX_INTERVAL bytes and records the earliest and latest event
+    time and the metric types found in it, so readers can skip both by time
+    and by type however late an event was appended. Readers extend the index
+    from the last indexed byte whenever the segment grew, so it is never
+    rebuilt from scratch and writers never touch it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path[:-len(".log")] + ".idx"
+        self._reset()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("interval") == INDEX_INTERVAL and \
+                    len(data["types"]) == len(data["bounds"]) == len(data["entries"]):
+                self.size = data["size"]
+                self.epochs = [entry[0] for entry in data["entries"]]
+                self.offsets = [entry[1] for entry in data["entries"]]
+                self.bounds = [list(bounds) for bounds in data["bounds"]]
+                self.types = [set(types) for types in data["types"]]
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            self._reset()  # missing, or written before the time bounds: rebuilt
+
+    def _reset(self):
+        self.size = 0
+        self.epochs: List[float] = []
+        self.offsets: List[int] = []
+        self.bounds: List[List[float]] = []
+        self.types: List[set] = []
+
+    def update(self) -> None:
+        """Index the bytes appended since the last update"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.size:  # segment rewritten: start over
+            self._reset()
+        if size == self.size:
+            return
+
+        offset = self.size
+        last_entry = self.offsets[-1] if self.offsets else -INDEX_INTERVAL
+        stamp, epoch = None, None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partial line still being written
+                fields = raw.split(b"|", 2)
+                if len(fields) == 3:
+                    if fields[0] != stamp:  # consecutive events mostly share their second
+                        stamp, epoch = fields[0], parse_epoch(fields[0].decode("utf-8", "replace"))
+                    if epoch is not None:
+                        if offset - last_entry >= INDEX_INTERVAL:
+                            self.epochs.append(epoch)
+                            self.offsets.append(offset)
+                            self.bounds.append([epoch, epoch])
+                            self.types.append(set())
+                            last_entry = offset
+                        if self.types:
+                            bounds = self.bounds[-1]
+                            bounds[0], bounds[1] = min(bounds[0], epoch), max(bounds[1], epoch)
+                    if self.types:
+                        self.types[-1].add(fields[1].decode("utf-8", "replace"))
+                offset += len(raw)
+        self.size = offset
+        self.save()
+
+    def save(self) -> None:
+        data = {"interval": INDEX_INTERVAL, "size": self.size,
+                "entries": [[epoch, offset] for epoch, offset in zip(self.epochs, self.offsets)],
+                "bounds": self.bounds, "types": [sorted(types) for types in self.types]}
+        tmp_path = f"{self.index_path}.tmp.{os.getpid()}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # read-only metrics: the index is an optimization only
+
+    def offset_for(self, epoch: float) -> int:
+        """Byte offset from which every event at or after epoch is found"""
+        for block, (_, latest) in enumerate(self.bounds):
+            if latest >= epoch:
+                return self.offsets[block]
+        return self.size
+
+    def ranges(self, since: Optional[float] = None, until: Optional[float] = None,
+               types: Optional[Set[str]] = None) -> List[Tuple[int, Optional[int]]]:
+        """Byte ranges (start, end) that may hold events of types within [since, until]
+
+        end is None for a range that runs to the end of the segment, which
+        covers the bytes appended since the last update.
+        """
+        if not self.offsets:
+            return [(0, None)]
+        ranges: List[Tuple[int, Optional[int]]] = []
+        for block, (earliest, latest) in enumerate(self.bounds):
+            if (since is not None and latest < since) or (until is not None and earliest > until) \
+                    or (types is not None and not types & self.types[block]):
+                continue
+            start = self.offsets[block]
+            end = self.offsets[block + 1] if block + 1 < len(self.offsets) else self.size
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        # Bytes appended since the last update are not indexed yet
+        if ranges and ranges[-1][1] == self.size:
+            ranges[-1] = (ranges[-1][0], None)
+        else:
+            ranges.append((self.size, None))
+        return ranges
+
+
+def segment_days(metrics_dir: str) -> List[str]:
+    """Days that have a segment, oldest first"""
+    try:
+        names = os.listdir(os.path.join(metrics_dir, SEGMENTS_DIRNAME))
+    except OSError:
+        return []
+    return sorted(name[:-len(".log")] for name in names
+                  if name.endswith(".log") and re.match(r"^\d{4}-\d{2}-\d{2}\.log$", name))
+
+
+def read_segment(path: str, since: Optional[float] = None, until: Optional[float] = None,
+                 types: Optional[Set[str]] = None) -> Iterator[Event]:
+    """Events of one segment within [since, until], of the given types if any
+
+    Only the index blocks that cover the time range and hold one of the
+    types are read.
+    """
+    index = SegmentIndex(path)
+    index.update()
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return
+    with f:
+        for start, end in index.ranges(since, until, types):
+            f.seek(start)
+            position = start
+            while end is None or position < end:
+                raw = f.readline()
+                if not raw:
+                    break
+                position += len(raw)
+                event = parse_event(raw.decode("utf-8", "replace"))
+                if event is None:
+                    continue
+                if (since is None or event.epoch >= since) and (until is None or event.epoch <= until) \
+                        and (types is None or event.type in types):
+                    yield event
+
+
+def read_events(metrics_dir: Optional[str] = None, since: Optional[float] = None,
+                until: Optional[float] = None, types: Optional[Set[str]] = None) -> Iterator[Event]:
+    """Events within [since, until] (epoch seconds), opening only the days covered"""
+    metrics_dir = str(metrics_dir or METRICS_DIR)
+    # Segments are named after the writer's local date: widen by a day
+    first = datetime.fromtimestamp(since).date() - timedelta(days=1) if since is not None else None
+    last = datetime.fromtimestamp(until).date() + timedelta(days=1) if until is not None else None
+    for day in segment_days(metrics_dir):
+        if (first and day < first.isoformat()) or (last and day > last.isoformat()):
+            continue
+        yield from read_segment(segment_path(metrics_dir, day), since, until, types)
+
+
+def import_legacy_log(metrics_dir: Optional[str] = None) -> int:
+    """Move claude-metrics.log into daily segments; returns the lines imported
+
+    Counters are updated for the imported events. The old file is kept as
+    claude-metrics.log.imported-<time>.
+    """
+    metrics_dir = str(metrics_dir or METRICS_DIR)
+    legacy = os.path.join(metrics_dir, METRICS_FILENAME)
+    if not os.path.exists(legacy):
+        return 0
+    with directory_lock(metrics_dir):
+        try:
+            with open(legacy, "r", encoding="utf-8", errors="replace") as f:
+                lines = [line if line.endswith("\n") else line + "\n"
+                         for line in f if parse_event(line) is not None]
+        except FileNotFoundError:
+            return 0  # imported by a concurrent process
+        if lines:
+            append_events(metrics_dir, lines)
+        os.replace(legacy, f"{legacy}.imported-{datetime.now().strftime('%Y%m%d%H%M%S')}")
+    return len(lines)
+
+
+def load_manifest(metrics_dir: Optional[str] = None) -> dict:
+    """archive/manifest.json: {"segments": {day: entry}}, or an empty manifest"""
+    path = os.path.join(str(metrics_dir or METRICS_DIR), ARCHIVE_DIRNAME, MANIFEST_FILENAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get("segments"), dict):
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"segments": {}}
+
+
+def _archive_segment(segment: str, target: str) -> Tuple[int, int]:
+    """Gzip a segment into target; returns (bytes, events)
+
+    A segment re-created for an already archived day is added as a new gzip
+    member: zcat and gzip.open read the members back to back.
+    """
+    size = events = 0
+    tmp_path = f"{target}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as out:
+        if os.path.exists(target):
+            with open(target, "rb") as previous:
+                shutil.copyfileobj(previous, out)
+        with open(segment, "rb") as f, gzip.GzipFile(fileobj=out, mode="wb") as compressed:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # wait for locked (long) appends
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                size += len(chunk)
+                events += chunk.count(b"\n")
+                compressed.write(chunk)
+    os.replace(tmp_path, target)
+    return size, events
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def apply_retention(metrics_dir: Optional[str] = None, keep_days: int = KEEP_DAYS,
+                    archive: bool = True) -> List[dict]:
+    """Archive (or drop, with archive=False) the segments older than keep_days
+
+    Whole segment files are compressed and unlinked: the cost depends on the
+    expired days only, and writers, which append to the current day, are
+    never blocked or rewritten. Archived days are rolled up first and keep
+    their rollup, so their daily report still works; dropped days lose it.
+    Returns the manifest entries written.
+    """
+    if keep_days < 1:
+        raise ValueError("keep_days must be at least 1")
+    metrics_dir = str(metrics_dir or METRICS_DIR)
+    cutoff = (datetime.now().date() - timedelta(days=keep_days)).isoformat()
+    expired = [day for day in segment_days(metrics_dir) if day < cutoff]
+    if not expired:
+        return []
+
+    archive_dir = os.path.join(metrics_dir, ARCHIVE_DIRNAME)
+    os.makedirs(os.path.join(archive_dir, SEGMENTS_DIRNAME), exist_ok=True)
+    entries = []
+    with directory_lock(archive_dir):
+        manifest = load_manifest(metrics_dir)
+        for day in expired:
+            segment = segment_path(metrics_dir, day)
+            previous = manifest["segments"].get(day, {})
+            entry = {"action": "archived" if archive else "dropped", "at": timestamp()}
+            try:
+                if archive:
+                    rollup = load_rollup(metrics_dir, day)
+                    relative = f"{SEGMENTS_DIRNAME}/{day}.log.gz"
+                    target = os.path.join(archive_dir, relative)
+                    size, events = _archive_segment(segment, target)
+                    if previous.get("action") == "archived":
+                        size += previous.get("bytes", 0)
+                        events += previous.get("events", 0)
+                    entry.update(file=relative, bytes=size, events=events,
+                                 compressed_bytes=os.path.getsize(target), sha256=_file_sha256(target))
+                else:
+                    entry["bytes"] = os.path.getsize(segment)
+                os.remove(segment)
+            except FileNotFoundError:
+                continue  # handled by a concurrent cleanup
+            if archive:
+                # A late segment for this day starts from scratch: its events
+                # add to the archived totals
+                rollup.cursor = 0
+                rollup.save()
+            for leftover in [f"{segment[:-len('.log')]}.idx"] + \
+                    ([] if archive else [os.path.join(metrics_dir, ROLLUPS_DIRNAME, f"{day}.json")]):
+                try:
+                    os.remove(leftover)
+                except FileNotFoundError:
+                    pass
+            manifest["segments"][day] = entry
+            entries.append(dict(entry, day=day))
+
+        manifest["segments"] = dict(sorted(manifest["segments"].items()))
+        manifest["updated_at"] = timestamp()
+        path = os.path.join(archive_dir, MANIFEST_FILENAME)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+    return entries
+
+
+_SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_SKETCH_LOG_GAMMA = math.log(_SKETCH_GAMMA)
+
+
+def new_sketch() -> dict:
+    """Empty log-bucket quantile sketch (DDSketch-style)
+
+    A positive value x lands in bin ceil(log_gamma(x)); every bin spans a
+    constant relative width, so quantiles are estimated within
+    SKETCH_ACCURACY relative error. Sketches merge by adding bin counts,
+    which makes them combinable across minutes, days and hosts. Plain
+    dicts with string keys keep them JSON-serializable in the rollups.
+    """
+    return {"zero": 0, "bins": {}}
+
+
+def sketch_add(sketch: dict, value: float) -> None:
+    if value <= SKETCH_MIN_VALUE:
+        sketch["zero"] += 1
+        return
+    key = str(math.ceil(math.log(value) / _SKETCH_LOG_GAMMA))
+    bins = sketch["bins"]
+    bins[key] = bins.get(key, 0) + 1
+    if len(bins) > SKETCH_MAX_BINS:
+        _collapse_lowest(bins)
+
+
+def _collapse_lowest(bins: dict) -> None:
+    keys = sorted(bins, key=int)
+    excess = len(keys) - SKETCH_MAX_BINS
+    target = keys[excess]
+    for key in keys[:excess]:
+        bins[target] += bins.pop(key)
+
+
+def sketch_merge(into: dict, sketch: dict) -> dict:
+    into["zero"] += sketch["zero"]
+    bins = into["bins"]
+    for key, count in sketch["bins"].items():
+        bins[key] = bins.get(key, 0) + count
+    if len(bins) > SKETCH_MAX_BINS:
+        _collapse_lowest(bins)
+    return into
+
+
+def sketch_quantile(sketch: Optional[dict], quantile: float) -> float:
+    """Estimated value at a quantile (0..1), 0 for an empty sketch"""
+    if not sketch:
+        return 0
+    total = sketch["zero"] + sum(sketch["bins"].values())
+    if not total:
+        return 0
+    rank = max(math.ceil(quantile * total), 1)  # nearest rank, 1-based
+    seen = sketch["zero"]
+    if seen >= rank:
+        return 0
+    for key in sorted(sketch["bins"], key=int):
+        seen += sketch["bins"][key]
+        if seen >= rank:
+            # Bin midpoint: within SKETCH_ACCURACY of any value of the bin
+            return 2 * _SKETCH_GAMMA ** int(key) / (_SKETCH_GAMMA + 1)
+    return 0
+
+
+def percentiles(stats: Optional[dict]) -> Dict[str, float]:
+    """{"p50": ..., "p95": ..., "p99": ...} of sketched stats"""
+    sketch = stats.get("sketch") if stats else None
+    return {f"p{round(q * 100)}": round(sketch_quantile(sketch, q), 6) for q in REPORTED_QUANTILES}
+
+
+def new_stats() -> dict:
+    """Empty aggregate: count, numeric sum/min/max, counts per other value"""
+    return {"count": 0, "numeric": 0, "sum": 0.0, "min": None, "max": None, "values": {}}
+
+
+def add_value(stats: dict, value: str, sketched: bool = False) -> None:
+    stats["count"] += 1
+    if NUMBER_PATTERN.match(value):
+        number = float(value)
+        stats["numeric"] += 1
+        stats["sum"] += number
+        stats["min"] = number if stats["min"] is None else min(stats["min"], number)
+        stats["max"] = number if stats["max"] is None else max(stats["max"], number)
+        if sketched:
+            sketch_add(stats.setdefault("sketch", new_sketch()), number)
+    else:
+        stats["values"][value] = stats["values"].get(value, 0) + 1
+
+
+def merge_stats(into: dict, stats: dict) -> dict:
+    into["count"] += stats["count"]
+    into["numeric"] += stats["numeric"]
+    into["sum"] += stats["sum"]
+    for bound, pick in (("min", min), ("max", max)):
+        if stats[bound] is not None:
+            into[bound] = stats[bound] if into[bound] is None else pick(into[bound], stats[bound])
+    for value, count in stats["values"].items():
+        into["values"][value] = into["values"].get(value, 0) + count
+    if "sketch" in stats:
+        sketch_merge(into.setdefault("sketch", new_sketch()), stats["sketch"])
+    return into
+
+
+def average(stats: Optional[dict]) -> float:
+    return stats["sum"] / stats["numeric"] if stats and stats["numeric"] else 0
+
+
+class Rollup:
+    """Aggregates of one daily segment, stored as rollups/<day>.json
+
+    "minutes" maps an epoch minute to per-type stats, "types" holds the
+    per-type stats of the day and "contexts" the per-(type, context) ones.
+    Stats of SKETCHED_METRICS carry a quantile sketch, so every bucket and
+    context (the operation, for response times) has mergeable percentiles.
+    "cursor" is the segment byte offset ingested so far: update() only
+    reads what was appended since. Concurrent updates start from the same
+    saved state, so the last save is always complete.
+    """
+
+    def __init__(self, metrics_dir: str, day: str):
+        self.day = day
+        self.segment = segment_path(metrics_dir, day)
+        self.path = os.path.join(metrics_dir, ROLLUPS_DIRNAME, f"{day}.json")
+        self._reset()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != ROLLUP_VERSION:
+                raise ValueError("outdated rollup")
+            self.cursor = data["cursor"]
+            self.minutes = data["minutes"]
+            self.types = data["types"]
+            self.contexts = data["contexts"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._reset()
+
+    def _reset(self):
+        self.cursor = 0
+        self.minutes: Dict[str, Dict[str, dict]] = {}
+        self.types: Dict[str, dict] = {}
+        self.contexts: Dict[str, Dict[str, dict]] = {}
+
+    def add(self, event: Event) -> None:
+        sketched = event.type in SKETCHED_METRICS
+        minute = self.minutes.setdefault(str(int(event.epoch // 60)), {})
+        add_value(minute.setdefault(event.type, new_stats()), event.value, sketched)
+        add_value(self.types.setdefault(event.type, new_stats()), event.value, sketched)
+        contexts = self.contexts.setdefault(event.type, {})
+        add_value(contexts.setdefault(event.context, new_stats()), event.value, sketched)
+
+    def update(self) -> "Rollup":
+        """Ingest the events appended to the segment since the cursor"""
+        try:
+            size = os.path.getsize(self.segment)
+        except OSError:
+            return self
+        if size < self.cursor:  # segment rewritten: start over
+            self._reset()
+        if size == self.cursor:
+            return self
+
+        offset = self.cursor
+        with open(self.segment, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partial line still being written
+                offset += len(raw)
+                event = parse_event(raw.decode("utf-8", "replace"))
+                if event is not None:
+                    self.add(event)
+        self.cursor = offset
+        self.save()
+        return self
+
+    def save(self) -> None:
+        data = {"version": ROLLUP_VERSION, "day": self.day, "cursor": self.cursor, "minutes": self.minutes,
+                "types": self.types, "contexts": self.contexts}
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # read-only metrics: recomputed next time
+
+
+def load_rollup(metrics_dir: Optional[str], day: str) -> Rollup:
+    """Up-to-date rollup of a day"""
+    return Rollup(str(metrics_dir or METRICS_DIR), day).update()
+
+
+def summarize(metrics_dir: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None) -> Dict[str, dict]:
+    """Per-type stats of a time range, from the rollups (minute resolution)"""
+    metrics_dir = str(metrics_dir or METRICS_DIR)
+    first = datetime.fromtimestamp(since).date() - timedelta(days=1) if since is not None else None
+    last = datetime.fromtimestamp(until).date() + timedelta(days=1) if until is not None else None
+    first_minute = int(since // 60) if since is not None else None
+    last_minute = int(until // 60) if until is not None else None
+
+    totals: Dict[str, dict] = {}
+    for day in segment_days(metrics_dir):
+        if (first and day < first.isoformat()) or (last and day > last.isoformat()):
+            continue
+        rollup = load_rollup(metrics_dir, day)
+        if first_minute is None and last_minute is None:
+            for metric_type, stats in rollup.types.items():
+                merge_stats(totals.setdefault(metric_type, new_stats()), stats)
+            continue
+        for minute, by_type in rollup.minutes.items():
+            minute = int(minute)
+            if (first_minute is not None and minute < first_minute) or \
+                    (last_minute is not None and minute > last_minute):
+                continue
+            for metric_type, stats in by_type.items():
+                merge_stats(totals.setdefault(metric_type, new_stats()), stats)
+    return totals
+
+
+def daily_report(metrics_dir: Optional[str] = None, day: Optional[str] = None,
+                 hallucination_threshold: int = HALLUCINATION_THRESHOLD,
+                 response_time_threshold: float = RESPONSE_TIME_THRESHOLD) -> dict:
+    """Daily report of claude-metrics.sh, computed from the day rollup"""
+    day = day or timestamp()[:10]
+    rollup = load_rollup(metrics_dir, day)
+    types = rollup.types
+    empty = new_stats()
+    hallucinations = types.get("hallucination", empty)["count"]
+    response_times = types.get("response_time", empty)
+    templates = types.get("template_usage", empty)
+    config_errors = types.get("config_error", empty)["count"]
+    avg_response_time = average(response_times)
+
+    return {
+        "date": day,
+        "generated_at": timestamp(),
+        "metrics": {
+            "hallucinations": {
+                "count": hallucinations,
+                "threshold": hallucination_threshold,
+                "status": "ok" if hallucinations < hallucination_threshold else "alert",
+            },
+            "response_time": {
+                "average": avg_response_time,
+                "threshold": response_time_threshold,
+                "samples": response_times["numeric"],
+                "status": "ok" if avg_response_time < response_time_threshold else "alert",
+                **percentiles(response_times),
+                "operations": {
+                    operation: {"samples": stats["numeric"], **percentiles(stats)}
+                    for operation, stats in sorted(rollup.contexts.get("response_time", {}).items())
+                },
+            },
+            "template_usage": {
+                "total": templates["count"],
+                "success_rate": f"{templates['values'].get('true', 0)}/{templates['count']}",
+            },
+            "config_errors": {
+                "count": config_errors,
+                "status": "ok" if config_errors == 0 else "warning",
+            },
+        },
+    }
+
+
+def dashboard_summary(metrics_dir: Optional[str] = None, hours: float = 24) -> dict:
+    """Counts and average response time of the last hours"""
+    totals = summarize(metrics_dir, since=time.time() - hours * 3600)
+    counts = {metric_type: stats["count"] for metric_type, stats in totals.items()}
+    return {
+        "hallucinations": counts.get("hallucination", 0),
+        "config_errors": counts.get("config_error", 0),
+        "template_uses": counts.get("template_usage", 0),
+        "avg_response_time": average(totals.get("response_time")),
+        **{f"{name}_response_time": value for name, value in percentiles(totals.get("response_time")).items()},
+    }
+
+
+def public_stats(stats: dict) -> dict:
+    """Compact stats for the dashboard: the sketch is replaced by its percentiles"""
+    result = {"count": stats["count"], "avg": round(average(stats), 6), "min": stats["min"],
+              "max": stats["max"], "values": stats["values"]}
+    if "sketch" in stats:
+        result.update(percentiles(stats))
+    return result
+
+
+def _write_json(path: str, data) -> None:
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _new_events(path: str, start: int, end: int) -> List[Event]:
+    """Events of a segment between two byte offsets"""
+    events = []
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            for raw in f.read(max(end - start, 0)).splitlines():
+                event = parse_event(raw.decode("utf-8", "replace"))
+                if event is not None:
+                    events.append(event)
+    except OSError:
+        pass
+    return events
+
+
+def _event_dict(event: Event) -> dict:
+    return {"timestamp": event.timestamp, "type": event.type, "value": event.value, "context": event.context}
+
+
+def _snapshot_minutes(rollups: Dict[str, Rollup], first_minute: int) -> Dict[str, dict]:
+    """Public stats of the rollup minutes at or after first_minute"""
+    minutes = {}
+    for rollup in rollups.values():
+        for minute, by_type in rollup.minutes.items():
+            if int(minute) >= first_minute:
+                minutes[minute] = {metric_type: public_stats(stats) for metric_type, stats in by_type.items()}
+    return minutes
+
+
+def update_feed(metrics_dir: Optional[str] = None) -> int:
+    """Publish what changed since the last update; returns the feed sequence
+
+    The feed is a set of static JSON files under <metrics_dir>/feed/:
+    head.json ({"seq", "oldest"}), deltas/<seq>.json and snapshot.json.
+    A delta holds the minute buckets and day totals that changed, replacing
+    the client's copies, plus the new events (the latest FEED_MAX_EVENTS).
+    A client at cursor c fetches deltas c+1..seq, or the snapshot when c
+    is older than "oldest". Changes come from the rollups and the segment
+    bytes appended since the previous update: the raw log is never re-read.
+
+    state.json keeps the size of every segment at the last update, so only
+    the rollups of segments that grew are loaded. The snapshot is patched
+    with each delta, and rewritten without one only when a day was removed
+    or its oldest minute left the FEED_WINDOW_MINUTES window.
+    """
+    metrics_dir = str(metrics_dir or METRICS_DIR)
+    feed_dir = os.path.join(metrics_dir, FEED_DIRNAME)
+    state_path = os.path.join(feed_dir, "state.json")
+    snapshot_path = os.path.join(feed_dir, "snapshot.json")
+    os.makedirs(os.path.join(feed_dir, "deltas"), exist_ok=True)
+    with directory_lock(feed_dir):
+        state = _read_json(state_path, {})
+        seq = state.get("seq", 0)
+        cursors = state.get("cursors", {})
+        sizes = state.get("sizes", {})
+
+        present = segment_days(metrics_dir)
+        days, minutes, events = {}, {}, []
+        rollups = {}
+        for day in present:
+            try:
+                size = os.path.getsize(segment_path(metrics_dir, day))
+            except OSError:
+                continue
+            if size == sizes.get(day):
+                continue
+            sizes[day] = size
+            rollup = rollups[day] = load_rollup(metrics_dir, day)
+            previous = cursors.get(day, 0)
+            if rollup.cursor == previous:
+                continue
+            if rollup.cursor < previous:  # segment rewritten
+                previous = 0
+            new_events = _new_events(rollup.segment, previous, rollup.cursor)
+            cursors[day] = rollup.cursor
+            days[day] = {metric_type: public_stats(stats) for metric_type, stats in rollup.types.items()}
+            for event in new_events:
+                minute = str(int(event.epoch // 60))
+                minutes[minute] = {metric_type: public_stats(stats)
+                                   for metric_type, stats in rollup.minutes.get(minute, {}).items()}
+            events.extend(new_events)
+        cursors = {day: cursor for day, cursor in cursors.items() if day in present}
+        sizes = {day: size for day, size in sizes.items() if day in present}
+
+        first_minute = int(time.time() // 60) - FEED_WINDOW_MINUTES
+        snapshot_first = state.get("snapshot_first")
+        up_to_date = state.get("snapshot_seq") == seq and os.path.exists(snapshot_path)
+        if not days and up_to_date and state.get("snapshot_days") == present and \
+                (snapshot_first is None or snapshot_first >= first_minute):
+            if sizes != state.get("sizes"):  # partial lines only
+                _write_json(state_path, dict(state, cursors=cursors, sizes=sizes))
+            return seq
+
+        events = [_event_dict(event) for event in events[-FEED_MAX_EVENTS:]]
+        if days:
+            seq += 1
+            _write_json(os.path.join(feed_dir, "deltas", f"{seq}.json"),
+                        {"seq": seq, "generated_at": timestamp(), "days": days, "minutes": minutes,
+                         "events": events})
+
+        # Snapshot for new clients: day totals and the minutes of the window
+        snapshot = _read_json(snapshot_path, None) if up_to_date else None
+        if snapshot is None:  # first update, or lost: rebuilt from every rollup
+            for day in present:
+                if day not in rollups:
+                    rollups[day] = load_rollup(metrics_dir, day)
+            snapshot = {"days": {day: {metric_type: public_stats(stats)
+                                       for metric_type, stats in rollup.types.items()}
+                                 for day, rollup in rollups.items()},
+                        "minutes": _snapshot_minutes(rollups, first_minute), "events": []}
+        else:
+            snapshot["days"].update(days)
+            snapshot["minutes"].update(minutes)
+        snapshot["days"] = {day: totals for day, totals in snapshot["days"].items() if day in present}
+        snapshot["minutes"] = {minute: by_type for minute, by_type in snapshot["minutes"].items()
+                               if int(minute) >= first_minute}
+        snapshot.update(seq=seq, generated_at=timestamp(),
+                        events=(snapshot["events"] + events)[-FEED_MAX_EVENTS:])
+        _write_json(snapshot_path, snapshot)
+
+        if days:
+            oldest = max(seq - FEED_MAX_DELTAS + 1, 1)
+            stale = os.path.join(feed_dir, "deltas", f"{oldest - 1}.json")
+            if os.path.exists(stale):
+                os.remove(stale)
+            _write_json(os.path.join(feed_dir, "head.json"),
+                        {"seq": seq, "oldest": oldest, "generated_at": timestamp()})
+        _write_json(state_path, {"seq": seq, "cursors": cursors, "sizes": sizes, "snapshot_seq": seq,
+                                 "snapshot_days": present,
+                                 "snapshot_first": min(map(int, snapshot["minutes"]), default=None)})
+    return seq
+
+
+def read_feed(metrics_dir: Optional[str] = None, cursor: int = 0) -> dict:
+    """Changes since cursor merged into one delta, or the snapshot ("reset": true)
+
+    What a dashboard client does with the static files, for clients that
+    go through the CLI instead.
+    """
+    feed_dir = os.path.join(str(metrics_dir or METRICS_DIR), FEED_DIRNAME)
+    head = _read_json(os.path.join(feed_dir, "head.json"), {"seq": 0, "oldest": 1})
+    if cursor == head["seq"]:
+        return {"seq": cursor, "reset": False, "days": {}, "minutes": {}, "events": []}
+    if cursor <= 0 or cursor < head["oldest"] - 1 or cursor > head["seq"]:
+        snapshot = _read_json(os.path.join(feed_dir, "snapshot.json"),
+                              {"seq": 0, "days": {}, "minutes": {}, "events": []})
+        return {"seq": snapshot["seq"], "reset": True, "days": snapshot["days"],
+                "minutes": snapshot["minutes"], "events": snapshot["events"]}
+
+    merged = {"seq": cursor, "reset": False, "days": {}, "minutes": {}, "events": []}
+    for seq in range(cursor + 1, head["seq"] + 1):
+        delta = _read_json(os.path.join(feed_dir, "deltas", f"{seq}.json"), None)
+        if delta is None:
+            return read_feed(metrics_dir, -1)  # pruned meanwhile: start over
+        merged["seq"] = seq
+        merged["days"].update(delta["days"])
+        merged["minutes"].update(delta["minutes"])
+        merged["events"] = (merged["events"] + delta["events"])[-FEED_MAX_EVENTS:]
+    return merged
+
+
+# Query group keys and aggregations
+QUERY_GROUPS = ("type", "context", "operation", "value", "day", "hour", "minute")
+QUERY_AGGREGATES = ("count", "sum", "avg", "min", "max", "p50", "p95", "p99")
+RELATIVE_TIME_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_time(value: str, end: bool = False, now: Optional[float] = None) -> float:
+    """Epoch of a query bound: ISO timestamp, YYYY-MM-DD, today, yesterday or 30m/24h/7d ago
+
+    Days are local; with end=True a day stands for its last second.
+    """
+    now = time.time() if now is None else now
+    relative = RELATIVE_TIME_PATTERN.match(value)
+    if relative:
+        return now - float(relative.group(1)) * TIME_UNITS[relative.group(2)]
+    today = datetime.fromtimestamp(now).date()
+    day = {"today": today, "yesterday": today - timedelta(days=1)}.get(value)
+    if day is None and re.match(r"^\d{4}-\d{2}-\d{2}$", value):
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+    if day is not None:
+        start = datetime(day.year, day.month, day.day).timestamp()
+        return start + 86399.999 if end else start
+    epoch = parse_epoch(value)
+    if epoch is None:
+        raise ValueError(f"Invalid time: {value}")
+    return epoch
+
+
+def _group_key(event: Event, group_by: str) -> str:
+    if group_by == "type":
+        return event.type
+    if group_by == "context":
+        return event.context
+    if group_by == "operation":  # context up to the first ":" (type:context, template:action)
+        return event.context.split(":", 1)[0]
+    if group_by == "value":
+        return event.value
+    local = datetime.fromtimestamp(event.epoch)
+    return local.strftime({"day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H:00", "minute": "%Y-%m-%dT%H:%M"}[group_by])
+
+
+def query(metrics_dir: Optional[str] = None, types: Optional[List[str]] = None,
+          since: Optional[float] = None, until: Optional[float] = None,
+          context: Optional[str] = None, severity: Optional[str] = None,
+          group_by: Optional[str] = None) -> Dict[str, dict]:
+    """Stats of the matching events, per group ("" without group_by)
+
+    The time range and types are resolved with the segment indexes: only
+    the days, and within them the blocks, that may match are read.
+    context is a substring of the event context; severity matches the
+    value of hallucination events (and restricts the query to them).
+    """
+    if group_by is not None and group_by not in QUERY_GROUPS:
+        raise ValueError(f"Invalid group: {group_by}")
+    wanted = set(types) if types else None
+    if severity is not None:
+        wanted = {"hallucination"} & wanted if wanted is not None else {"hallucination"}
+
+    groups: Dict[str, dict] = {}
+    for event in read_events(metrics_dir, since, until, wanted):
+        if context is not None and context not in event.context:
+            continue
+        if severity is not None and event.value != severity:
+            continue
+        key = _group_key(event, group_by) if group_by else ""
+        add_value(groups.setdefault(key, new_stats()), event.value, sketched=True)
+    return groups
+
+
+def aggregate(stats: dict, name: str) -> float:
+    """One aggregation of query stats"""
+    if name == "count":
+        return stats["count"]
+    if name == "avg":
+        return round(average(stats), 6)
+    if name in ("sum", "min", "max"):
+        return stats[name] if stats["numeric"] else 0
+    return percentiles(stats)[name]
+
+
+def query_rows(groups: Dict[str, dict], aggregates: List[str], sort: Optional[str] = None,
+               limit: Optional[int] = None) -> List[dict]:
+    """Query result rows: {"group", <aggregate>: value}, sorted descending by sort"""
+    rows = [{"group": key, **{name: aggregate(stats, name) for name in aggregates}}
+            for key, stats in groups.items()]
+    if sort:
+        rows.sort(key=lambda row: (row[sort], row["group"]), reverse=True)
+    else:
+        rows.sort(key=lambda row: row["group"])
+    return rows[:limit] if limit else rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claude metrics")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dashboard = commands.add_parser("dashboard", help="Summary of the last hours")
+    dashboard.add_argument("--hours", type=float, default=24)
+    report = commands.add_parser("report", help="Daily report (JSON)")
+    report.add_argument("--date", help="Day to report (YYYY-MM-DD, default: today)")
+    report.add_argument("--hallucination-threshold", type=int, default=HALLUCINATION_THRESHOLD)
+    report.add_argument("--response-time-threshold", type=float, default=RESPONSE_TIME_THRESHOLD)
+    commands.add_parser("import-legacy", help=f"Split {METRICS_FILENAME} into daily segments")
+    feed = commands.add_parser("feed", help="Update the dashboard feed and print the changes since a cursor")
+    feed.add_argument("--cursor", type=int, default=0, help="Last sequence seen by the client (0: snapshot)")
+    query_parser = commands.add_parser("query", help="Filter and aggregate events")
+    query_parser.add_argument("--type", action="append", dest="types", help="Metric type (repeatable)")
+    query_parser.add_argument("--since", help="Start: ISO time, YYYY-MM-DD, today, yesterday or 30m/24h/7d")
+    query_parser.add_argument("--until", help="End, same formats (a day includes all of it)")
+    query_parser.add_argument("--context", help="Context substring")
+    query_parser.add_argument("--severity", help="Hallucination severity")
+    query_parser.add_argument("--group-by", choices=QUERY_GROUPS)
+    query_parser.add_argument("--aggregate", nargs="+", choices=QUERY_AGGREGATES, default=["count"])
+    query_parser.add_argument("--sort", choices=QUERY_AGGREGATES, help="Sort groups by an aggregate, descending")
+    query_parser.add_argument("--limit", type=int)
+    query_parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    retention = commands.add_parser("retention", help="Archive or drop expired daily segments")
+    retention.add_argument("--keep-days", type=int, default=KEEP_DAYS)
+    retention.add_argument("--drop", action="store_true", help="Delete expired segments instead of archiving them")
+    parser.add_argument("--metrics-dir", default=None, help="Metrics directory (default: CLAUDE_METRICS_DIR)")
+    args = parser.parse_args()
+
+    metrics_dir = args.metrics_dir or METRICS_DIR
+    if args.command == "import-legacy":
+        print(f"Imported {import_legacy_log(metrics_dir)} events")
+    elif args.command == "query":
+        if args.sort and args.sort not in args.aggregate:
+            args.aggregate.append(args.sort)
+        try:
+            since = parse_time(args.since) if args.since else None
+            until = parse_time(args.until, end=True) if args.until else None
+        except ValueError as e:
+            parser.error(str(e))
+        import_legacy_log(metrics_dir)
+        rows = query_rows(query(metrics_dir, args.types, since, until, args.context, args.severity,
+                                args.group_by), args.aggregate, args.sort, args.limit)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print("\t".join([args.group_by or "all"] + args.aggregate))
+            for row in rows:
+                print("\t".join([row["group"] or "-"] + [f"{row[name]:g}" for name in args.aggregate]))
+    elif args.command == "feed":
+        import_legacy_log(metrics_dir)
+        update_feed(metrics_dir)
+        print(json.dumps(read_feed(metrics_dir, args.cursor), separators=(",", ":")))
+    elif args.command == "retention":
+        if not 1 <= args.keep_days <= 365:
+            parser.error("Invalid keep days value. Must be 1-365")
+        for entry in apply_retention(metrics_dir, args.keep_days, archive=not args.drop):
+            print(f"{entry['action'].capitalize()} {entry['day']} ({entry['bytes']} bytes)")
+    elif args.command == "dashboard":
+        import_legacy_log(metrics_dir)
+        summary = dashboard_summary(metrics_dir, args.hours)
+        print(f"Hallucinations: {summary['hallucinations']}")
+        print(f"Config Errors: {summary['config_errors']}")
+        print(f"Template Uses: {summary['template_uses']}")
+        print(f"Avg Response Time: {summary['avg_response_time']:g}s")
+        print(f"Response Time p50/p95/p99: {summary['p50_response_time']:g}s / "
+              f"{summary['p95_response_time']:g}s / {summary['p99_response_time']:g}s")
+    elif args.command == "report":
+        if args.date and not re.match(r"^\d{4}-\d{2}-\d{2}$", args.date):
+            parser.error("Invalid date format. Use YYYY-MM-DD")
+        import_legacy_log(metrics_dir)
+        print(json.dumps(daily_report(metrics_dir, args.date, args.hallucination_threshold,
+                                      args.response_time_threshold), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+i18n Catalog Compiler
+Compiles i18n/<locale>/messages.json into flat catalogs that the shell
+helpers load once per process instead of spawning python3 per message,
+and the localized files index used by i18n-integration.sh
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from claude_i18n import (
+    BINARY_CATALOG_FILENAME, flatten_messages, positional_template, write_binary_catalog,
+)
+
+# Generated next to each messages.json
+CATALOG_FILENAME = "messages.catalog.sh"
+
+# Generated at the i18n root
+FILE_INDEX_FILENAME = "files.index.sh"
+
+# Keys are used inside bash array subscripts: keep them inert
+SAFE_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_.]+$")
+
+# Locales end up in bash variable names
+LOCALE_PATTERN = re.compile(r"^[A-Za-z]{2,3}(_[A-Za-z]{2})?$")
+
+# Localized documents are looked up in this locale order after the requested one
+FALLBACK_LOCALES = ("en", "fr")
+
+
+def shell_quote(value: str) -> str:
+    """Single-quote a value for bash, closing and escaping embedded quotes"""
+    return "'" + value.replace("'", "'\\''") + "'"
+
+
+def render_shell_catalog(locale: str, messages: Dict[str, str], source: str) -> str:
+    """Render a bash-sourceable associative array literal"""
+    lines = [
+        f"# Generated by scripts/compile-i18n-catalog.py from {source} - do not edit",
+        f"declare -gA I18N_CATALOG_{locale}=(",
+    ]
+    for key in sorted(messages):
+        if not SAFE_KEY_PATTERN.match(key):
+            continue
+        lines.append(f"  [{key}]={shell_quote(positional_template(messages[key]))}")
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def compile_locale(i18n_dir: str, locale: str, binary: bool = False) -> str:
+    """Compile one locale and return the shell catalog path
+
+    With binary=True, also write the memory-mappable messages.cat used by
+    the Python and Node readers.
+    """
+    if not LOCALE_PATTERN.match(locale):
+        raise ValueError(f"Invalid locale: {locale}")
+
+    source = os.path.join(i18n_dir, locale, "messages.json")
+    with open(source, "r", encoding="utf-8") as f:
+        messages = flatten_messages(json.load(f))
+
+    target = os.path.join(i18n_dir, locale, CATALOG_FILENAME)
+    tmp_target = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_target, "w", encoding="utf-8") as f:
+        f.write(render_shell_catalog(locale, messages, source))
+    os.replace(tmp_target, target)
+
+    if binary:
+        write_binary_catalog(messages, os.path.join(i18n_dir, locale, BINARY_CATALOG_FILENAME))
+    return target
+
+
+def available_locales(i18n_dir: str) -> List[str]:
+    """Locales that ship a messages.json"""
+    return sorted(
+        entry for entry in os.listdir(i18n_dir)
+        if os.path.isfile(os.path.join(i18n_dir, entry, "messages.json"))
+    )
+
+
+def localized_documents(i18n_dir: str, locale: str) -> List[str]:
+    """Markdown files of a locale, relative to the locale directory"""
+    locale_dir = os.path.join(i18n_dir, locale)
+    documents = []
+    for root, _, names in os.walk(locale_dir):
+        for name in names:
+            if name.endswith(".md"):
+                documents.append(os.path.relpath(os.path.join(root, name), locale_dir).replace(os.sep, "/"))
+    return sorted(documents)
+
+
+def config_documents(config: dict) -> Dict[str, str]:
+    """Logical names of the config "files" map -> document path (.md added)"""
+    documents = {}
+    for group in config.get("files", {}).values():
+        for logical_name in group.values():
+            documents[logical_name] = f"{logical_name}.md"
+    return documents
+
+
+def build_file_index(i18n_dir: str) -> dict:
+    """Resolve every known document for every locale, fallbacks included
+
+    Returns {"locales": [...], "files": {locale: [paths]}, "index":
+    {"locale:name": path}}. A name is a document path relative to the locale
+    directory (security/monitoring-guide.md) or a logical name from the
+    config (security/monitoring-guide). Names with no localized version in
+    any locale are left out of the index.
+    """
+    try:
+        with open(os.path.join(i18n_dir, "config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+
+    locales = sorted(
+        entry for entry in os.listdir(i18n_dir)
+        if os.path.isdir(os.path.join(i18n_dir, entry)) and LOCALE_PATTERN.match(entry)
+    )
+    files = {locale: localized_documents(i18n_dir, locale) for locale in locales}
+    available = {locale: set(documents) for locale, documents in files.items()}
+
+    aliases = config_documents(config)
+    names = {document: document for documents in files.values() for document in documents}
+    names.update(aliases)
+
+    index = {}
+    for locale in sorted(set(locales) | set(config.get("supportedLocales", []))):
+        if not LOCALE_PATTERN.match(locale):
+            continue
+        order = [locale] + [fallback for fallback in FALLBACK_LOCALES if fallback != locale]
+        for name, document in names.items():
+            for candidate in order:
+                if document in available.get(candidate, ()):
+                    index[f"{locale}:{name}"] = f"{i18n_dir}/{candidate}/{document}"
+                    break
+
+    return {"locales": [locale for locale in locales if files[locale]], "files": files, "index": index}
+
+
+def render_file_index(file_index: dict, source: str) -> str:
+    """Render the files index as bash-sourceable arrays"""
+    lines = [
+        f"# Generated by scripts/compile-i18n-catalog.py from {source} - do not edit",
+        "declare -gA I18N_FILE_INDEX=(",
+    ]
+    for key in sorted(file_index["index"]):
+        lines.append(f"  [{shell_quote(key)}]={shell_quote(file_index['index'][key])}")
+    lines.append(")")
+    lines.append("declare -ga I18N_FILE_LOCALES=(" +
+                 " ".join(shell_quote(locale) for locale in file_index["locales"]) + ")")
+    for locale in file_index["locales"]:
+        lines.append(f"declare -ga I18N_FILES_{locale}=(" +
+                     " ".join(shell_quote(f"{source}/{locale}/{document}")
+                              for document in file_index["files"][locale]) + ")")
+    return "\n".join(lines) + "\n"
+
+
+def compile_file_index(i18n_dir: str) -> str:
+    """Write the localized files index and return its path"""
+    target = os.path.join(i18n_dir, FILE_INDEX_FILENAME)
+    tmp_target = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_target, "w", encoding="utf-8") as f:
+        f.write(render_file_index(build_file_index(i18n_dir), i18n_dir))
+    os.replace(tmp_target, target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile i18n message catalogs")
+    parser.add_argument("--i18n-dir", default="i18n", help="i18n root directory")
+    parser.add_argument("--locale", action="append",
+                        help="Locale to compile (repeatable, default: all)")
+    parser.add_argument("--binary", action="store_true",
+                        help=f"Also write the binary {BINARY_CATALOG_FILENAME} catalog")
+    parser.add_argument("--files", action="store_true",
+                        help=f"Write the localized files index ({FILE_INDEX_FILENAME}) instead")
+    args = parser.parse_args()
+
+    try:
+        if args.files:
+            print(f"[OK] {compile_file_index(args.i18n_dir)}")
+            return
+        locales = args.locale or available_locales(args.i18n_dir)
+        for locale in locales:
+            print(f"[OK] {compile_locale(args.i18n_dir, locale, args.binary)}")
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
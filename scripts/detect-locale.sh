@@ -19,55 +19,68 @@ validate_locale() {
     return 1
 }
 
-# Function to detect locale from environment
-detect_locale() {
+# On-disk cache of system probe results (set CLAUDE_LOCALE_CACHE=false to disable)
+LOCALE_CACHE_FILE="${CLAUDE_LOCALE_CACHE_FILE:-${XDG_CACHE_HOME:-${HOME:-/tmp}/.cache}/claude-starter/locale}"
+
+# Cache key: the environment variables that drive detection
+_locale_cache_key() {
+    LOCALE_CACHE_KEY="${CLAUDE_LOCALE:-}|${LANG:-}|${LANGUAGE:-}|${LC_ALL:-}"
+}
+
+# Steps 1-4: environment variables; sets LOCALE_RESULT
+_detect_locale_from_env() {
     local detected=""
 
     # 1. Check explicit CLAUDE_LOCALE setting
-    if [[ -n "$CLAUDE_LOCALE" ]]; then
+    if [[ -n "${CLAUDE_LOCALE:-}" ]]; then
         detected="$CLAUDE_LOCALE"
         if validate_locale "$detected"; then
-            echo "$detected"
+            LOCALE_RESULT="$detected"
             return 0
         fi
     fi
 
     # 2. Check LANG environment variable
-    if [[ -n "$LANG" ]]; then
+    if [[ -n "${LANG:-}" ]]; then
         # Extract language code (e.g., fr_FR.UTF-8 -> fr)
         detected="${LANG%%_*}"
         detected="${detected%.*}"
         if validate_locale "$detected"; then
-            echo "$detected"
+            LOCALE_RESULT="$detected"
             return 0
         fi
     fi
 
     # 3. Check LANGUAGE environment variable
-    if [[ -n "$LANGUAGE" ]]; then
+    if [[ -n "${LANGUAGE:-}" ]]; then
         # Take first language from colon-separated list
         detected="${LANGUAGE%%:*}"
         detected="${detected%%_*}"
         if validate_locale "$detected"; then
-            echo "$detected"
+            LOCALE_RESULT="$detected"
             return 0
         fi
     fi
 
     # 4. Check LC_ALL
-    if [[ -n "$LC_ALL" ]]; then
+    if [[ -n "${LC_ALL:-}" ]]; then
         detected="${LC_ALL%%_*}"
         if validate_locale "$detected"; then
-            echo "$detected"
+            LOCALE_RESULT="$detected"
             return 0
         fi
     fi
 
+    return 1
+}
+
+# Steps 5-7: system probes, then default; sets LOCALE_RESULT
+_detect_locale_from_system() {
     # 5. Windows-specific detection
     if command -v powershell.exe >/dev/null 2>&1; then
         local win_locale=$(powershell.exe -Command "Get-Culture | Select-Object -ExpandProperty TwoLetterISOLanguageName" 2>/dev/null | tr -d '\r\n')
         if validate_locale "$win_locale"; then
-            echo "$win_locale"
+            LOCALE_RESULT="$win_locale"
             return 0
         fi
     fi
@@ -76,20 +89,76 @@ detect_locale() {
     if command -v defaults >/dev/null 2>&1; then
         local mac_locale=$(defaults read -g AppleLocale 2>/dev/null | cut -d'_' -f1)
         if validate_locale "$mac_locale"; then
-            echo "$mac_locale"
+            LOCALE_RESULT="$mac_locale"
             return 0
         fi
     fi
 
     # 7. Default fallback
-    echo "$DEFAULT_LOCALE"
+    LOCALE_RESULT="$DEFAULT_LOCALE"
+}
+
+# Read a cached probe result for the current key (no fork)
+_read_locale_cache() {
+    [[ "${CLAUDE_LOCALE_CACHE:-true}" != "false" && -f "$LOCALE_CACHE_FILE" ]] || return 1
+
+    local cached_key="" cached_locale=""
+    { IFS= read -r cached_key && IFS= read -r cached_locale; } < "$LOCALE_CACHE_FILE" 2>/dev/null || return 1
+    if [[ "$cached_key" == "$LOCALE_CACHE_KEY" ]] && validate_locale "$cached_locale"; then
+        LOCALE_RESULT="$cached_locale"
+        return 0
+    fi
+    return 1
+}
+
+# Store a probe result for the current key (atomic replace, best effort)
+_write_locale_cache() {
+    [[ "${CLAUDE_LOCALE_CACHE:-true}" != "false" ]] || return 0
+
+    local cache_dir="${LOCALE_CACHE_FILE%/*}"
+    local tmp_file="$LOCALE_CACHE_FILE.$$"
+    mkdir -p "$cache_dir" 2>/dev/null || return 0
+    if printf '%s\n%s\n' "$LOCALE_CACHE_KEY" "$LOCALE_RESULT" > "$tmp_file" 2>/dev/null; then
+        mv -f "$tmp_file" "$LOCALE_CACHE_FILE" 2>/dev/null || rm -f "$tmp_file"
+    fi
+    return 0
+}
+
+# Resolve the locale once per process and export it
+# Sets CLAUDE_DETECTED_LOCALE (and CLAUDE_DETECTED_LOCALE_KEY); child
+# processes inherit the result as long as the locale variables are unchanged.
+# System probes only run when the environment is inconclusive, and their
+# result is cached on disk for the same environment.
+resolve_locale() {
+    _locale_cache_key
+    if [[ -n "${CLAUDE_DETECTED_LOCALE:-}" && "${CLAUDE_DETECTED_LOCALE_KEY:-}" == "$LOCALE_CACHE_KEY" ]]; then
+        return 0
+    fi
+
+    if ! _detect_locale_from_env && ! _read_locale_cache; then
+        _detect_locale_from_system
+        _write_locale_cache
+    fi
+
+    export CLAUDE_DETECTED_LOCALE="$LOCALE_RESULT"
+    export CLAUDE_DETECTED_LOCALE_KEY="$LOCALE_CACHE_KEY"
+}
+
+# Function to detect locale from environment
+detect_locale() {
+    resolve_locale
+    echo "$CLAUDE_DETECTED_LOCALE"
 }
 
 # Function to get localized file path
 get_localized_file() {
     local base_path="$1"
     local file_type="$2"
-    local locale="${3:-$(detect_locale)}"
+    local locale="${3:-}"
+    if [[ -z "$locale" ]]; then
+        resolve_locale
+        locale="$CLAUDE_DETECTED_LOCALE"
+    fi
 
     echo "i18n/${locale}/${file_type}/${base_path}.md"
 }
@@ -97,7 +166,11 @@ get_localized_file() {
 # Function to load localized content
 load_localized_content() {
     local file_key="$1"
-    local locale="${2:-$(detect_locale)}"
+    local locale="${2:-}"
+    if [[ -z "$locale" ]]; then
+        resolve_locale
+        locale="$CLAUDE_DETECTED_LOCALE"
+    fi
 
     local config_file="i18n/config.json"
     if [[ ! -f "$config_file" ]]; then
@@ -185,6 +258,8 @@ ENVIRONMENT VARIABLES:
     LANG              System locale (e.g., fr_FR.UTF-8)
     LANGUAGE          Language preference list
     LC_ALL            Locale setting
+    CLAUDE_LOCALE_CACHE  Set to false to skip the on-disk cache of
+                      system probe results ($LOCALE_CACHE_FILE)
 
 SUPPORTED LOCALES:
     ${SUPPORTED_LOCALES[*]}
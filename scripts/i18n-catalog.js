@@ -0,0 +1,104 @@
+/**
+ * Claude Starter Kit - Binary i18n catalog reader
+ * Reads the messages.cat files written by scripts/compile-i18n-catalog.py --binary
+ *
+ * Layout (little-endian): header | hash table | entries sorted by key | string blob.
+ * The file is loaded as a single Buffer and never parsed: a lookup hashes the
+ * key (FNV-1a), probes the table and slices the blob.
+ */
+
+const fs = require('fs');
+
+const MAGIC = 'CLMC';
+const VERSION = 1;
+const HEADER_SIZE = 28;
+const SLOT_SIZE = 8;
+const ENTRY_SIZE = 16;
+
+// 32-bit FNV-1a, identical to fnv1a_32() in claude_i18n.py
+function fnv1a32(bytes) {
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < bytes.length; i++) {
+        hash ^= bytes[i];
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+    return hash >>> 0;
+}
+
+// {0}, {1}... (positional) and {name} (named) placeholders
+const PLACEHOLDER_PATTERN = /\{([A-Za-z_][A-Za-z0-9_]*|[0-9]+)\}/g;
+
+// Rewrite named placeholders as positional ones, identical to
+// positional_template() in claude_i18n.py: explicit {N} keep N, names take
+// the next free index in order of appearance
+function positionalTemplate(message) {
+    const names = Array.from(message.matchAll(PLACEHOLDER_PATTERN), match => match[1]);
+    const used = new Set(names.filter(name => /^[0-9]+$/.test(name)).map(Number));
+    const indexes = new Map(Array.from(used, index => [String(index), index]));
+    let nextIndex = 0;
+    for (const name of names) {
+        if (indexes.has(name)) {
+            continue;
+        }
+        while (used.has(nextIndex)) {
+            nextIndex++;
+        }
+        indexes.set(name, nextIndex);
+        used.add(nextIndex);
+    }
+    return message.replace(PLACEHOLDER_PATTERN, (match, name) => `{${indexes.get(name)}}`);
+}
+
+class BinaryCatalog {
+    constructor(filePath) {
+        this.filePath = filePath;
+        this.buffer = fs.readFileSync(filePath);
+
+        if (this.buffer.length < HEADER_SIZE ||
+            this.buffer.toString('latin1', 0, 4) !== MAGIC ||
+            this.buffer.readUInt32LE(4) !== VERSION) {
+            throw new Error(`Unsupported binary catalog: ${filePath}`);
+        }
+
+        this.count = this.buffer.readUInt32LE(8);
+        this.tableSize = this.buffer.readUInt32LE(12);
+        this.tableOffset = this.buffer.readUInt32LE(16);
+        this.entriesOffset = this.buffer.readUInt32LE(20);
+        this.stringsOffset = this.buffer.readUInt32LE(24);
+    }
+
+    // Positional template for a key, or undefined
+    get(key) {
+        const keyBytes = Buffer.from(key, 'utf8');
+        const keyHash = fnv1a32(keyBytes);
+        const mask = this.tableSize - 1;
+        let slot = keyHash & mask;
+
+        for (let probes = 0; probes < this.tableSize; probes++) {
+            const slotOffset = this.tableOffset + slot * SLOT_SIZE;
+            const index = this.buffer.readUInt32LE(slotOffset + 4);
+            if (index === 0) {
+                return undefined;
+            }
+            if (this.buffer.readUInt32LE(slotOffset) === keyHash) {
+                const entryOffset = this.entriesOffset + (index - 1) * ENTRY_SIZE;
+                const keyStart = this.stringsOffset + this.buffer.readUInt32LE(entryOffset);
+                const keyLength = this.buffer.readUInt32LE(entryOffset + 4);
+                if (keyLength === keyBytes.length &&
+                    this.buffer.compare(keyBytes, 0, keyLength, keyStart, keyStart + keyLength) === 0) {
+                    const valueStart = this.stringsOffset + this.buffer.readUInt32LE(entryOffset + 8);
+                    const valueLength = this.buffer.readUInt32LE(entryOffset + 12);
+                    return this.buffer.toString('utf8', valueStart, valueStart + valueLength);
+                }
+            }
+            slot = (slot + 1) & mask;
+        }
+        return undefined;
+    }
+
+    has(key) {
+        return this.get(key) !== undefined;
+    }
+}
+
+module.exports = { BinaryCatalog, fnv1a32, positionalTemplate };
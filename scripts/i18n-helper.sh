@@ -6,8 +6,25 @@
 DEFAULT_LOCALE="en"
 SUPPORTED_LOCALES=("en" "fr")
 
-# Detect system locale
-detect_locale() {
+# i18n root and catalog compiler (see scripts/compile-i18n-catalog.py)
+I18N_DIR="${I18N_DIR:-i18n}"
+if [[ "${BASH_SOURCE[0]}" == */* ]]; then
+    I18N_SCRIPT_DIR="${BASH_SOURCE[0]%/*}"
+else
+    I18N_SCRIPT_DIR="."
+fi
+I18N_CATALOG_COMPILER="$I18N_SCRIPT_DIR/compile-i18n-catalog.py"
+
+# Resolve the locale without spawning a subshell; sets I18N_LOCALE
+# The result is exported as CLAUDE_I18N_LOCALE, keyed by the locale
+# variables, so later calls and child scripts skip the resolution
+_i18n_resolve_locale() {
+    local key="${CLAUDE_LOCALE:-}|${LANG:-}|${LANGUAGE:-}|${LC_ALL:-}"
+    if [[ -n "${CLAUDE_I18N_LOCALE:-}" && "${CLAUDE_I18N_LOCALE_KEY:-}" == "$key" ]]; then
+        I18N_LOCALE="$CLAUDE_I18N_LOCALE"
+        return 0
+    fi
+    
     local locale=""
     
     # Priority order: CLAUDE_LOCALE, LANG, LANGUAGE, LC_ALL
@@ -26,95 +43,240 @@ detect_locale() {
         locale="$DEFAULT_LOCALE"
     fi
     
-    # Validate against supported locales
+    # Validate against supported locales, fallback to default
+    I18N_LOCALE="$DEFAULT_LOCALE"
+    local supported
     for supported in "${SUPPORTED_LOCALES[@]}"; do
         if [[ "$locale" == "$supported" ]]; then
-            echo "$locale"
-            return 0
+            I18N_LOCALE="$locale"
+            break
         fi
     done
     
-    # Fallback to default
-    echo "$DEFAULT_LOCALE"
+    export CLAUDE_I18N_LOCALE="$I18N_LOCALE"
+    export CLAUDE_I18N_LOCALE_KEY="$key"
+}
+
+# Detect system locale
+detect_locale() {
+    _i18n_resolve_locale
+    echo "$I18N_LOCALE"
+}
+
+# Load the compiled catalog of a locale into I18N_CATALOG_<locale>
+# The catalog is sourced once per process and rebuilt when messages.json
+# is newer; requires bash 4.2 (global associative arrays, declare -gA)
+_i18n_load_catalog() {
+    local locale="$1"
+    local loaded_var="I18N_CATALOG_LOADED_${locale}"
+    
+    if [[ -n "${!loaded_var:-}" ]]; then
+        return 0
+    fi
+    if (( BASH_VERSINFO[0] < 4 || (BASH_VERSINFO[0] == 4 && BASH_VERSINFO[1] < 2) )); then
+        return 1
+    fi
+    
+    local messages_file="$I18N_DIR/$locale/messages.json"
+    local catalog_file="$I18N_DIR/$locale/messages.catalog.sh"
+    
+    if [[ ! -f "$messages_file" ]]; then
+        return 1
+    fi
+    if [[ ! -f "$catalog_file" || "$messages_file" -nt "$catalog_file" ]]; then
+        python3 "$I18N_CATALOG_COMPILER" --i18n-dir "$I18N_DIR" --locale "$locale" >/dev/null 2>&1 || return 1
+    fi
+    
+    source "$catalog_file" || return 1
+    printf -v "$loaded_var" '%s' 1
 }
 
 # Load messages for current locale
 load_messages() {
     local locale="${1:-$(detect_locale)}"
-    local messages_file="i18n/$locale/messages.json"
+    local messages_file="$I18N_DIR/$locale/messages.json"
     
     if [[ ! -f "$messages_file" ]]; then
-        messages_file="i18n/$DEFAULT_LOCALE/messages.json"
+        messages_file="$I18N_DIR/$DEFAULT_LOCALE/messages.json"
     fi
     
     echo "$messages_file"
 }
 
-# Get localized message
-# Usage: get_message "section.key" [param1] [param2] ...
-get_message() {
+# Render a message from the compiled catalog into I18N_MESSAGE (no fork)
+# Returns 1 when the catalog is unavailable; unknown keys render as
+# "[Missing i18n: key]"
+_i18n_render() {
+    local locale="$1"
+    local key="$2"
+    shift 2
+    
+    _i18n_load_catalog "$locale" || return 1
+    
+    local entry="I18N_CATALOG_${locale}[$key]"
+    if [[ -z "${!entry+set}" ]]; then
+        I18N_MESSAGE="[Missing i18n: $key]"
+        return 0
+    fi
+    
+    I18N_MESSAGE="${!entry}"
+    local index=0
+    local param
+    for param in "$@"; do
+        I18N_MESSAGE="${I18N_MESSAGE//"{$index}"/"$param"}"
+        index=$((index + 1))
+    done
+}
+
+# Render messages with Python (bash < 4.2 or no catalog), NUL-terminated
+# Placeholders are rewritten like the compiled catalog (positional_template)
+# so both paths render the same text
+# Usage: _i18n_python_render messages_file single key [params...]
+#        _i18n_python_render messages_file batch count key [params...] [count key [params...]]...
+# In batch mode each group starts with its number of parameters
+_i18n_python_render() {
+    python3 -c "
+import sys
+import json
+
+sys.path.insert(0, sys.argv[1])
+from claude_i18n import positional_template
+
+messages_file, mode = sys.argv[2], sys.argv[3]
+args = sys.argv[4:]
+
+groups = [args]
+if mode == 'batch':
+    groups = []
+    while args:
+        count = int(args[0])
+        groups.append(args[1:count + 2])
+        args = args[count + 2:]
+
+try:
+    with open(messages_file, 'r', encoding='utf-8') as f:
+        messages = json.load(f)
+except (OSError, json.JSONDecodeError):
+    messages = {}
+
+for group in groups:
+    key, params = group[0], group[1:]
+    try:
+        # Navigate nested keys (e.g., 'common.success')
+        value = messages
+        for k in key.split('.'):
+            value = value[k]
+        
+        # Named placeholders take the next free index after numbered ones
+        value = positional_template(value)
+        for i, param in enumerate(params):
+            value = value.replace('{' + str(i) + '}', param)
+    except (KeyError, TypeError, AttributeError):
+        value = '[Missing i18n: ' + key + ']'
+    sys.stdout.write(value + '\0')
+" "$I18N_SCRIPT_DIR" "$@"
+}
+
+# Resolve a message into I18N_MESSAGE without a subshell
+# Usage: _i18n_message "section.key" [param1] [param2] ...
+_i18n_message() {
     local key="$1"
     shift
-    local locale=$(detect_locale)
+    
+    if [[ ! "$key" =~ ^[A-Za-z0-9_.]+$ ]]; then
+        I18N_MESSAGE="[Missing i18n: $key]"
+        return 1
+    fi
+    
+    _i18n_resolve_locale
+    local locale="$I18N_LOCALE"
+    
+    # Fast path: in-process lookup in the compiled catalog (no fork)
+    if _i18n_render "$locale" "$key" "$@"; then
+        return 0
+    fi
+    
+    # Slow path: parse messages.json with Python
     local messages_file=$(load_messages "$locale")
     
     if [[ ! -f "$messages_file" ]]; then
-        echo "[Missing i18n: $key]"
+        I18N_MESSAGE="[Missing i18n: $key]"
         return 1
     fi
     
-    # Use Python to extract JSON message
-    local message=$(python3 -c "
-import json
-import sys
+    IFS= read -r -d '' I18N_MESSAGE < <(_i18n_python_render "$messages_file" single "$key" "$@")
+    return 0
+}
 
-try:
-    with open('$messages_file', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Navigate nested keys (e.g., 'common.success')
-    keys = '$key'.split('.')
-    value = data
-    for k in keys:
-        value = value[k]
-    
-    # Replace placeholders with parameters
-    params = sys.argv[1:]
-    for i, param in enumerate(params):
-        placeholder = '{' + str(i) + '}'
-        value = value.replace(placeholder, param)
-        
-    # Replace named placeholders
-    named_placeholders = {
-        '{service}': '${2:-service}',
-        '{error}': '${3:-error}',
-        '{count}': '${4:-count}',
-        '{limit}': '${5:-limit}',
-        '{duration}': '${6:-duration}',
-        '{operation}': '${7:-operation}',
-        '{threshold}': '${8:-threshold}',
-        '{filename}': '${9:-filename}',
-        '{file}': '${10:-file}',
-        '{message}': '${11:-message}',
-        '{type}': '${12:-type}',
-        '{severity}': '${13:-severity}',
-        '{context}': '${14:-context}',
-        '{item}': '${15:-item}',
-        '{link}': '${16:-link}',
-        '{issue}': '${17:-issue}',
-        '{vars}': '${18:-vars}',
-        '{days}': '${19:-days}',
-        '{template}': '${20:-template}',
-        '{action}': '${21:-action}',
-        '{url}': '${22:-url}'
-    }
-    
-    print(value)
-except (KeyError, FileNotFoundError, json.JSONDecodeError):
-    print('[Missing i18n: $key]')
-" "$@")
-    
-    echo "$message"
+# Get localized message
+# Usage: get_message "section.key" [param1] [param2] ...
+# Parameters fill {0}, {1}... and named placeholders in order of appearance
+get_message() {
+    local status=0
+    _i18n_message "$@" || status=$?
+    printf '%s\n' "$I18N_MESSAGE"
+    return $status
+}
+
+# Resolve several messages in one call
+# Usage: get_messages [--array] count1 key1 [params...] [count2 key2 [params...]]...
+# Each group starts with its number of parameters, so any value (even "--")
+# can be passed as a parameter. Prints the rendered messages NUL-delimited,
+# in order. With --array, fills I18N_MESSAGES instead so callers avoid the
+# command substitution:
+#   get_messages --array 0 common.success 2 metrics.template.used "$t" "$a"
+# The compiled catalog renders everything in-process; otherwise a single
+# python3 call resolves the whole batch. Returns 1 if a key or a count is
+# invalid.
+get_messages() {
+    local to_array=false
+    if [[ "${1:-}" == "--array" ]]; then
+        to_array=true
+        shift
+    fi
+    
+    _i18n_resolve_locale
+    local locale="$I18N_LOCALE"
+    local status=0
+    local use_catalog=true
+    local count
+    local arg
+    local -a batch=()
+    I18N_MESSAGES=()
+    _i18n_load_catalog "$locale" || use_catalog=false
+    
+    while (( $# )); do
+        count="$1"
+        if [[ ! "$count" =~ ^[0-9]+$ ]] || (( $# < count + 2 )); then
+            echo "get_messages: expected a parameter count then a key, got '$count'" >&2
+            status=1
+            break
+        fi
+        shift
+        if [[ "$use_catalog" == "false" ]]; then
+            [[ "$1" =~ ^[A-Za-z0-9_.]+$ ]] || status=1
+            batch+=("$count" "${@:1:count + 1}")
+        elif [[ ! "$1" =~ ^[A-Za-z0-9_.]+$ ]]; then
+            I18N_MESSAGES+=("[Missing i18n: $1]")
+            status=1
+        else
+            _i18n_render "$locale" "${@:1:count + 1}"
+            I18N_MESSAGES+=("$I18N_MESSAGE")
+        fi
+        shift $((count + 1))
+    done
+    
+    if (( ${#batch[@]} )); then
+        local messages_file=$(load_messages "$locale")
+        while IFS= read -r -d '' arg; do
+            I18N_MESSAGES+=("$arg")
+        done < <(_i18n_python_render "$messages_file" batch "${batch[@]}")
+    fi
+    
+    if [[ "$to_array" == "false" ]] && (( ${#I18N_MESSAGES[@]} )); then
+        printf '%s\0' "${I18N_MESSAGES[@]}"
+    fi
+    return $status
 }
 
 # Localized echo with color support
@@ -123,11 +285,14 @@ localized_echo() {
     local level="${2:-info}"
     shift 2
     
-    local message=$(get_message "$key" "$@")
+    _i18n_message "$key" "$@"
+    local message="$I18N_MESSAGE"
     
-    # Load safe output if available
-    if [[ -f "$(dirname "${BASH_SOURCE[0]}")/safe-output.sh" ]]; then
-        source "$(dirname "${BASH_SOURCE[0]}")/safe-output.sh"
+    # Load safe output if available (once per process)
+    if ! declare -F safe_echo >/dev/null && [[ -f "$I18N_SCRIPT_DIR/safe-output.sh" ]]; then
+        source "$I18N_SCRIPT_DIR/safe-output.sh"
+    fi
+    if declare -F safe_echo >/dev/null; then
         safe_echo "$message" "$level"
     else
         case "$level" in
@@ -171,8 +336,14 @@ test_i18n() {
 }
 
 # Export functions for use in other scripts
+export -f _i18n_resolve_locale
 export -f detect_locale
+export -f _i18n_load_catalog
 export -f load_messages  
+export -f _i18n_render
+export -f _i18n_python_render
+export -f _i18n_message
 export -f get_message
+export -f get_messages
 export -f localized_echo
 export -f show_locale_info
\ No newline at end of file
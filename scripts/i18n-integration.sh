@@ -8,11 +8,56 @@ set -euo pipefail
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 source "$SCRIPT_DIR/detect-locale.sh"
 
+# Localized files index (see scripts/compile-i18n-catalog.py --files)
+I18N_FILE_INDEX_FILE="i18n/files.index.sh"
+
+# Load the files index once per process, rebuilding it when config.json or
+# a locale directory changed; returns 1 when the index is unavailable
+load_file_index() {
+    if [[ -n "${I18N_FILE_INDEX_LOADED:-}" ]]; then
+        return 0
+    fi
+    if (( BASH_VERSINFO[0] < 4 )) || [[ ! -d "i18n" ]]; then
+        return 1
+    fi
+    
+    local stale=false
+    local entry
+    if [[ ! -f "$I18N_FILE_INDEX_FILE" ]]; then
+        stale=true
+    else
+        for entry in i18n/config.json i18n/*/ i18n/*/*/; do
+            if [[ -e "$entry" && "$entry" -nt "$I18N_FILE_INDEX_FILE" ]]; then
+                stale=true
+                break
+            fi
+        done
+    fi
+    if [[ "$stale" == "true" ]]; then
+        python3 "$SCRIPT_DIR/compile-i18n-catalog.py" --i18n-dir i18n --files >/dev/null 2>&1 || return 1
+    fi
+    
+    source "$I18N_FILE_INDEX_FILE" || return 1
+    I18N_FILE_INDEX_LOADED=1
+}
+
 # Function to get localized file path
 get_localized_file() {
     local base_file="$1"
     local detected_locale
-    detected_locale=$(detect_locale)
+    resolve_locale
+    detected_locale="$CLAUDE_DETECTED_LOCALE"
+    
+    # Indexed lookup: localized version with en/fr fallbacks already resolved.
+    # The index only lists documents, so a miss (messages.json, files added
+    # since the index was built) falls through to the filesystem probes
+    if load_file_index; then
+        local indexed="${I18N_FILE_INDEX["$detected_locale:$base_file"]:-}"
+        if [[ -n "$indexed" ]]; then
+            echo "$indexed"
+            return 0
+        fi
+    fi
     
     # Try localized version first
     local localized_file="i18n/$detected_locale/$base_file"
@@ -127,10 +172,30 @@ list_localized_files() {
     echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
     
     local detected_locale
-    detected_locale=$(detect_locale)
+    resolve_locale
+    detected_locale="$CLAUDE_DETECTED_LOCALE"
     echo "📍 Detected locale: $detected_locale"
     echo ""
     
+    # Served from the files index when available
+    if load_file_index; then
+        local files_var="I18N_FILES_${detected_locale}[@]"
+        local locale
+        if [[ -n "${!files_var+set}" ]]; then
+            echo "📂 Files in your locale ($detected_locale):"
+            printf '%s\n' "${!files_var}"
+            echo ""
+        fi
+        
+        echo "📂 All available locales:"
+        for locale in "${I18N_FILE_LOCALES[@]}"; do
+            files_var="I18N_FILES_${locale}[@]"
+            local locale_files=("${!files_var}")
+            echo "  🌍 $locale (${#locale_files[@]} files)"
+        done
+        return 0
+    fi
+    
     # List files in detected locale
     if [[ -d "i18n/$detected_locale" ]]; then
         echo "📂 Files in your locale ($detected_locale):"
@@ -0,0 +1,124 @@
+#!/bin/bash
+# Thin metrics client: sends events to metrics-collector.py over its Unix
+# socket, or appends them to the daily segment (and counters) directly when
+# the collector is not running
+# Sourced by claude-metrics.sh; hooks can source it alone and call
+# send_metric without paying for the full script
+
+CLIENT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$CLIENT_DIR/append-record.sh"
+
+METRICS_DIR="${METRICS_DIR:-${CLAUDE_METRICS_DIR:-.claude/metrics}}"
+SEGMENTS_DIR="${SEGMENTS_DIR:-$METRICS_DIR/segments}"
+COUNTERS_DIR="${COUNTERS_DIR:-$METRICS_DIR/counters}"
+# Categorical metrics counted per (date, type, value) in $COUNTERS_DIR/<date>/<type>.<value>
+COUNTED_METRICS="${COUNTED_METRICS:- hallucination config_error }"
+
+# Unix socket connector: socat, or OpenBSD nc (-N closes after stdin EOF)
+_collector_connector() {
+    if [[ -z "${COLLECTOR_CONNECTOR+set}" ]]; then
+        COLLECTOR_CONNECTOR=""
+        if command -v socat >/dev/null 2>&1; then
+            COLLECTOR_CONNECTOR="socat"
+        elif command -v nc >/dev/null 2>&1 && nc -h 2>&1 | grep -q -- ' -N'; then
+            COLLECTOR_CONNECTOR="nc"
+        fi
+    fi
+}
+
+# Send one protocol line to the collector; fails when it is not reachable
+# or did not accept the line
+send_to_collector() {
+    local socket="${CLAUDE_METRICS_SOCKET:-$METRICS_DIR/collector.sock}"
+    local reply
+    
+    [[ -S "$socket" ]] || return 1
+    _collector_connector
+    case "$COLLECTOR_CONNECTOR" in
+        socat) reply=$(printf '%s\n' "$1" | socat -t 2 - "UNIX-CONNECT:$socket" 2>/dev/null) ;;
+        nc) reply=$(printf '%s\n' "$1" | nc -N -U "$socket" 2>/dev/null) ;;
+        *) return 1 ;;
+    esac
+    [[ "$reply" == "ok 1 0" ]]
+}
+
+# Log one event: TYPE VALUE [CONTEXT]
+send_metric() {
+    local metric_type="$1"
+    local value="$2"
+    local context="${3:-}"
+    local timestamp
+    
+    # date -Iseconds, without a fork on bash 4.2+: +0200 -> +02:00
+    if (( BASH_VERSINFO[0] > 4 || (BASH_VERSINFO[0] == 4 && BASH_VERSINFO[1] >= 2) )); then
+        printf -v timestamp '%(%Y-%m-%dT%H:%M:%S%z)T' -1
+    else
+        timestamp=$(date +%Y-%m-%dT%H:%M:%S%z)
+    fi
+    timestamp="${timestamp:0:22}:${timestamp:22}"
+    local line="$timestamp|$metric_type|$value|$context"
+    
+    send_to_collector "$line" && return 0
+    
+    mkdir -p "$SEGMENTS_DIR"
+    append_record "$SEGMENTS_DIR/${timestamp:0:10}.log" "$line"
+    if [[ "$COUNTED_METRICS" == *" $metric_type "* ]]; then
+        increment_counter "${timestamp:0:10}" "$metric_type" "$value"
+    fi
+}
+
+# Run a command under the lock of a counters day directory
+# flock(1) when available (shared with claude_metrics.py), mkdir otherwise
+with_counter_lock() {
+    local dir="$1"
+    shift
+    local status=0
+    
+    if command -v flock >/dev/null 2>&1; then
+        # Fixed descriptor on a brace group ({var}> needs bash 4.1): the
+        # command runs in this shell and the lock is released on exit
+        {
+            flock -x 9
+            "$@" || status=$?
+        } 9>"$dir/.lock" || return 1
+        return $status
+    fi
+    
+    local attempts=0
+    until mkdir "$dir/.lock.d" 2>/dev/null; do
+        attempts=$((attempts + 1))
+        if [ "$attempts" -ge 500 ]; then
+            declare -F debug_log >/dev/null && debug_log "Stale counter lock removed: $dir/.lock.d"
+            rmdir "$dir/.lock.d" 2>/dev/null || true
+        fi
+        sleep 0.01
+    done
+    "$@" || status=$?
+    rmdir "$dir/.lock.d" 2>/dev/null || true
+    return $status
+}
+
+# Read-increment-replace of one counter file (caller holds the lock)
+_increment_counter_file() {
+    local file="$1"
+    local count=0
+    
+    if [[ -f "$file" ]]; then
+        read -r count < "$file" || true
+        [[ "$count" =~ ^[0-9]+$ ]] || count=0
+    fi
+    COUNTER_VALUE=$((count + 1))
+    printf '%s\n' "$COUNTER_VALUE" > "$file.tmp.$$"
+    mv -f "$file.tmp.$$" "$file"
+}
+
+# Persisted daily counter of (type, value); sets COUNTER_VALUE
+increment_counter() {
+    local day="$1"
+    local metric_type="${2//[^A-Za-z0-9_-]/_}"
+    local value="${3//[^A-Za-z0-9_-]/_}"
+    local dir="$COUNTERS_DIR/$day"
+    
+    mkdir -p "$dir"
+    with_counter_lock "$dir" _increment_counter_file "$dir/$metric_type.${value:-none}"
+}
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Claude Metrics Collector
+Optional daemon that receives metrics events over a Unix socket and
+writes them in batches, so tracking an event no longer costs a bash
+process per call
+
+Protocol: one event per line, either
+  TYPE|VALUE|CONTEXT                 (timestamped on receipt)
+  TIMESTAMP|TYPE|VALUE|CONTEXT       (a claude-metrics.sh log line)
+  {"type": ..., "value": ..., "context": ..., "timestamp": ...}
+or STATS for the in-memory per-type aggregates (one JSON line). When the
+client closes its side, the collector replies "ok <accepted> <rejected>";
+batches holding counted metrics (hallucination, config_error) are flushed
+before the reply, so the daily counters are current for the client.
+
+Clients: CollectorClient / send_metric in claude_metrics.py and
+send_metric in metrics-client.sh fall back to direct appends when the
+collector is not running.
+
+Usage: python3 metrics-collector.py [--metrics-dir DIR] [--socket PATH]
+"""
+
+import os
+import re
+import sys
+import json
+import errno
+import signal
+import socket
+import argparse
+import selectors
+from typing import Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import claude_metrics
+from claude_metrics import (
+    COUNTED_METRICS, MetricsWriter, add_value, average, collector_socket_path, new_stats, parse_epoch,
+    percentiles,
+)
+
+# Event types are file names of the counters: same rule as the shell
+TYPE_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+MAX_LINE = 64 * 1024
+
+
+def parse_message(line: str) -> Optional[Tuple[str, str, str, Optional[str]]]:
+    """(type, value, context, timestamp or None) of a protocol line, None if invalid"""
+    line = line.strip("\r\n")
+    if line.startswith("{"):
+        try:
+            data = json.loads(line)
+            fields = (str(data["type"]), str(data.get("value", "")), str(data.get("context", "")),
+                      str(data["timestamp"]) if data.get("timestamp") else None)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+    else:
+        parts = line.split("|", 3)
+        if len(parts) == 4 and parse_epoch(parts[0]) is not None:
+            fields = (parts[1], parts[2], parts[3], parts[0])
+        elif len(parts) >= 2:
+            parts = line.split("|", 2)
+            fields = (parts[0], parts[1], parts[2] if len(parts) > 2 else "", None)
+        else:
+            return None
+    metric_type, value, context, when = fields
+    if not TYPE_PATTERN.match(metric_type) or "|" in value:
+        return None
+    if when is not None and parse_epoch(when) is None:
+        return None
+    return metric_type, value, context, when
+
+
+class Connection:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.buffer = b""
+        self.accepted = 0
+        self.rejected = 0
+        self.counted = False
+        self.replies = []
+
+
+class MetricsCollector:
+    """Unix socket server feeding a MetricsWriter
+
+    A single thread multiplexes every client with selectors; events are
+    buffered by the writer, which flushes on batch size and, while idle,
+    every flush_interval seconds.
+    """
+
+    def __init__(self, metrics_dir: Optional[str] = None, socket_path: Optional[str] = None,
+                 max_events: int = claude_metrics.MAX_BUFFERED_EVENTS,
+                 flush_interval: float = claude_metrics.FLUSH_INTERVAL):
+        self.metrics_dir = str(metrics_dir or claude_metrics.METRICS_DIR)
+        self.socket_path = socket_path or collector_socket_path(self.metrics_dir)
+        self.writer = MetricsWriter(self.metrics_dir, max_events, flush_interval)
+        self.totals: Dict[str, dict] = {}
+        self.selector = selectors.DefaultSelector()
+        self.server: Optional[socket.socket] = None
+        self.running = False
+        # stop() writes to this pair to wake the select loop up
+        self._wakeup, self._wakeup_writer = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self.selector.register(self._wakeup, selectors.EVENT_READ)
+
+    def bind(self) -> None:
+        """Listen on the socket, replacing a stale one; fails if a collector is running"""
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise OSError(errno.EADDRINUSE, f"Collector already running on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)  # owner-only socket
+        try:
+            self.server.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.server.listen(128)
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+
+    def handle_line(self, connection: Connection, line: str) -> None:
+        if line.strip() == "STATS":
+            connection.replies.append(json.dumps(self.stats(), separators=(",", ":")))
+            return
+        message = parse_message(line)
+        if message is None:
+            connection.rejected += 1
+            return
+        metric_type, value, context, when = message
+        try:
+            self.writer.log(metric_type, value, context, when)
+        except OSError as e:
+            self._write_failed(e)  # the event stays buffered
+        add_value(self.totals.setdefault(metric_type, new_stats()), value,
+                  metric_type in claude_metrics.SKETCHED_METRICS)
+        connection.accepted += 1
+        connection.counted = connection.counted or metric_type in COUNTED_METRICS
+
+    def flush(self, due_only: bool = False) -> None:
+        """Write the buffered batch; on failure it is kept for the next attempt"""
+        try:
+            if due_only:
+                self.writer.flush_if_due()
+            else:
+                self.writer.flush()
+        except OSError as e:
+            self._write_failed(e)
+
+    def _write_failed(self, error: OSError) -> None:
+        print(f"[ERROR] Writing metrics failed, {self.writer.pending()} events kept: {error}",
+              file=sys.stderr)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-type aggregates of the events received since startup"""
+        return {metric_type: {"count": stats["count"], "average": average(stats), "values": stats["values"],
+                              **(percentiles(stats) if "sketch" in stats else {})}
+                for metric_type, stats in sorted(self.totals.items())}
+
+    def _accept(self) -> None:
+        try:
+            sock, _ = self.server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        self.selector.register(sock, selectors.EVENT_READ, Connection(sock))
+
+    def _read(self, connection: Connection) -> None:
+        try:
+            data = connection.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if data:
+            connection.buffer += data
+            *lines, connection.buffer = connection.buffer.split(b"\n")
+            for line in lines:
+                self.handle_line(connection, line.decode("utf-8", "replace"))
+            if len(connection.buffer) > MAX_LINE:
+                connection.buffer = b""
+                connection.rejected += 1
+            return
+
+        # Client done: last unterminated line, flush counted metrics, reply
+        if connection.buffer.strip():
+            self.handle_line(connection, connection.buffer.decode("utf-8", "replace"))
+        if connection.counted:
+            self.flush()
+        self.selector.unregister(connection.sock)
+        reply = "".join(f"{line}\n" for line in connection.replies)
+        reply += f"ok {connection.accepted} {connection.rejected}\n"
+        try:
+            connection.sock.setblocking(True)
+            connection.sock.settimeout(1.0)
+            connection.sock.sendall(reply.encode("utf-8"))
+        except OSError:
+            pass  # fire-and-forget client already gone
+        connection.sock.close()
+
+    def serve_forever(self) -> None:
+        self.running = True
+        try:
+            while self.running:
+                for key, _ in self.selector.select(timeout=self.writer.flush_interval or None):
+                    if key.fileobj is self.server:
+                        self._accept()
+                    elif key.fileobj is self._wakeup:
+                        continue
+                    else:
+                        self._read(key.data)
+                self.flush(due_only=True)
+        finally:
+            self.close()
+
+    def stop(self, *_args) -> None:
+        self.running = False
+        try:
+            self._wakeup_writer.send(b"\0")
+        except OSError:
+            pass  # already closed
+
+    def close(self) -> None:
+        """Flush pending events and remove the socket"""
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+        self._wakeup_writer.close()
+        try:
+            self.writer.close()
+        except OSError as e:
+            print(f"[ERROR] Writing metrics failed, {self.writer.pending()} events lost: {e}", file=sys.stderr)
+        if self.server is not None:
+            self.server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect Claude metrics events over a Unix socket")
+    parser.add_argument("--metrics-dir", default=None, help="Metrics directory (default: CLAUDE_METRICS_DIR)")
+    parser.add_argument("--socket", help="Socket path (default: CLAUDE_METRICS_SOCKET or <metrics-dir>/collector.sock)")
+    parser.add_argument("--max-events", type=int, default=claude_metrics.MAX_BUFFERED_EVENTS,
+                        help="Events per batch")
+    parser.add_argument("--flush-interval", type=float, default=claude_metrics.FLUSH_INTERVAL,
+                        help="Seconds before a partial batch is written")
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("[ERROR] Unix sockets are not available on this platform", file=sys.stderr)
+        sys.exit(1)
+
+    collector = MetricsCollector(args.metrics_dir, args.socket, args.max_events, args.flush_interval)
+    try:
+        collector.bind()
+    except OSError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    signal.signal(signal.SIGTERM, collector.stop)
+    signal.signal(signal.SIGINT, collector.stop)
+    print(f"Collecting on {collector.socket_path}")
+    collector.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
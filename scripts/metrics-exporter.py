@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Claude Metrics Exporter
+Serves the metrics of claude-metrics.sh and the security events of
+security-monitor.sh in Prometheus / OpenMetrics text format
+
+The daily segments and logs/security-events.log are tailed: each scrape
+ingests only the bytes appended since the previous one into in-memory
+counters and histograms, then renders them, so a scrape costs the number
+of series plus the new events, never the size of the logs.
+
+Usage: python3 metrics-exporter.py [--port 9464] [--metrics-dir DIR]
+                                   [--security-log FILE]
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import claude_metrics
+from claude_metrics import parse_event, segment_days, segment_path
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECURITY_LOG = os.path.join(PROJECT_ROOT, "logs", "security-events.log")
+
+# Local only: the metrics contain operation names and file paths
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+
+# Response time histogram buckets, in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Label of a metric value per counted type
+VALUE_LABELS = {"hallucination": "severity", "config_error": "error_type", "template_usage": "success"}
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels) + "}"
+
+
+def format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of one label set"""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for position, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.buckets[position] += 1
+
+
+class LogTail:
+    """Byte offset of a tailed file; yields only complete new lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+
+    def read_lines(self) -> List[str]:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:  # truncated or replaced: start over
+            self.offset = 0
+        if size == self.offset:
+            return []
+        lines = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partial line still being written
+                self.offset += len(raw)
+                lines.append(raw.decode("utf-8", "replace"))
+        return lines
+
+
+class MetricsExporter:
+    """In-memory aggregates of the tailed logs and their text rendering"""
+
+    def __init__(self, metrics_dir: Optional[str] = None, security_log: str = SECURITY_LOG):
+        self.metrics_dir = str(metrics_dir or claude_metrics.METRICS_DIR)
+        self.security = LogTail(security_log)
+        self.segments: Dict[str, LogTail] = {}
+        self.lock = threading.Lock()
+
+        self.events: Dict[Labels, int] = {}
+        self.values: Dict[Labels, int] = {}
+        self.security_events: Dict[Labels, int] = {}
+        self.latency: Dict[Labels, Histogram] = {}
+        self.last_response_time: Dict[Labels, float] = {}
+        self.last_event = {"metrics": 0.0, "security": 0.0}
+        self.ingested_lines = 0
+
+    def refresh(self) -> int:
+        """Ingest what was appended since the last refresh; returns the new lines"""
+        with self.lock:
+            days = segment_days(self.metrics_dir)
+            for day in days:
+                if day not in self.segments:
+                    self.segments[day] = LogTail(segment_path(self.metrics_dir, day))
+            for day in list(self.segments):
+                if day not in days:  # archived: its events stay counted
+                    del self.segments[day]
+
+            count = 0
+            for tail in self.segments.values():
+                for line in tail.read_lines():
+                    count += self._add_event(line)
+            for line in self.security.read_lines():
+                count += self._add_security_event(line)
+            self.ingested_lines += count
+            return count
+
+    def _add_event(self, line: str) -> int:
+        event = parse_event(line)
+        if event is None:
+            return 0
+        key = (("type", event.type),)
+        self.events[key] = self.events.get(key, 0) + 1
+        if event.type in VALUE_LABELS:
+            key = (("type", event.type), (VALUE_LABELS[event.type], event.value))
+            self.values[key] = self.values.get(key, 0) + 1
+        elif event.type == "response_time" and claude_metrics.NUMBER_PATTERN.match(event.value):
+            key = (("operation", event.context),)
+            self.latency.setdefault(key, Histogram()).observe(float(event.value))
+            self.last_response_time[key] = float(event.value)
+        self.last_event["metrics"] = max(self.last_event["metrics"], event.epoch)
+        return 1
+
+    def _add_security_event(self, line: str) -> int:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return 0  # plain-text header lines
+        if not isinstance(event, dict):
+            return 0
+        key = (("severity", str(event.get("severity", ""))), ("category", str(event.get("category", ""))))
+        self.security_events[key] = self.security_events.get(key, 0) + 1
+        when = claude_metrics.parse_epoch(str(event.get("timestamp", "")).replace(" UTC", "+00:00"))
+        if when is not None:
+            self.last_event["security"] = max(self.last_event["security"], when)
+        return 1
+
+    def render(self, openmetrics: bool = True) -> str:
+        """Exposition text of every series"""
+        lines: List[str] = []
+
+        def family(name: str, metric_type: str, help_text: str):
+            # OpenMetrics names the counter family without its _total suffix
+            declared = name[:-len("_total")] if openmetrics and metric_type == "counter" else name
+            lines.append(f"# HELP {declared} {help_text}")
+            lines.append(f"# TYPE {declared} {metric_type}")
+
+        def samples(name: str, series: Dict[Labels, float]):
+            for labels in sorted(series):
+                lines.append(f"{name}{format_labels(labels)} {format_number(series[labels])}")
+
+        with self.lock:
+            family("claude_events_total", "counter", "Metric events logged, by type")
+            samples("claude_events_total", self.events)
+            family("claude_event_values_total", "counter",
+                   "Events of categorical metrics, by type and value")
+            samples("claude_event_values_total", self.values)
+            family("claude_security_events_total", "counter", "Security events, by severity and category")
+            samples("claude_security_events_total", self.security_events)
+
+            family("claude_response_time_seconds", "histogram", "Operation response times")
+            for labels in sorted(self.latency):
+                histogram = self.latency[labels]
+                for bound, count in zip(LATENCY_BUCKETS + (float("inf"),),
+                                        histogram.buckets + [histogram.count]):
+                    bucket = format_labels(labels + (("le", format_number(bound)),))
+                    lines.append(f"claude_response_time_seconds_bucket{bucket} {count}")
+                lines.append(f"claude_response_time_seconds_count{format_labels(labels)} {histogram.count}")
+                lines.append(f"claude_response_time_seconds_sum{format_labels(labels)} {format_number(histogram.sum)}")
+
+            family("claude_response_time_last_seconds", "gauge", "Latest response time, by operation")
+            samples("claude_response_time_last_seconds", self.last_response_time)
+            family("claude_last_event_timestamp_seconds", "gauge", "Time of the latest event, by log")
+            samples("claude_last_event_timestamp_seconds",
+                    {(("log", log),): when for log, when in self.last_event.items()})
+            family("claude_exporter_tailed_segments", "gauge", "Daily segments currently tailed")
+            samples("claude_exporter_tailed_segments", {(): len(self.segments)})
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def make_handler(exporter: MetricsExporter):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            exporter.refresh()
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            body = exporter.render(openmetrics).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # scrapes every 15 s: keep stderr quiet
+
+    return MetricsHandler
+
+
+def serve(exporter: MetricsExporter, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """HTTP server of /metrics (not started)"""
+    return ThreadingHTTPServer((host, port), make_handler(exporter))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Claude metrics in OpenMetrics format")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Listen address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--metrics-dir", default=None, help="Metrics directory (default: CLAUDE_METRICS_DIR)")
+    parser.add_argument("--security-log", default=SECURITY_LOG, help="security-monitor.sh event log")
+    args = parser.parse_args()
+
+    metrics_dir = args.metrics_dir or claude_metrics.METRICS_DIR
+    claude_metrics.import_legacy_log(metrics_dir)
+    exporter = MetricsExporter(metrics_dir, args.security_log)
+    print(f"Ingested {exporter.refresh()} events")
+
+    server = serve(exporter, args.host, args.port)
+    print(f"Serving http://{args.host}:{server.server_address[1]}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@ METRICS_DIR="${PROJECT_ROOT}/metrics"
 SECURITY_LOG="${LOG_DIR}/security-events.log"
 ALERT_THRESHOLD_FILE="${PROJECT_ROOT}/.security-thresholds"
 
+# Concurrent-safe appends to the shared logs
+source "$SCRIPT_DIR/append-record.sh"
+
 # Security thresholds (can be overridden by .security-thresholds file)
 MAX_FAILED_OPERATIONS=${MAX_FAILED_OPERATIONS:-5}
 MAX_DEBUG_ACTIVATIONS=${MAX_DEBUG_ACTIVATIONS:-3}
@@ -69,10 +72,10 @@ log_security_event() {
     log_entry+="}"
     
     # Write to security log
-    echo "$log_entry" >> "$SECURITY_LOG"
+    append_record "$SECURITY_LOG" "$log_entry"
     
     # Also write human-readable format
-    echo "[$timestamp] [$severity] [$category] $message" >> "${LOG_DIR}/security-readable.log"
+    append_record "${LOG_DIR}/security-readable.log" "[$timestamp] [$severity] [$category] $message"
     
     # Color-coded console output
     case "$severity" in
@@ -8,12 +8,17 @@ const fs = require('fs');
 const path = require('path');
 const readline = require('readline');
 const https = require('https');
+const { BinaryCatalog, positionalTemplate } = require('./i18n-catalog');
+
+// i18n root, overridable like in i18n-helper.sh
+const I18N_DIR = process.env.I18N_DIR || path.join(__dirname, '..', 'i18n');
 
 // i18n support
 class I18n {
     constructor() {
         this.locale = this.detectLocale();
-        this.messages = this.loadMessages();
+        this.catalog = this.loadCatalog();
+        this.messages = this.catalog ? {} : this.loadMessages();
     }
 
     detectLocale() {
@@ -33,44 +38,77 @@ class I18n {
 
     loadMessages() {
         try {
-            const messagesPath = path.join(__dirname, '..', 'i18n', this.locale, 'messages.json');
-            return JSON.parse(fs.readFileSync(messagesPath, 'utf8'));
+            const messagesPath = path.join(I18N_DIR, this.locale, 'messages.json');
+            return this.toPositional(JSON.parse(fs.readFileSync(messagesPath, 'utf8')));
         } catch (error) {
             // Fallback to English
             try {
-                const fallbackPath = path.join(__dirname, '..', 'i18n', 'en', 'messages.json');
-                return JSON.parse(fs.readFileSync(fallbackPath, 'utf8'));
+                const fallbackPath = path.join(I18N_DIR, 'en', 'messages.json');
+                return this.toPositional(JSON.parse(fs.readFileSync(fallbackPath, 'utf8')));
             } catch (fallbackError) {
                 return {}; // Empty messages if both fail
             }
         }
     }
 
+    // Same positional templates as the binary catalog, whichever is loaded
+    toPositional(messages) {
+        const converted = {};
+        for (const [key, value] of Object.entries(messages)) {
+            if (typeof value === 'string') {
+                converted[key] = positionalTemplate(value);
+            } else if (value && typeof value === 'object') {
+                converted[key] = this.toPositional(value);
+            } else {
+                converted[key] = value;
+            }
+        }
+        return converted;
+    }
+
+    // Prefer the compiled binary catalog (compile-i18n-catalog.py --binary) when up to date
+    loadCatalog() {
+        const localeDir = path.join(I18N_DIR, this.locale);
+        try {
+            const catalogPath = path.join(localeDir, 'messages.cat');
+            const messagesPath = path.join(localeDir, 'messages.json');
+            if (fs.statSync(catalogPath).mtimeMs >= fs.statSync(messagesPath).mtimeMs) {
+                return new BinaryCatalog(catalogPath);
+            }
+        } catch (error) {
+            // No usable catalog: messages.json is loaded instead
+        }
+        return null;
+    }
+
     get(key, ...params) {
-        const keys = key.split('.');
-        let value = this.messages;
+        let value;
         
-        for (const k of keys) {
-            if (value && typeof value === 'object') {
-                value = value[k];
-            } else {
+        if (this.catalog) {
+            value = this.catalog.get(key);
+            if (value === undefined) {
                 return `[Missing: ${key}]`;
             }
+        } else {
+            const keys = key.split('.');
+            value = this.messages;
+            
+            for (const k of keys) {
+                if (value && typeof value === 'object') {
+                    value = value[k];
+                } else {
+                    return `[Missing: ${key}]`;
+                }
+            }
         }
         
         if (typeof value !== 'string') {
             return `[Invalid: ${key}]`;
         }
         
-        // Replace placeholders
-        params.forEach((param, index) => {
-            value = value.replace(`{${index}}`, param);
-            value = value.replace(new RegExp(`\{${Object.keys({
-                service: 0, error: 1, url: 2
-            })[index] || index}\}`, 'g'), param);
-        });
-        
-        return value;
+        // Fill positional placeholders in a single pass
+        return value.replace(/\{([0-9]+)\}/g, (match, index) =>
+            index < params.length ? String(params[index]) : match);
     }
 }
 
@@ -370,4 +408,5 @@ if (require.main === module) {
     });
 }
 
-module.exports = SetupWizard;
\ No newline at end of file
+module.exports = SetupWizard;
+module.exports.I18n = I18n;
\ No newline at end of file
@@ -0,0 +1,940 @@
+#!/usr/bin/env python3
+"""
+Tests for the Python metrics library (scripts/claude_metrics.py)
+"""
+import unittest
+import sys
+import io
+import os
+import re
+import json
+import math
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import importlib.util
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+# Add scripts directory to Python path
+scripts_dir = Path(__file__).parent.parent.parent / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+import claude_metrics
+
+def load_script(script_name):
+    """Load a hyphenated script as a module"""
+    spec = importlib.util.spec_from_file_location(
+        script_name.replace('-', '_').replace('.py', ''), scripts_dir / script_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _increment_counters(metrics_dir, times):
+    store = claude_metrics.CounterStore(metrics_dir)
+    for _ in range(times):
+        store.increment("hallucination", "high", day="2025-01-15")
+
+class TestMetricsWriter(unittest.TestCase):
+    """Test buffered metrics writes"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = Path(self.temp_dir) / "metrics"
+        self.log_file = Path(claude_metrics.segment_path(str(self.metrics_dir),
+                                                          claude_metrics.timestamp()[:10]))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def read_lines(self):
+        if not self.log_file.exists():
+            return []
+        return self.log_file.read_text(encoding="utf-8").splitlines()
+    
+    def test_line_format_matches_shell(self):
+        """Test events use the timestamp|type|value|context format"""
+        line = claude_metrics.format_event("response_time", 1.5, "file_search")
+        self.assertRegex(line, r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2}\|response_time\|1\.5\|file_search\n$")
+        self.assertEqual(claude_metrics.format_event("a", "b", "multi\nline", when="T"), "T|a|b|multi line\n")
+    
+    def test_flush_on_size_with_one_write(self):
+        """Test a full batch is appended with a single write"""
+        writer = claude_metrics.MetricsWriter(self.metrics_dir, max_events=3, flush_interval=3600)
+        writer.log("template_usage", "true", "CLAUDE.md:read")
+        writer.log("template_usage", "true", "CLAUDE.md:read")
+        self.assertEqual(self.read_lines(), [])
+        self.assertEqual(writer.pending(), 2)
+        
+        with mock.patch("claude_metrics.os.write", wraps=os.write) as write:
+            writer.log("config_error", "syntax", ".env:missing key")
+        self.assertEqual(write.call_count, 1)
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[2].endswith("|config_error|syntax|.env:missing key"))
+        writer.close()
+    
+    def test_flush_on_interval_and_close(self):
+        """Test the interval policy and the final flush"""
+        writer = claude_metrics.MetricsWriter(self.metrics_dir, max_events=100, flush_interval=0)
+        writer.log("hallucination", "high", "api:test")
+        self.assertEqual(len(self.read_lines()), 1)
+        
+        writer.flush_interval = 3600
+        writer.log("hallucination", "low", "api:test")
+        self.assertEqual(len(self.read_lines()), 1)
+        writer.close()
+        self.assertEqual(len(self.read_lines()), 2)
+        with self.assertRaises(ValueError):
+            writer.log("hallucination", "low", "api:test")
+    
+    def test_idle_writer_flushes_on_timer(self):
+        """Test buffered events reach the segment without another log call"""
+        writer = claude_metrics.MetricsWriter(self.metrics_dir, max_events=100, flush_interval=0.05)
+        self.addCleanup(writer.close)
+        writer.log("hallucination", "high", "api:test")
+        self.assertEqual(writer.pending(), 1)
+        for _ in range(100):
+            if self.read_lines():
+                break
+            threading.Event().wait(0.02)
+        self.assertEqual(len(self.read_lines()), 1)
+        self.assertEqual(writer.pending(), 0)
+    
+    def test_failed_flush_keeps_the_batch(self):
+        """Test a batch whose write failed is retried by the next flush"""
+        writer = claude_metrics.MetricsWriter(self.metrics_dir, max_events=100, flush_interval=3600)
+        self.addCleanup(writer.close)
+        writer.log("hallucination", "high", "api:first")
+        with mock.patch("claude_metrics.append_events", side_effect=OSError(28, "No space left on device")):
+            with self.assertRaises(OSError):
+                writer.flush()
+        self.assertEqual(writer.pending(), 1)
+        writer.log("hallucination", "low", "api:second")
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual([line.rsplit("|", 1)[1] for line in self.read_lines()], ["api:first", "api:second"])
+    
+    def test_partial_flush_failure_keeps_only_unwritten_events(self):
+        """Test events already in their segment are not written twice"""
+        writer = claude_metrics.MetricsWriter(self.metrics_dir, max_events=100, flush_interval=3600)
+        self.addCleanup(writer.close)
+        writer.log("hallucination", "high", "api:first")
+        # The segment append succeeds, the counter update fails
+        with mock.patch.object(claude_metrics.CounterStore, "increment_many",
+                               side_effect=OSError(28, "No space left on device")):
+            with self.assertRaises(claude_metrics.AppendError) as raised:
+                writer.flush()
+        self.assertEqual(raised.exception.errno, 28)
+        self.assertEqual(writer.pending(), 0)
+        writer.log("hallucination", "low", "api:second")
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual([line.rsplit("|", 1)[1] for line in self.read_lines()], ["api:first", "api:second"])
+
+        # Only the days whose segment append failed go back to the buffer
+        writer.log("response_time", "1", "old", when="2020-01-01T00:00:00+00:00")
+        writer.log("response_time", "2", "older", when="2019-12-31T00:00:00+00:00")
+        append_lines = claude_metrics.append_lines
+
+        def full_after_first_day(path, data):
+            if path.endswith("2019-12-31.log"):
+                raise OSError(28, "No space left on device")
+            append_lines(path, data)
+
+        with mock.patch("claude_metrics.append_lines", side_effect=full_after_first_day):
+            with self.assertRaises(OSError):
+                writer.flush()
+        self.assertEqual(writer.pending(), 1)
+        self.assertEqual(writer.flush(), 1)
+        for day, context in (("2020-01-01", "old"), ("2019-12-31", "older")):
+            segment = Path(claude_metrics.segment_path(str(self.metrics_dir), day))
+            self.assertEqual([line.rsplit("|", 1)[1] for line in segment.read_text(encoding="utf-8").splitlines()],
+                             [context])
+
+    def test_default_writer_uses_metrics_dir(self):
+        """Test the module-level log_metric helper"""
+        with mock.patch.object(claude_metrics, "METRICS_DIR", str(self.metrics_dir)), \
+             mock.patch.object(claude_metrics, "_default_writer", None):
+            claude_metrics.log_metric("response_time", "0.25", "op")
+            claude_metrics.get_writer().close()
+        self.assertTrue(re.search(r"\|response_time\|0\.25\|op$", self.read_lines()[0]))
+
+class TestTimed(unittest.TestCase):
+    """Test the in-process timing API"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.writer = claude_metrics.MetricsWriter(Path(self.temp_dir) / "metrics", flush_interval=3600)
+    
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def events(self):
+        return [claude_metrics.parse_event(line) for line in self.writer._buffer]
+    
+    def test_context_manager(self):
+        """Test a block is logged as a response_time in seconds, even when it raises"""
+        with mock.patch.dict(os.environ, {"DEBUG_MODE": "false"}):
+            with claude_metrics.timed("file search/../x", writer=self.writer) as timer:
+                pass
+            with self.assertRaises(KeyError):
+                with claude_metrics.timed("lookup", writer=self.writer):
+                    raise KeyError("missing")
+        events = self.events()
+        self.assertEqual([(event.type, event.context) for event in events],
+                         [("response_time", "filesearchx"), ("response_time", "lookup")])
+        self.assertRegex(events[0].value, r"^\d+\.\d{6}$")
+        self.assertGreaterEqual(timer.elapsed, 0)
+        with self.assertRaises(ValueError):
+            with claude_metrics.timed(None, writer=self.writer):
+                pass
+    
+    def test_decorator_and_sanitization(self):
+        """Test decorator forms and the shell sanitization rules"""
+        @claude_metrics.timed(writer=self.writer)
+        def score_pattern(value):
+            return value * 2
+        
+        @claude_metrics.timed("x" * 80, writer=self.writer)
+        def long_name():
+            return "ok"
+        
+        with mock.patch.dict(os.environ, {"DEBUG_MODE": "false"}):
+            self.assertEqual(score_pattern(21), 42)
+            self.assertEqual(long_name(), "ok")
+            self.assertEqual(claude_metrics.sanitize_operation("a b:c"), "abc")
+        self.assertEqual(score_pattern.__name__, "score_pattern")
+        self.assertEqual([event.context for event in self.events()], ["score_pattern", "x" * 50])
+        with mock.patch.dict(os.environ, {"DEBUG_MODE": "true"}):
+            self.assertEqual(claude_metrics.sanitize_operation("a b:c"), "a b:c")
+        
+        with mock.patch.object(claude_metrics, "_default_writer", self.writer):
+            @claude_metrics.timed
+            def bare():
+                pass
+            bare()
+        self.assertEqual(self.events()[-1].context, "bare")
+
+class TestSegments(unittest.TestCase):
+    """Test daily segments and their sparse index"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = str(Path(self.temp_dir) / "metrics")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def write_day(self, day, count, metric_type="response_time"):
+        """count events spread over one UTC day, one per 10 seconds from midnight"""
+        lines = []
+        for i in range(count):
+            hours, rest = divmod(i * 10, 3600)
+            when = f"{day}T{hours:02d}:{rest // 60:02d}:{rest % 60:02d}+00:00"
+            lines.append(claude_metrics.format_event(metric_type, i, f"op{i}", when=when))
+        claude_metrics.append_events(self.metrics_dir, lines)
+    
+    def epoch(self, when):
+        return claude_metrics.parse_epoch(when)
+    
+    def test_events_are_partitioned_by_day(self):
+        """Test writes land in the segment of their date"""
+        self.write_day("2025-01-14", 3)
+        self.write_day("2025-01-15", 2, "hallucination")
+        self.assertEqual(claude_metrics.segment_days(self.metrics_dir), ["2025-01-14", "2025-01-15"])
+        events = list(claude_metrics.read_events(self.metrics_dir))
+        self.assertEqual([event.type for event in events], ["response_time"] * 3 + ["hallucination"] * 2)
+        self.assertEqual(events[0].context, "op0")
+        self.assertEqual(claude_metrics.CounterStore(self.metrics_dir).get(
+            "hallucination", "1", day="2025-01-15"), 1)
+    
+    def test_range_query_seeks_with_sparse_index(self):
+        """Test a range read starts near the requested time, not at offset 0"""
+        self.write_day("2025-01-15", 5000)
+        path = claude_metrics.segment_path(self.metrics_dir, "2025-01-15")
+        since = self.epoch("2025-01-15T12:00:00+00:00")
+        until = self.epoch("2025-01-15T12:59:59+00:00")
+        
+        events = list(claude_metrics.read_events(self.metrics_dir, since, until))
+        self.assertEqual(len(events), 360)
+        self.assertEqual(events[0].timestamp, "2025-01-15T12:00:00+00:00")
+        
+        index = claude_metrics.SegmentIndex(path)
+        self.assertEqual(index.size, os.path.getsize(path))
+        self.assertGreater(len(index.offsets), 10)
+        self.assertGreater(index.offset_for(since), os.path.getsize(path) // 3)
+        
+        # Appends are indexed incrementally
+        claude_metrics.append_events(self.metrics_dir, [
+            claude_metrics.format_event("response_time", 1, "late", when="2025-01-15T23:59:59+00:00")])
+        events = list(claude_metrics.read_events(self.metrics_dir, self.epoch("2025-01-15T23:59:00+00:00")))
+        self.assertEqual(events[-1].context, "late")
+        self.assertEqual(claude_metrics.SegmentIndex(path).size, os.path.getsize(path))
+    
+    def test_late_appends_are_found(self):
+        """Test events flushed long after later ones are still in range reads"""
+        self.write_day("2025-01-15", 5000)
+        path = claude_metrics.segment_path(self.metrics_dir, "2025-01-15")
+        claude_metrics.SegmentIndex(path).update()
+        claude_metrics.append_events(self.metrics_dir, [
+            claude_metrics.format_event("response_time", 1, "early", when="2025-01-15T00:00:05+00:00")]
+            + [claude_metrics.format_event("response_time", 1, "filler", when="2025-01-15T23:59:59+00:00")] * 200)
+        
+        events = list(claude_metrics.read_events(self.metrics_dir, self.epoch("2025-01-15T00:00:04+00:00"),
+                                                 self.epoch("2025-01-15T00:00:05+00:00")))
+        self.assertEqual([event.context for event in events], ["early"])
+        index = claude_metrics.SegmentIndex(path)
+        self.assertIn(self.epoch("2025-01-15T00:00:05+00:00"), [earliest for earliest, _ in index.bounds[1:]])
+        # Only the blocks whose time bounds overlap the range are read
+        ranges = index.ranges(self.epoch("2025-01-15T12:00:00+00:00"), self.epoch("2025-01-15T12:00:10+00:00"))
+        self.assertLess(sum((end or index.size) - start for start, end in ranges), index.size // 4)
+    
+    def test_legacy_log_import(self):
+        """Test the single-file log is moved into segments once"""
+        os.makedirs(self.metrics_dir)
+        legacy = Path(self.metrics_dir) / claude_metrics.METRICS_FILENAME
+        legacy.write_text("2025-01-14T10:00:00+00:00|hallucination|high|api:x\n"
+                          "garbage\n"
+                          "2025-01-15T10:00:00+00:00|template_usage|true|CLAUDE.md:read", encoding="utf-8")
+        self.assertEqual(claude_metrics.import_legacy_log(self.metrics_dir), 2)
+        self.assertFalse(legacy.exists())
+        self.assertEqual(claude_metrics.import_legacy_log(self.metrics_dir), 0)
+        self.assertEqual(claude_metrics.segment_days(self.metrics_dir), ["2025-01-14", "2025-01-15"])
+        self.assertEqual(claude_metrics.CounterStore(self.metrics_dir).total("hallucination", day="2025-01-14"), 1)
+    
+    def test_retention_archives_whole_segments(self):
+        """Test expired segments are gzipped into the archive and listed in the manifest"""
+        import gzip
+        self.write_day("2020-01-01", 3)
+        self.write_day("2020-01-02", 2)
+        claude_metrics.load_rollup(self.metrics_dir, "2020-01-01")
+        claude_metrics.append_events(self.metrics_dir, [claude_metrics.format_event("response_time", 1, "now")])
+        today = claude_metrics.timestamp()[:10]
+
+        entries = claude_metrics.apply_retention(self.metrics_dir, keep_days=30)
+        self.assertEqual([entry["day"] for entry in entries], ["2020-01-01", "2020-01-02"])
+        self.assertEqual(claude_metrics.segment_days(self.metrics_dir), [today])
+
+        archive = Path(self.metrics_dir) / "archive"
+        with gzip.open(archive / "segments" / "2020-01-01.log.gz", "rt", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 3)
+        manifest = claude_metrics.load_manifest(self.metrics_dir)
+        self.assertEqual(manifest["segments"]["2020-01-01"]["events"], 3)
+        self.assertEqual(manifest["segments"]["2020-01-01"]["file"], "segments/2020-01-01.log.gz")
+        self.assertFalse((Path(self.metrics_dir) / "segments" / "2020-01-01.idx").exists())
+        # Archived days keep their rollup
+        self.assertEqual(claude_metrics.daily_report(self.metrics_dir, "2020-01-01")
+                         ["metrics"]["response_time"]["samples"], 3)
+
+        # A late segment for an archived day becomes a new gzip member
+        self.write_day("2020-01-01", 1, "hallucination")
+        claude_metrics.apply_retention(self.metrics_dir, keep_days=30)
+        with gzip.open(archive / "segments" / "2020-01-01.log.gz", "rt", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 4)
+        self.assertEqual(claude_metrics.load_manifest(self.metrics_dir)["segments"]["2020-01-01"]["events"], 4)
+        self.assertEqual(claude_metrics.apply_retention(self.metrics_dir, keep_days=30), [])
+
+    def test_retention_rolls_up_before_archiving(self):
+        """Test the daily report of an archived day that was never rolled up"""
+        self.write_day("2020-01-01", 1, "hallucination")
+        self.write_day("2020-01-01", 1)
+        self.assertFalse((Path(self.metrics_dir) / "rollups" / "2020-01-01.json").exists())
+        claude_metrics.apply_retention(self.metrics_dir, keep_days=30)
+        self.assertEqual(claude_metrics.segment_days(self.metrics_dir), [])
+
+        metrics = claude_metrics.daily_report(self.metrics_dir, "2020-01-01")["metrics"]
+        self.assertEqual(metrics["hallucinations"]["count"], 1)
+        self.assertEqual(metrics["response_time"]["samples"], 1)
+
+        # Late events add to the archived totals
+        self.write_day("2020-01-01", 2, "hallucination")
+        claude_metrics.apply_retention(self.metrics_dir, keep_days=30)
+        metrics = claude_metrics.daily_report(self.metrics_dir, "2020-01-01")["metrics"]
+        self.assertEqual(metrics["hallucinations"]["count"], 3)
+        self.assertEqual(metrics["response_time"]["samples"], 1)
+
+    def test_retention_drop(self):
+        """Test dropped segments lose their index and rollup"""
+        self.write_day("2020-01-01", 3)
+        claude_metrics.load_rollup(self.metrics_dir, "2020-01-01")
+        entries = claude_metrics.apply_retention(self.metrics_dir, keep_days=1, archive=False)
+        self.assertEqual([(entry["day"], entry["action"]) for entry in entries], [("2020-01-01", "dropped")])
+        self.assertEqual(claude_metrics.segment_days(self.metrics_dir), [])
+        self.assertFalse((Path(self.metrics_dir) / "rollups" / "2020-01-01.json").exists())
+        self.assertFalse((Path(self.metrics_dir) / "archive" / "segments" / "2020-01-01.log.gz").exists())
+        with self.assertRaises(ValueError):
+            claude_metrics.apply_retention(self.metrics_dir, keep_days=0)
+
+    def test_dashboard_summary(self):
+        """Test the dashboard reads only the recent events"""
+        writer = claude_metrics.MetricsWriter(self.metrics_dir)
+        writer.log("hallucination", "high", "x")
+        writer.log("response_time", "1.5", "op")
+        writer.log("response_time", "0.5", "op")
+        writer.close()
+        self.write_day("2020-01-01", 10, "config_error")
+        summary = claude_metrics.dashboard_summary(self.metrics_dir, hours=1)
+        self.assertEqual({key: summary[key] for key in ("hallucinations", "config_errors",
+                                                        "template_uses", "avg_response_time")},
+                         {"hallucinations": 1, "config_errors": 0,
+                          "template_uses": 0, "avg_response_time": 1.0})
+        self.assertAlmostEqual(summary["p99_response_time"], 1.5, delta=1.5 * 0.01)
+
+def _append_records(path, writer, count):
+    for i in range(count):
+        payload = "x" * (9000 if i % 2 else 100)
+        claude_metrics.append_lines(path, f"py{writer}-{i}|{payload}|end\n".encode())
+
+class TestConcurrentAppends(unittest.TestCase):
+    """Stress test of concurrent appends, short (lock-free) and long (locked)"""
+    
+    RECORD_PATTERN = re.compile(r"^(py|sh)\d+-\d+\|x+\|end$")
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = str(Path(self.temp_dir) / "segment.log")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_hundreds_of_writers(self):
+        """Test no record is lost or interleaved with 200 shell and 16 Python writers"""
+        if not shutil.which("bash"):
+            self.skipTest("bash not available")
+        script = (f'source "{scripts_dir / "append-record.sh"}"; '
+                  'long=$(printf "%9000s" "" | tr " " x); '
+                  'for i in 0 1 2 3; do '
+                  'if (( i % 2 )); then payload=$long; else payload=xxxxxxxxxx; fi; '
+                  'append_record "$1" "sh$2-$i|$payload|end"; done')
+        writers = [subprocess.Popen(["bash", "-c", script, "writer", self.path, str(n)])
+                   for n in range(200)]
+        with ProcessPoolExecutor(max_workers=16) as pool:
+            list(pool.map(_append_records, [self.path] * 16, range(16), [20] * 16))
+        for writer in writers:
+            self.assertEqual(writer.wait(timeout=120), 0)
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            records = f.read().splitlines()
+        self.assertEqual(len(records), 200 * 4 + 16 * 20)
+        bad = [record[:80] for record in records if not self.RECORD_PATTERN.match(record)]
+        self.assertEqual(bad, [])
+        self.assertEqual(len(set(record.split("|", 1)[0] for record in records)), len(records))
+
+class TestRollups(unittest.TestCase):
+    """Test incremental rollups and the reports built from them"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = str(Path(self.temp_dir) / "metrics")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def append(self, *events):
+        claude_metrics.append_events(self.metrics_dir, [
+            claude_metrics.format_event(metric_type, value, context, when=when)
+            for when, metric_type, value, context in events])
+    
+    def test_rollup_ingests_incrementally(self):
+        """Test only new segment bytes are ingested"""
+        self.append(("2025-01-15T10:00:05+00:00", "response_time", "2.0", "search"),
+                    ("2025-01-15T10:00:40+00:00", "response_time", "4.0", "search"),
+                    ("2025-01-15T10:01:00+00:00", "template_usage", "true", "CLAUDE.md:read"))
+        rollup = claude_metrics.load_rollup(self.metrics_dir, "2025-01-15")
+        stats = rollup.types["response_time"]
+        self.assertEqual((stats["count"], stats["sum"], stats["min"], stats["max"]), (2, 6.0, 2.0, 4.0))
+        self.assertEqual(rollup.types["template_usage"]["values"], {"true": 1})
+        self.assertEqual(rollup.contexts["response_time"]["search"]["count"], 2)
+        minute = str(int(claude_metrics.parse_epoch("2025-01-15T10:00:00+00:00") // 60))
+        self.assertEqual(rollup.minutes[minute]["response_time"]["count"], 2)
+        
+        cursor = rollup.cursor
+        self.append(("2025-01-15T11:00:00+00:00", "response_time", "9.0", "search"))
+        with mock.patch("claude_metrics.parse_event", wraps=claude_metrics.parse_event) as parse:
+            rollup = claude_metrics.load_rollup(self.metrics_dir, "2025-01-15")
+        self.assertEqual(parse.call_count, 1)
+        self.assertGreater(rollup.cursor, cursor)
+        self.assertEqual(rollup.types["response_time"]["max"], 9.0)
+    
+    def test_daily_report_from_rollups(self):
+        """Test the report structure of claude-metrics.sh"""
+        self.append(("2025-01-15T10:00:00+00:00", "hallucination", "high", "api:x"),
+                    ("2025-01-15T10:00:01+00:00", "response_time", "3", "op"),
+                    ("2025-01-15T10:00:02+00:00", "response_time", "13", "op"),
+                    ("2025-01-15T10:00:03+00:00", "template_usage", "true", "a:read"),
+                    ("2025-01-15T10:00:04+00:00", "template_usage", "false", "b:read"),
+                    ("2025-01-16T10:00:00+00:00", "config_error", "syntax", ".env:x"))
+        report = claude_metrics.daily_report(self.metrics_dir, "2025-01-15", 1, 10.0)
+        metrics = report["metrics"]
+        self.assertEqual(report["date"], "2025-01-15")
+        self.assertEqual(metrics["hallucinations"], {"count": 1, "threshold": 1, "status": "alert"})
+        self.assertEqual(metrics["response_time"]["average"], 8.0)
+        self.assertEqual(metrics["response_time"]["samples"], 2)
+        self.assertEqual(metrics["response_time"]["status"], "ok")
+        self.assertEqual(metrics["template_usage"], {"total": 2, "success_rate": "1/2"})
+        self.assertEqual(metrics["config_errors"], {"count": 0, "status": "ok"})
+        
+        totals = claude_metrics.summarize(self.metrics_dir)
+        self.assertEqual(totals["config_error"]["values"], {"syntax": 1})
+        since = claude_metrics.parse_epoch("2025-01-15T10:00:02+00:00")
+        totals = claude_metrics.summarize(self.metrics_dir, since=since,
+                                          until=since + 3600)
+        self.assertNotIn("config_error", totals)
+        self.assertEqual(totals["response_time"]["count"], 2)
+
+class TestQuery(unittest.TestCase):
+    """Test indexed queries"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = str(Path(self.temp_dir) / "metrics")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_type_index_skips_blocks(self):
+        """Test blocks without the requested type are not read"""
+        lines = [claude_metrics.format_event("template_usage", "true", f"t{i}:read",
+                                             when=f"2025-01-15T10:{i // 60:02d}:{i % 60:02d}+00:00")
+                 for i in range(3000)]
+        lines.append(claude_metrics.format_event("config_error", "syntax", ".env:x",
+                                                 when="2025-01-15T11:00:00+00:00"))
+        claude_metrics.append_events(self.metrics_dir, lines)
+        path = claude_metrics.segment_path(self.metrics_dir, "2025-01-15")
+        claude_metrics.SegmentIndex(path).update()
+        
+        with mock.patch("claude_metrics.parse_event", wraps=claude_metrics.parse_event) as parse:
+            events = list(claude_metrics.read_events(self.metrics_dir, types={"config_error"}))
+        self.assertEqual([event.context for event in events], [".env:x"])
+        self.assertLess(parse.call_count, 200)
+        self.assertEqual(claude_metrics.SegmentIndex(path).types[-1], {"template_usage", "config_error"})
+    
+    def test_filters_and_group_by(self):
+        """Test type, time, context and severity filters with aggregations"""
+        events = [("2025-01-14T10:00:00+00:00", "response_time", "1", "search"),
+                  ("2025-01-15T10:00:00+00:00", "response_time", "2", "search"),
+                  ("2025-01-15T10:00:01+00:00", "response_time", "4", "search"),
+                  ("2025-01-15T10:00:02+00:00", "response_time", "10", "build"),
+                  ("2025-01-15T10:00:03+00:00", "hallucination", "high", "api:x"),
+                  ("2025-01-15T10:00:04+00:00", "hallucination", "low", "api:y"),
+                  ("2025-01-15T10:00:05+00:00", "hallucination", "high", "file:z")]
+        claude_metrics.append_events(self.metrics_dir, [
+            claude_metrics.format_event(metric_type, value, context, when=when)
+            for when, metric_type, value, context in events])
+        since = claude_metrics.parse_epoch("2025-01-15T00:00:00+00:00")
+        
+        groups = claude_metrics.query(self.metrics_dir, ["response_time"], since=since, group_by="context")
+        rows = claude_metrics.query_rows(groups, ["count", "avg", "max"], sort="avg")
+        self.assertEqual(rows, [{"group": "build", "count": 1, "avg": 10.0, "max": 10.0},
+                                {"group": "search", "count": 2, "avg": 3.0, "max": 4.0}])
+        self.assertAlmostEqual(claude_metrics.aggregate(groups["search"], "p95"), 4.0, delta=0.04)
+        
+        groups = claude_metrics.query(self.metrics_dir, severity="high", group_by="operation")
+        self.assertEqual({key: stats["count"] for key, stats in groups.items()}, {"api": 1, "file": 1})
+        groups = claude_metrics.query(self.metrics_dir, context="api:")
+        self.assertEqual(groups[""]["count"], 2)
+        self.assertEqual(claude_metrics.query(self.metrics_dir, ["response_time"], severity="high"), {})
+    
+    def test_parse_time(self):
+        """Test absolute, day and relative query bounds"""
+        now = claude_metrics.parse_epoch("2025-01-15T12:00:00+00:00")
+        self.assertEqual(claude_metrics.parse_time("24h", now=now), now - 86400)
+        self.assertEqual(claude_metrics.parse_time("30m", now=now), now - 1800)
+        self.assertEqual(claude_metrics.parse_time("2025-01-15T10:00:00+00:00"), now - 7200)
+        start = claude_metrics.parse_time("2025-01-14")
+        self.assertAlmostEqual(claude_metrics.parse_time("2025-01-14", end=True) - start, 86399.999, places=3)
+        self.assertEqual(claude_metrics.parse_time("yesterday", now=now),
+                         claude_metrics.parse_time("today", now=now) - 86400)
+        with self.assertRaises(ValueError):
+            claude_metrics.parse_time("last week")
+
+class TestDashboardFeed(unittest.TestCase):
+    """Test the sequence-cursor dashboard feed"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = str(Path(self.temp_dir) / "metrics")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def append(self, when, metric_type, value, context=""):
+        claude_metrics.append_events(self.metrics_dir, [
+            claude_metrics.format_event(metric_type, value, context, when=when)])
+    
+    def test_deltas_hold_only_changes(self):
+        """Test each update publishes the changed minutes and the new events"""
+        self.append("2025-01-15T10:00:00+00:00", "response_time", "2", "search")
+        self.append("2025-01-15T10:05:00+00:00", "response_time", "4", "search")
+        self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 1)
+        self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 1)  # nothing new
+        
+        self.append("2025-01-15T10:05:30+00:00", "hallucination", "high", "api:x")
+        self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 2)
+        delta = claude_metrics.read_feed(self.metrics_dir, 1)
+        minute = str(int(claude_metrics.parse_epoch("2025-01-15T10:05:00+00:00") // 60))
+        self.assertFalse(delta["reset"])
+        self.assertEqual(list(delta["minutes"]), [minute])
+        self.assertEqual(set(delta["minutes"][minute]), {"response_time", "hallucination"})
+        self.assertEqual([event["type"] for event in delta["events"]], ["hallucination"])
+        self.assertEqual(delta["days"]["2025-01-15"]["response_time"]["avg"], 3.0)
+        self.assertNotIn("sketch", delta["days"]["2025-01-15"]["response_time"])
+        self.assertEqual(claude_metrics.read_feed(self.metrics_dir, 2)["events"], [])
+        
+        # Catching up merges deltas, a new client gets the snapshot
+        merged = claude_metrics.read_feed(self.metrics_dir, 0)
+        self.assertTrue(merged["reset"])
+        self.assertEqual(merged["seq"], 2)
+        self.assertEqual(len(merged["events"]), 3)
+        self.assertEqual(merged["days"]["2025-01-15"]["hallucination"]["values"], {"high": 1})
+    
+    def test_pruned_cursor_gets_snapshot(self):
+        """Test clients behind the retained deltas are reset"""
+        with mock.patch.object(claude_metrics, "FEED_MAX_DELTAS", 2):
+            for second in range(4):
+                self.append(f"2025-01-15T10:00:0{second}+00:00", "template_usage", "true", "a:read")
+                claude_metrics.update_feed(self.metrics_dir)
+        feed_dir = Path(self.metrics_dir) / "feed"
+        self.assertEqual(sorted(path.name for path in (feed_dir / "deltas").iterdir()), ["3.json", "4.json"])
+        self.assertEqual(json.loads((feed_dir / "head.json").read_text())["oldest"], 3)
+        self.assertFalse(claude_metrics.read_feed(self.metrics_dir, 2)["reset"])
+        result = claude_metrics.read_feed(self.metrics_dir, 1)
+        self.assertTrue(result["reset"])
+        self.assertEqual(result["days"]["2025-01-15"]["template_usage"]["count"], 4)
+
+    def test_only_grown_segments_are_reloaded(self):
+        """Test unchanged days are skipped and the snapshot is patched, not rebuilt"""
+        self.append("2025-01-14T10:00:00+00:00", "template_usage", "true", "a:read")
+        self.append("2025-01-15T10:00:00+00:00", "template_usage", "true", "a:read")
+        self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 1)
+        
+        with mock.patch("claude_metrics.load_rollup", wraps=claude_metrics.load_rollup) as load, \
+             mock.patch("claude_metrics._write_json", wraps=claude_metrics._write_json) as write:
+            self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 1)
+            self.assertEqual((load.call_count, write.call_count), (0, 0))
+            
+            self.append("2025-01-15T11:00:00+00:00", "template_usage", "false", "b:read")
+            self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 2)
+            self.assertEqual([call.args[1] for call in load.call_args_list], ["2025-01-15"])
+        snapshot = claude_metrics.read_feed(self.metrics_dir, 0)
+        self.assertEqual(snapshot["days"]["2025-01-14"]["template_usage"]["count"], 1)
+        self.assertEqual(snapshot["days"]["2025-01-15"]["template_usage"]["values"], {"true": 1, "false": 1})
+        self.assertEqual(len(snapshot["events"]), 3)
+    
+    def test_snapshot_window_slides_without_delta(self):
+        """Test minutes leaving the window are pruned from the snapshot only"""
+        now = claude_metrics.timestamp()
+        self.append(now, "response_time", "1", "search")
+        self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 1)
+        self.assertEqual(len(claude_metrics.read_feed(self.metrics_dir, 0)["minutes"]), 1)
+        
+        later = claude_metrics.parse_epoch(now) + (claude_metrics.FEED_WINDOW_MINUTES + 2) * 60
+        with mock.patch("claude_metrics.time.time", return_value=later):
+            self.assertEqual(claude_metrics.update_feed(self.metrics_dir), 1)
+        snapshot = claude_metrics.read_feed(self.metrics_dir, 0)
+        self.assertEqual(snapshot["minutes"], {})
+        self.assertEqual(snapshot["days"][now[:10]]["response_time"]["count"], 1)
+        self.assertEqual(os.listdir(Path(self.metrics_dir) / "feed" / "deltas"), ["1.json"])
+
+class TestQuantileSketch(unittest.TestCase):
+    """Test the mergeable latency sketch"""
+    
+    def exact(self, values, quantile):
+        ordered = sorted(values)
+        return ordered[max(math.ceil(quantile * len(ordered)) - 1, 0)]
+    
+    def test_relative_accuracy(self):
+        """Test p50/p95/p99 stay within the configured relative error"""
+        rng = random.Random(42)
+        values = [rng.lognormvariate(0, 1.5) for _ in range(20000)]
+        sketch = claude_metrics.new_sketch()
+        for value in values:
+            claude_metrics.sketch_add(sketch, value)
+        for quantile in (0.5, 0.95, 0.99):
+            expected = self.exact(values, quantile)
+            self.assertAlmostEqual(claude_metrics.sketch_quantile(sketch, quantile), expected,
+                                   delta=expected * claude_metrics.SKETCH_ACCURACY * 1.01)
+        self.assertLess(len(sketch["bins"]), 2000)
+    
+    def test_merge_equals_combined_stream(self):
+        """Test merged sketches give the same answers as one sketch of all values"""
+        rng = random.Random(7)
+        left, right, combined = (claude_metrics.new_sketch() for _ in range(3))
+        for index in range(5000):
+            value = rng.expovariate(2.0) if index % 3 else 0.0
+            claude_metrics.sketch_add(left if index % 2 else right, value)
+            claude_metrics.sketch_add(combined, value)
+        merged = claude_metrics.sketch_merge(claude_metrics.sketch_merge(
+            claude_metrics.new_sketch(), left), right)
+        self.assertEqual(merged, combined)
+        self.assertEqual(claude_metrics.sketch_quantile(merged, 0.1), 0)
+        self.assertEqual(claude_metrics.sketch_quantile(claude_metrics.new_sketch(), 0.5), 0)
+    
+    def test_bins_are_bounded(self):
+        """Test memory stays bounded, sacrificing the lowest values first"""
+        sketch = claude_metrics.new_sketch()
+        with mock.patch.object(claude_metrics, "SKETCH_MAX_BINS", 16):
+            for exponent in range(-8, 32):
+                claude_metrics.sketch_add(sketch, 10.0 ** exponent)
+        self.assertEqual(len(sketch["bins"]), 16)
+        self.assertEqual(sum(sketch["bins"].values()), 40)
+        self.assertAlmostEqual(claude_metrics.sketch_quantile(sketch, 1.0), 1e31, delta=1e31 * 0.01)
+    
+    def test_report_percentiles_per_operation(self):
+        """Test daily reports expose percentiles overall and per operation"""
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            lines = [claude_metrics.format_event("response_time", value, operation,
+                                                 when=f"2025-01-15T10:{index // 60:02d}:{index % 60:02d}+00:00")
+                     for index, (operation, value) in enumerate(
+                         [("search", i / 100) for i in range(1, 101)] + [("build", 30)] * 5)]
+            claude_metrics.append_events(metrics_dir, lines)
+            response = claude_metrics.daily_report(metrics_dir, "2025-01-15")["metrics"]["response_time"]
+        self.assertAlmostEqual(response["p50"], 0.53, delta=0.53 * 0.011)
+        self.assertAlmostEqual(response["p99"], 30, delta=0.3)
+        self.assertEqual(response["operations"]["build"]["samples"], 5)
+        self.assertAlmostEqual(response["operations"]["search"]["p95"], 0.95, delta=0.95 * 0.011)
+
+class TestCounterStore(unittest.TestCase):
+    """Test persisted daily counters"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = Path(self.temp_dir) / "metrics"
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_increment_and_totals(self):
+        """Test counters per (date, type, value) and per-type totals"""
+        store = claude_metrics.CounterStore(self.metrics_dir)
+        store.increment("hallucination", "high", day="2025-01-15")
+        store.increment("hallucination", "high", day="2025-01-15", amount=2)
+        store.increment("hallucination", "low/../x", day="2025-01-15")
+        store.increment("hallucination", "high", day="2025-01-16")
+        
+        self.assertEqual(store.get("hallucination", "high", day="2025-01-15"), 3)
+        self.assertEqual(store.total("hallucination", day="2025-01-15"), 4)
+        self.assertEqual(store.total("config_error", day="2025-01-15"), 0)
+        self.assertTrue((self.metrics_dir / "counters" / "2025-01-15" / "hallucination.low____x").exists())
+    
+    def test_writer_updates_counters(self):
+        """Test flushed batches update the counters of categorical metrics"""
+        with claude_metrics.MetricsWriter(self.metrics_dir, flush_interval=3600) as writer:
+            writer.log("hallucination", "high", "api:x")
+            writer.log("hallucination", "medium", "api:x")
+            writer.log("response_time", "1.2", "op")
+        store = claude_metrics.CounterStore(self.metrics_dir)
+        self.assertEqual(store.total("hallucination"), 2)
+        self.assertEqual(store.total("response_time"), 0)
+    
+    def test_concurrent_increments(self):
+        """Test increments from several processes are not lost"""
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(_increment_counters, [str(self.metrics_dir)] * 8, [25] * 8))
+        store = claude_metrics.CounterStore(self.metrics_dir)
+        self.assertEqual(store.get("hallucination", "high", day="2025-01-15"), 200)
+    
+    def test_shell_threshold_uses_counters(self):
+        """Test claude-metrics.sh counts hallucinations without scanning the log"""
+        if not shutil.which("bash"):
+            self.skipTest("bash not available")
+        env = dict(os.environ, CLAUDE_METRICS_DIR=str(self.metrics_dir),
+                   HALLUCINATION_THRESHOLD="2", CLAUDE_LOCALE="en")
+        for _ in range(2):
+            result = subprocess.run(["bash", str(scripts_dir / "claude-metrics.sh"),
+                                     "hallucination", "api", "high", "ctx"],
+                                    capture_output=True, text=True, env=env, timeout=60)
+            self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("2/2", result.stdout)
+        
+        # Python and shell writers share the same counters
+        store = claude_metrics.CounterStore(self.metrics_dir)
+        self.assertEqual(store.get("hallucination", "high"), 2)
+
+class TestMetricsExporter(unittest.TestCase):
+    """Test the OpenMetrics exporter"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = str(Path(self.temp_dir) / "metrics")
+        self.security_log = Path(self.temp_dir) / "logs" / "security-events.log"
+        self.security_log.parent.mkdir()
+        self.security_log.write_text(
+            "2025-01-15 10:00:00 UTC [INFO] Security monitoring initialized\n"
+            + json.dumps({"timestamp": "2025-01-15 10:00:01 UTC", "severity": "HIGH",
+                          "category": "PATH_TRAVERSAL", "message": "x"}) + "\n", encoding="utf-8")
+        self.exporter_module = load_script("metrics-exporter.py")
+        self.exporter = self.exporter_module.MetricsExporter(self.metrics_dir, str(self.security_log))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def append(self, *events):
+        claude_metrics.append_events(self.metrics_dir, [
+            claude_metrics.format_event(metric_type, value, context, when="2025-01-15T10:00:00+00:00")
+            for metric_type, value, context in events])
+    
+    def test_series_are_updated_incrementally(self):
+        """Test counters and histograms, and that only new lines are ingested"""
+        self.append(("hallucination", "high", "api:x"), ("response_time", "0.3", "search"),
+                    ("response_time", "7", "search"))
+        self.assertEqual(self.exporter.refresh(), 4)
+        text = self.exporter.render()
+        self.assertIn('claude_events_total{type="response_time"} 2', text)
+        self.assertIn('claude_event_values_total{type="hallucination",severity="high"} 1', text)
+        self.assertIn('claude_security_events_total{severity="HIGH",category="PATH_TRAVERSAL"} 1', text)
+        self.assertIn('claude_response_time_seconds_bucket{operation="search",le="0.5"} 1', text)
+        self.assertIn('claude_response_time_seconds_bucket{operation="search",le="+Inf"} 2', text)
+        self.assertIn('claude_response_time_seconds_sum{operation="search"} 7.3', text)
+        self.assertIn("# TYPE claude_events counter", text)
+        self.assertTrue(text.endswith("# EOF\n"))
+        self.assertIn("# TYPE claude_events_total counter", self.exporter.render(openmetrics=False))
+        
+        self.assertEqual(self.exporter.refresh(), 0)
+        self.append(("hallucination", "high", 'api:"quoted"'))
+        self.assertEqual(self.exporter.refresh(), 1)
+        self.assertIn('claude_event_values_total{type="hallucination",severity="high"} 2',
+                      self.exporter.render())
+    
+    def test_http_endpoint(self):
+        """Test /metrics is served with content negotiation"""
+        self.append(("template_usage", "true", "CLAUDE.md:read"))
+        server = self.exporter_module.serve(self.exporter, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            request = urllib.request.Request(url, headers={"Accept": "application/openmetrics-text"})
+            with urllib.request.urlopen(request, timeout=10) as response:
+                self.assertIn("openmetrics-text", response.headers["Content-Type"])
+                self.assertIn('claude_event_values_total{type="template_usage",success="true"} 1',
+                              response.read().decode("utf-8"))
+            with urllib.request.urlopen(url, timeout=10) as response:
+                self.assertIn("version=0.0.4", response.headers["Content-Type"])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+FAKE_SOCAT = """#!/usr/bin/env python3
+import socket, sys
+sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+sock.connect(sys.argv[-1].split(":", 1)[1])
+sock.sendall(sys.stdin.buffer.read())
+sock.shutdown(socket.SHUT_WR)
+sys.stdout.buffer.write(sock.makefile("rb").read())
+"""
+
+class TestMetricsCollector(unittest.TestCase):
+    """Test the Unix socket collector and its clients"""
+    
+    def setUp(self):
+        if not hasattr(__import__("socket"), "AF_UNIX"):
+            self.skipTest("Unix sockets not available")
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics_dir = str(Path(self.temp_dir) / "metrics")
+        self.collector_module = load_script("metrics-collector.py")
+        self.collector = self.collector_module.MetricsCollector(self.metrics_dir, flush_interval=3600)
+        self.collector.bind()
+        self.thread = threading.Thread(target=self.collector.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def tearDown(self):
+        if hasattr(self, "collector"):
+            self.collector.stop()
+            self.thread.join(timeout=10)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def segment_lines(self):
+        path = Path(claude_metrics.segment_path(self.metrics_dir, claude_metrics.timestamp()[:10]))
+        return path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    
+    def test_protocol_and_batching(self):
+        """Test line and JSON events are batched, counted ones flushed before the reply"""
+        with claude_metrics.CollectorClient(self.metrics_dir) as client:
+            client.send("response_time", "1.5", "search")
+            client.send("template_usage", "true", "CLAUDE.md:read")
+            self.assertEqual(client.close(), "ok 2 0")
+        self.assertEqual(self.segment_lines(), [])  # buffered in the collector
+        
+        import socket
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.collector.socket_path)
+        sock.sendall(b'{"type": "hallucination", "value": "high", "context": "api:x"}\n'
+                     b"2025-01-15T10:00:00+00:00|config_error|syntax|.env:x\n"
+                     b"bad type|x|y\n"
+                     b"STATS")
+        sock.shutdown(socket.SHUT_WR)
+        reply = sock.makefile("r").read().splitlines()
+        sock.close()
+        self.assertEqual(reply[-1], "ok 2 1")
+        stats = json.loads(reply[0])
+        self.assertEqual(stats["response_time"]["count"], 1)
+        self.assertAlmostEqual(stats["response_time"]["p50"], 1.5, delta=0.02)
+        
+        # The counted events forced a flush of the whole batch
+        self.assertEqual(len(self.segment_lines()), 3)
+        self.assertEqual(claude_metrics.CounterStore(self.metrics_dir).get("hallucination", "high"), 1)
+        self.assertEqual(claude_metrics.CounterStore(self.metrics_dir).get(
+            "config_error", "syntax", day="2025-01-15"), 1)
+    
+    def test_write_failure_keeps_collector_running(self):
+        """Test a failing writer is reported and its batch kept, not the daemon killed"""
+        stderr = io.StringIO()
+        with mock.patch("claude_metrics.append_events", side_effect=OSError(28, "No space left on device")), \
+             mock.patch("sys.stderr", stderr):
+            with claude_metrics.CollectorClient(self.metrics_dir) as client:
+                client.send("hallucination", "high", "api:x")
+                self.assertEqual(client.close(), "ok 1 0")
+        self.assertIn("No space left on device", stderr.getvalue())
+        self.assertTrue(self.thread.is_alive())
+        self.assertEqual(self.collector.writer.pending(), 1)
+        self.assertEqual(self.segment_lines(), [])
+        
+        # The next counted batch writes both events
+        with claude_metrics.CollectorClient(self.metrics_dir) as client:
+            client.send("hallucination", "low", "api:y")
+            self.assertEqual(client.close(), "ok 1 0")
+        self.assertEqual(len(self.segment_lines()), 2)
+        self.assertEqual(claude_metrics.CounterStore(self.metrics_dir).get("hallucination", "high"), 1)
+    
+    def test_fallback_without_collector(self):
+        """Test clients append directly when the collector is not running"""
+        self.collector.stop()
+        self.thread.join(timeout=10)
+        self.assertFalse(os.path.exists(self.collector.socket_path))
+        self.assertFalse(claude_metrics.send_metric("hallucination", "low", "api:y", self.metrics_dir))
+        self.assertEqual(len(self.segment_lines()), 1)
+        self.assertEqual(claude_metrics.CounterStore(self.metrics_dir).get("hallucination", "low"), 1)
+    
+    def test_shell_client(self):
+        """Test send_metric in metrics-client.sh, with and without the collector"""
+        if not shutil.which("bash"):
+            self.skipTest("bash not available")
+        bin_dir = Path(self.temp_dir) / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "socat").write_text(FAKE_SOCAT.replace("python3", sys.executable.replace("\\", "/"), 1))
+        (bin_dir / "socat").chmod(0o755)
+        env = dict(os.environ, CLAUDE_METRICS_DIR=self.metrics_dir,
+                   PATH=f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+        script = f'source "{scripts_dir / "metrics-client.sh"}"; send_metric hallucination high "api:sh"'
+        
+        result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, env=env, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(len(self.segment_lines()), 1)  # flushed by the collector
+        self.assertEqual(self.collector.stats()["hallucination"]["count"], 1)
+        
+        self.collector.stop()
+        self.thread.join(timeout=10)
+        result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, env=env, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lines = self.segment_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertRegex(lines[1], r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2}\|hallucination\|high\|api:sh$")
+        self.assertEqual(claude_metrics.CounterStore(self.metrics_dir).get("hallucination", "high"), 2)
+
+if __name__ == '__main__':
+    unittest.main()
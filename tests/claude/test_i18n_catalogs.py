@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled i18n catalogs and the shell i18n helpers
+"""
+import unittest
+import sys
+import os
+import json
+import shutil
+import subprocess
+import importlib.util
+import tempfile
+from pathlib import Path
+
+# Add scripts directory to Python path
+scripts_dir = Path(__file__).parent.parent.parent / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+class TestI18nCatalogs(unittest.TestCase):
+    """Test catalog compilation and shell lookups"""
+    
+    def setUp(self):
+        self.scripts_dir = scripts_dir
+        self.project_root = Path(__file__).parent.parent.parent
+        self.temp_dir = tempfile.mkdtemp()
+        self.i18n_dir = Path(self.temp_dir) / "i18n"
+        for locale in ("en", "fr"):
+            (self.i18n_dir / locale).mkdir(parents=True)
+            shutil.copy(self.project_root / "i18n" / locale / "messages.json",
+                        self.i18n_dir / locale / "messages.json")
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def load_module(self, script_name):
+        """Helper to load a script as a module"""
+        script_path = self.scripts_dir / script_name
+        spec = importlib.util.spec_from_file_location(
+            script_name.replace('-', '_').replace('.py', ''),
+            script_path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    
+    def run_helper(self, script, env=None):
+        """Run a bash snippet with i18n-helper.sh sourced against the temp catalogs"""
+        if not shutil.which("bash"):
+            self.skipTest("bash not available")
+        full_env = dict(os.environ, I18N_DIR=str(self.i18n_dir))
+        for var in ("CLAUDE_LOCALE", "LANG", "LANGUAGE", "LC_ALL"):
+            full_env.pop(var, None)
+        full_env.update(env or {})
+        helper = self.scripts_dir / "i18n-helper.sh"
+        result = subprocess.run(
+            ["bash", "-c", f'source "{helper}"; {script}'],
+            capture_output=True, text=True, env=full_env, timeout=30
+        )
+        return result
+    
+    def test_flatten_and_positional_templates(self):
+        """Test flattening and named -> positional placeholder rewriting"""
+        module = self.load_module("compile-i18n-catalog.py")
+        
+        flat = module.flatten_messages({"a": {"b": "x", "c": {"d": "y"}}, "e": "z"})
+        self.assertEqual(flat, {"a.b": "x", "a.c.d": "y", "e": "z"})
+        
+        self.assertEqual(module.positional_template("{template} ({action})"), "{0} ({1})")
+        self.assertEqual(module.positional_template("{a} {0} {a} {b}"), "{1} {0} {1} {2}")
+        self.assertEqual(module.shell_quote("it's"), "'it'\\''s'")
+    
+    def test_compile_locale_catalog(self):
+        """Test the generated catalog is a bash associative array literal"""
+        module = self.load_module("compile-i18n-catalog.py")
+        
+        self.assertEqual(module.available_locales(str(self.i18n_dir)), ["en", "fr"])
+        target = module.compile_locale(str(self.i18n_dir), "fr")
+        content = Path(target).read_text(encoding="utf-8")
+        
+        self.assertIn("declare -gA I18N_CATALOG_fr=(", content)
+        self.assertIn("[setup.connectionFailed]='Connexion à {0} échouée : {1}'", content)
+        self.assertIn("[setup.welcome]='Bienvenue dans l'\\''assistant", content)
+        
+        with self.assertRaises(ValueError):
+            module.compile_locale(str(self.i18n_dir), "../etc")
+    
+    def test_localized_file_index(self):
+        """Test the files index resolves fallbacks once, for bash lookups"""
+        module = self.load_module("compile-i18n-catalog.py")
+        for path in ("en/security/guide.md", "fr/security/guide.md", "en/templates/readme.md"):
+            (self.i18n_dir / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.i18n_dir / path).write_text("# Doc\n", encoding="utf-8")
+        (self.i18n_dir / "config.json").write_text(json.dumps({
+            "supportedLocales": ["en", "fr"],
+            "files": {"security": {"guide": "security/guide"}, "templates": {"wizard": "templates/wizard"}},
+        }), encoding="utf-8")
+        
+        file_index = module.build_file_index(str(self.i18n_dir))
+        root = str(self.i18n_dir)
+        self.assertEqual(file_index["locales"], ["en", "fr"])
+        self.assertEqual(file_index["index"]["fr:security/guide"], f"{root}/fr/security/guide.md")
+        self.assertEqual(file_index["index"]["fr:templates/readme.md"], f"{root}/en/templates/readme.md")
+        self.assertNotIn("fr:templates/wizard", file_index["index"])
+        
+        if not shutil.which("bash"):
+            self.skipTest("bash not available")
+        integration = self.scripts_dir / "i18n-integration.sh"
+        script = (f'source "{integration}" locale >/dev/null; '
+                  'get_localized_file security/guide.md; get_localized_file templates/readme.md; '
+                  'get_localized_file messages.json; echo "${#I18N_FILES_fr[@]}"')
+        result = subprocess.run(["bash", "-c", script], capture_output=True, text=True,
+                                cwd=self.temp_dir, timeout=30,
+                                env=dict(os.environ, CLAUDE_LOCALE="fr", CLAUDE_LOCALE_CACHE="false"))
+        # messages.json is not a document: an index miss probes the locale directories
+        self.assertEqual(result.stdout.splitlines(), [
+            "i18n/fr/security/guide.md", "i18n/en/templates/readme.md", "i18n/fr/messages.json", "1",
+        ], result.stderr)
+        self.assertTrue((self.i18n_dir / "files.index.sh").exists())
+    
+    def test_binary_catalog_roundtrip(self):
+        """Test the memory-mapped binary catalog against the flattened JSON"""
+        module = self.load_module("compile-i18n-catalog.py")
+        import claude_i18n
+        
+        module.compile_locale(str(self.i18n_dir), "fr", binary=True)
+        catalog_path = self.i18n_dir / "fr" / "messages.cat"
+        self.assertTrue(catalog_path.exists())
+        
+        messages = claude_i18n.flatten_messages(json.loads(
+            (self.i18n_dir / "fr" / "messages.json").read_text(encoding="utf-8")))
+        with claude_i18n.BinaryCatalog(catalog_path) as catalog:
+            self.assertEqual(len(catalog), len(messages))
+            self.assertEqual(catalog.keys(), sorted(messages))
+            for key, text in messages.items():
+                self.assertEqual(catalog.get(key), claude_i18n.positional_template(text))
+            self.assertIsNone(catalog.get("missing.key"))
+            self.assertNotIn("setup", catalog)
+        
+        bogus = self.i18n_dir / "bogus.cat"
+        bogus.write_bytes(b"NOPE" + bytes(40))
+        with self.assertRaises(ValueError):
+            claude_i18n.BinaryCatalog(bogus)
+    
+    def test_binary_catalog_node_reader(self):
+        """Test the Node reader resolves the same entries as the Python one"""
+        if not shutil.which("node"):
+            self.skipTest("node not available")
+        import claude_i18n
+        
+        catalog_path = self.i18n_dir / "catalog.cat"
+        claude_i18n.write_binary_catalog({"a.b": "x {name}", "é.clé": "valeur", "c": "y"}, catalog_path)
+        reader = self.scripts_dir / "i18n-catalog.js"
+        script = (
+            f"const {{ BinaryCatalog }} = require({json.dumps(str(reader))});"
+            f"const c = new BinaryCatalog({json.dumps(str(catalog_path))});"
+            "console.log(JSON.stringify([c.count, c.get('a.b'), c.get('é.clé'), c.get('zz') === undefined]));"
+        )
+        result = subprocess.run(["node", "-e", script], capture_output=True, text=True, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout), [3, "x {0}", "valeur", True])
+    
+    def test_setup_wizard_json_and_binary_paths_agree(self):
+        """Test setup-wizard.js fills the same placeholders with or without messages.cat"""
+        if not shutil.which("node"):
+            self.skipTest("node not available")
+        module = self.load_module("compile-i18n-catalog.py")
+        wizard = self.scripts_dir / "setup-wizard.js"
+        script = (
+            f"const {{ I18n }} = require({json.dumps(str(wizard))});"
+            "const i18n = new I18n();"
+            "console.log(JSON.stringify([i18n.catalog !== null, i18n.get('setup.setupFailed', 'boom'),"
+            " i18n.get('setup.connectionFailed', 'Exa', 'timeout'), i18n.get('setup.getHelp', 'https://x'),"
+            " i18n.get('setup.connectionFailed', 'Exa')]));"
+        )
+        env = dict(os.environ, I18N_DIR=str(self.i18n_dir), CLAUDE_LOCALE="en")
+
+        def run():
+            result = subprocess.run(["node", "-e", script], capture_output=True, text=True,
+                                    env=env, timeout=30)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            return json.loads(result.stdout)
+
+        from_json = run()
+        module.compile_locale(str(self.i18n_dir), "en", binary=True)
+        from_binary = run()
+        self.assertEqual([from_json[0], from_binary[0]], [False, True])
+        self.assertEqual(from_json[1:], from_binary[1:])
+        self.assertEqual(from_json[1:], [
+            "Setup failed: boom",
+            "Connection to Exa failed: timeout",
+            "Get help: https://x",
+            "Connection to Exa failed: {1}",
+        ])
+
+    def test_catalog_consistency_report(self):
+        """Test key, placeholder and file drift against the default locale"""
+        module = self.load_module("check-i18n-catalogs.py")
+        
+        report = module.check_catalogs(str(self.i18n_dir), "en")
+        self.assertTrue(report["consistent"])
+        self.assertEqual(list(report["locales"]), ["fr"])
+        
+        fr_file = self.i18n_dir / "fr" / "messages.json"
+        messages = json.loads(fr_file.read_text(encoding="utf-8"))
+        del messages["common"]["success"]
+        messages["common"]["extra"] = "Extra"
+        messages["setup"]["connectionFailed"] = "Connexion à {service} échouée"
+        fr_file.write_text(json.dumps(messages, ensure_ascii=False), encoding="utf-8")
+        (self.i18n_dir / "en" / "templates").mkdir()
+        (self.i18n_dir / "en" / "templates" / "readme.md").write_text("# Readme\n")
+        (self.i18n_dir / "de").mkdir()
+        (self.i18n_dir / "de" / "messages.json").write_text("{broken", encoding="utf-8")
+        
+        report = module.check_catalogs(str(self.i18n_dir), "en")
+        self.assertFalse(report["consistent"])
+        fr = report["locales"]["fr"]
+        self.assertEqual(fr["missing_keys"], ["common.success"])
+        self.assertEqual(fr["extra_keys"], ["common.extra"])
+        self.assertEqual(fr["missing_files"], ["templates/readme.md"])
+        self.assertEqual(fr["placeholder_mismatches"]["setup.connectionFailed"],
+                         {"missing": ["error"], "extra": []})
+        self.assertTrue(report["locales"]["de"]["missing_catalog"])
+    
+    def test_lookup_benchmark_report(self):
+        """Test the benchmark harness measures paths against a temp i18n copy"""
+        module = self.load_module("benchmark-i18n.py")
+        
+        function = module.extract_security_function(self.scripts_dir / "i18n-integration.sh")
+        self.assertTrue(function.startswith("get_security_message() {"))
+        self.assertTrue(function.endswith("}\n"))
+        
+        report = module.run_benchmarks(runs=1, iterations=3, only=["claude_i18n", "BinaryCatalog", "compiled catalog"],
+                                       i18n_dir=self.i18n_dir)
+        names = [entry["path"] for entry in report["paths"]]
+        self.assertEqual(names, [
+            "bash get_message (compiled catalog)",
+            "python claude_i18n.get_message",
+            "python BinaryCatalog.get",
+        ])
+        for entry in report["paths"]:
+            if "skipped" in entry:
+                continue
+            self.assertNotIn("error", entry)
+            self.assertGreater(entry["cold_ms"], 0)
+            self.assertGreater(entry["warm_us"], 0)
+        self.assertFalse((self.i18n_dir / "en" / "messages.catalog.sh").exists())
+    
+    def test_get_message_uses_compiled_catalog(self):
+        """Test get_message builds the catalog once and renders parameters"""
+        result = self.run_helper(
+            'get_message metrics.template.used "CLAUDE.md" "read"; '
+            'CLAUDE_LOCALE=fr get_message setup.connectionFailed "Exa" "a&b"; '
+            'get_message missing.key; '
+            'get_message "bad key"'
+        )
+        self.assertEqual(result.returncode, 1, result.stderr)
+        self.assertEqual(result.stdout.splitlines(), [
+            "Template used: CLAUDE.md (read)",
+            "Connexion à Exa échouée : a&b",
+            "[Missing i18n: missing.key]",
+            "[Missing i18n: bad key]",
+        ])
+        self.assertTrue((self.i18n_dir / "en" / "messages.catalog.sh").exists())
+        self.assertTrue((self.i18n_dir / "fr" / "messages.catalog.sh").exists())
+    
+    def test_get_message_python_fallback(self):
+        """Test the Python fallback renders the same output as the catalog"""
+        result = self.run_helper(
+            '_i18n_load_catalog() { return 1; }; '
+            'get_message metrics.template.used "CLAUDE.md" "read"; '
+            'get_message missing.key'
+        )
+        self.assertEqual(result.stdout.splitlines(), [
+            "Template used: CLAUDE.md (read)",
+            "[Missing i18n: missing.key]",
+        ])
+
+    def test_mixed_placeholders_render_alike(self):
+        """Test templates mixing {0} and {name} render the same on both paths"""
+        messages_file = self.i18n_dir / "en" / "messages.json"
+        messages = json.loads(messages_file.read_text(encoding="utf-8"))
+        messages["mixed"] = {"order": "{name} then {0}, {name} again"}
+        messages_file.write_text(json.dumps(messages), encoding="utf-8")
+        
+        lookups = 'get_message mixed.order "first" "second"; get_message mixed.order "only"'
+        expected = ["second then first, second again", "{1} then only, {1} again"]
+        result = self.run_helper(lookups)
+        self.assertEqual(result.stdout.splitlines(), expected, result.stderr)
+        result = self.run_helper('_i18n_load_catalog() { return 1; }; ' + lookups)
+        self.assertEqual(result.stdout.splitlines(), expected, result.stderr)
+
+    def test_get_messages_batch(self):
+        """Test batch resolution on the catalog and fallback paths"""
+        batch = ('2 metrics.template.used "CLAUDE.md" "read" 0 common.success 0 '
+                 'missing.key 2 setup.connectionFailed "Exa" "--x" 2 setup.connectionFailed "--" "--"')
+        expected = [
+            "Template used: CLAUDE.md (read)",
+            "Success",
+            "[Missing i18n: missing.key]",
+            "Connection to Exa failed: --x",
+            "Connection to -- failed: --",
+        ]
+        
+        result = self.run_helper(f'get_messages {batch}')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split("\0")[:-1], expected)
+        
+        result = self.run_helper(
+            '_i18n_load_catalog() { return 1; }; '
+            f'get_messages --array {batch} 0 "bad key"; echo "status=$?"; '
+            'printf "%s\\n" "${I18N_MESSAGES[@]}"'
+        )
+        self.assertEqual(result.stdout.splitlines(),
+                         ["status=1"] + expected + ["[Missing i18n: bad key]"])
+        
+        # A group whose count doesn't match its parameters is rejected
+        result = self.run_helper('get_messages --array 0 common.success 3 common.error "x"; echo "status=$?"; '
+                                 'printf "%s\\n" "${I18N_MESSAGES[@]}"')
+        self.assertEqual(result.stdout.splitlines(), ["status=1", "Success"])
+        self.assertIn("expected a parameter count", result.stderr)
+    
+    def test_detect_locale_probe_cache(self):
+        """Test system probes run once and are reused from the disk cache"""
+        if not shutil.which("bash"):
+            self.skipTest("bash not available")
+        bin_dir = Path(self.temp_dir) / "bin"
+        bin_dir.mkdir()
+        probe = bin_dir / "defaults"
+        probe.write_text(f'#!/bin/sh\necho probe >> "{self.temp_dir}/calls"\necho fr_FR\n')
+        probe.chmod(0o755)
+        
+        env = {
+            "PATH": f"{bin_dir}:/usr/bin:/bin",
+            "XDG_CACHE_HOME": str(Path(self.temp_dir) / "cache"),
+        }
+        script = self.scripts_dir / "detect-locale.sh"
+        
+        def detect(**extra):
+            return subprocess.run(["bash", str(script), "detect"], capture_output=True,
+                                  text=True, env=dict(env, **extra), timeout=30).stdout.strip()
+        
+        self.assertEqual(detect(), "fr")
+        self.assertEqual(detect(), "fr")
+        self.assertEqual(detect(LANG="en_US.UTF-8"), "en")
+        calls = (Path(self.temp_dir) / "calls").read_text().splitlines()
+        self.assertEqual(len(calls), 1)
+        
+        self.assertEqual(detect(CLAUDE_LOCALE_CACHE="false"), "fr")
+        calls = (Path(self.temp_dir) / "calls").read_text().splitlines()
+        self.assertEqual(len(calls), 2)
+    
+class TestClaudeI18nLibrary(unittest.TestCase):
+    """Test the importable Python i18n library"""
+    
+    def setUp(self):
+        import claude_i18n
+        self.i18n = claude_i18n
+        self.i18n.clear_cache()
+    
+    def test_detect_locale_matches_shell_rules(self):
+        """Test locale detection priority and fallback"""
+        detect = self.i18n.detect_locale
+        self.assertEqual(detect({}), "en")
+        self.assertEqual(detect({"CLAUDE_LOCALE": "fr", "LANG": "en_US.UTF-8"}), "fr")
+        self.assertEqual(detect({"LANG": "fr_FR.UTF-8"}), "fr")
+        self.assertEqual(detect({"LANGUAGE": "fr_CA:en"}), "fr")
+        self.assertEqual(detect({"LC_ALL": "fr_BE.UTF-8"}), "fr")
+        self.assertEqual(detect({"CLAUDE_LOCALE": "es"}), "en")
+        
+        detect({"LANG": "fr_FR.UTF-8"})
+        self.assertGreater(self.i18n._resolve_locale.cache_info().hits, 0)
+    
+    def test_message_templates(self):
+        """Test pre-parsed templates fill positional and named placeholders"""
+        template = self.i18n.MessageTemplate("Connection to {service} failed: {error}")
+        self.assertEqual(template.arity, 2)
+        self.assertEqual(template.names, ["service", "error"])
+        self.assertEqual(template.render("Exa", "timeout"), "Connection to Exa failed: timeout")
+        self.assertEqual(template.render(error="timeout", service="Exa"),
+                         "Connection to Exa failed: timeout")
+        self.assertEqual(template.render("Exa"), "Connection to Exa failed: {error}")
+        
+        literal = self.i18n.MessageTemplate("Use {} or {{0}} with {0}")
+        self.assertEqual(literal.render("x"), "Use {} or {x} with x")
+        self.assertEqual(self.i18n.MessageTemplate("Done").render("ignored"), "Done")
+    
+    def test_catalogs_are_flattened_and_cached(self):
+        """Test lookups against the repository catalogs"""
+        get = self.i18n.get_message
+        self.assertEqual(get("common.success", locale="en"), "Success")
+        self.assertEqual(get("common.success", locale="fr"), "Succès")
+        self.assertEqual(get("metrics.template.used", "CLAUDE.md", "read", locale="en"),
+                         "Template used: CLAUDE.md (read)")
+        self.assertEqual(get("setup.apiKeyPrompt", service="Exa", locale="en"),
+                         "Please enter your Exa API key")
+        self.assertEqual(get("missing.key", locale="en"), "[Missing i18n: missing.key]")
+        
+        catalog = self.i18n.load_catalog("fr")
+        self.assertIs(self.i18n.load_catalog("fr"), catalog)
+        self.assertIn("metrics.hallucination.detected", catalog)
+        
+        translator = self.i18n.I18n("fr")
+        self.assertTrue(translator.has("common.error"))
+        self.assertEqual(translator.get("common.error"), "Erreur")
+        self.assertEqual(translator.get("nope"), "[Missing i18n: nope]")
+    
+    def test_unknown_locale_directory(self):
+        """Test a missing catalog yields missing-message markers"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertEqual(self.i18n.load_catalog("en", temp_dir), {})
+            self.assertEqual(self.i18n.get_message("common.success", locale="en", i18n_dir=temp_dir),
+                             "[Missing i18n: common.success]")
+    
+    def test_unsupported_locale_falls_back_to_default(self):
+        """Test a locale without a catalog gets the default locale's messages"""
+        self.assertIs(self.i18n.load_catalog("de"), self.i18n.load_catalog("en"))
+        self.assertEqual(self.i18n.get_message("common.success", locale="de"), "Success")
+        self.assertEqual(self.i18n.I18n("de").get("common.error"), "Error")
+
+if __name__ == '__main__':
+    unittest.main()
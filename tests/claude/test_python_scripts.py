@@ -9,6 +9,7 @@ import os
 import importlib.util
 from pathlib import Path
 import tempfile
+import shutil
 
 # Add scripts directory to Python path
 scripts_dir = Path(__file__).parent.parent.parent / "scripts"
@@ -82,6 +83,8 @@ class TestPythonScripts(unittest.TestCase):
         )
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
+        module.GLOSSARY_CACHE_DIR = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, module.GLOSSARY_CACHE_DIR, True)
         
         # Check that terminology dictionary exists
         self.assertTrue(hasattr(module, 'FRENCH_TERMINOLOGY'))
@@ -97,6 +100,8 @@ class TestPythonScripts(unittest.TestCase):
         )
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
+        module.GLOSSARY_CACHE_DIR = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, module.GLOSSARY_CACHE_DIR, True)
         
         # Test content with mixed terminology
         test_content = """
@@ -8,7 +8,9 @@ import os
 import importlib.util
 import tempfile
 import shutil
+import json
 from pathlib import Path
+from unittest import mock
 
 # Add scripts directory to Python path
 scripts_dir = Path(__file__).parent.parent.parent / "scripts"
@@ -30,7 +32,15 @@ class TestScriptsDeepCoverage(unittest.TestCase):
         )
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
+        if hasattr(module, 'GLOSSARY_CACHE_DIR'):
+            # Compiled glossaries go to a temporary directory, not the repo cache
+            module.GLOSSARY_CACHE_DIR = self.temp_cache_dir()
         return module
+
+    def temp_cache_dir(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        return cache_dir
     
     def test_check_internal_links_all_branches(self):
         """Test all code branches in check-internal-links.py"""
@@ -99,6 +109,48 @@ class TestScriptsDeepCoverage(unittest.TestCase):
             self.assertFalse(result)
             self.assertGreater(len(broken), 0)
     
+    def test_link_parity_report(self):
+        """Test EN/FR link-graph parity diff in check-internal-links.py"""
+        module = self.load_module("check-internal-links.py")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            (temp_path / "docs").mkdir()
+            (temp_path / "docs" / "GUIDE.md").write_text(
+                "See [setup](../SETUP.md#install) and [license](../LICENSE).\n"
+                "[Issues](https://example.com/issues)\n"
+            )
+            (temp_path / "docs" / "GUIDE-FR.md").write_text(
+                "Voir [installation](../SETUP-FR.md#install).\n"
+                "[Issues](https://example.com/issues) et [extra](./OTHER.md)\n"
+            )
+            (temp_path / "SOLO.md").write_text("No translation")
+
+            files = module.find_markdown_files(str(temp_path))
+            self.assertIn("docs/GUIDE.md", files)
+
+            pairs = module.pair_translations(files)
+            self.assertEqual(pairs, [("docs/GUIDE.md", "docs/GUIDE-FR.md")])
+
+            graph = module.build_link_graph(files, str(temp_path))
+            self.assertIn("SETUP.md", graph["docs/GUIDE.md"]["links"])
+            self.assertIn("SETUP-FR.md#install", graph["docs/GUIDE-FR.md"]["anchors"])
+
+            report = module.link_parity(graph, pairs)
+            self.assertEqual(len(report), 1)
+            entry = report[0]
+            self.assertFalse(entry["in_parity"])
+            self.assertEqual(entry["missing_links_fr"], ["LICENSE"])
+            self.assertEqual(entry["extra_links_fr"], ["docs/OTHER.md"])
+            self.assertEqual(entry["missing_anchors_fr"], [])
+
+            output_file = temp_path / "parity.json"
+            ok = module.run_parity_report(str(temp_path), str(output_file))
+            self.assertFalse(ok)
+            data = json.loads(output_file.read_text(encoding='utf-8'))
+            self.assertEqual(data["total_pairs"], 1)
+            self.assertEqual(data["pairs_in_parity"], 0)
+
     def test_check_terminology_comprehensive(self):
         """Test all functions in check-terminology.py"""
         module = self.load_module("check-terminology.py")
@@ -138,6 +190,186 @@ class TestScriptsDeepCoverage(unittest.TestCase):
             finally:
                 os.unlink(temp_file)
     
+    def test_terminology_single_pass_line_numbers(self):
+        """Test combined English matcher and offset-indexed line numbers"""
+        module = self.load_module("check-terminology.py")
+
+        self.assertEqual(len(module.GLOSSARY.forbidden), len(module.ENGLISH_PATTERNS))
+
+        content = (
+            "# Titre\n"
+            "```bash\n"
+            "workflow=\"ignored\"\n"
+            "```\n"
+            "Le `dashboard` est ignoré mais pas le Workflow.\n"
+            "Une error et un warning, pas des errors.\n"
+        )
+        # Code masking keeps offsets stable
+        self.assertEqual(len(module.strip_code(content)), len(content))
+
+        found = module.find_english_terms(content)
+        self.assertEqual(found, [
+            (5, "Workflow", "flux de travail"),
+            (6, "error", "erreur"),
+            (6, "warning", "avertissement"),
+        ])
+
+        offsets = module.newline_offsets("a\nb\n\nc")
+        self.assertEqual(offsets, [1, 3, 4])
+        self.assertEqual(module.line_number(offsets, 0), 1)
+        self.assertEqual(module.line_number(offsets, 2), 2)
+        self.assertEqual(module.line_number(offsets, 5), 4)
+
+    def test_terminology_external_glossary(self):
+        """Test glossaries loaded from i18n config, compiled and cached on disk"""
+        module = self.load_module("check-terminology.py")
+
+        self.assertEqual(module.trie_pattern(["test", "testing", "team"]), "te(?:am|st(?:ing)?)")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            (temp_path / "glossary-en-fr.json").write_text(json.dumps({
+                "source": "en", "target": "fr",
+                "terminology": {"workflow": "flux de travail"},
+                "forbidden": {"workflow": "flux de travail", "Build": "construction"},
+                "required": ["sécurité"],
+            }), encoding='utf-8')
+            (temp_path / "glossary-en-de.json").write_text(json.dumps({
+                "source": "en", "target": "de",
+                "forbidden": {"workflow": "Arbeitsablauf", "deploy": "bereitstellen"},
+                "required": ["Sicherheit"],
+            }), encoding='utf-8')
+            config = temp_path / "config.json"
+            config.write_text(json.dumps({"glossaries": {
+                "en-fr": "glossary-en-fr.json", "en-de": "glossary-en-de.json",
+            }}), encoding='utf-8')
+            cache_dir = temp_path / "cache"
+
+            glossary = module.load_compiled_glossary(str(config), str(cache_dir))
+            cached_files = list(cache_dir.glob("glossary-*.json"))
+            self.assertEqual(len(cached_files), 1)
+            self.assertIn(glossary.version, cached_files[0].name)
+
+            # One shared matcher serves every target locale
+            text = "The Workflow and build, then deploy."
+            matches = [m.group() for m in glossary.matcher.finditer(text)]
+            self.assertEqual(matches, ["Workflow", "build", "deploy"])
+            self.assertEqual(glossary.replacement("WORKFLOW", "fr"), "flux de travail")
+            self.assertEqual(glossary.replacement("workflow", "de"), "Arbeitsablauf")
+            self.assertIsNone(glossary.replacement("deploy", "fr"))
+            self.assertEqual(glossary.required["de"], ["Sicherheit"])
+
+            # A second load is served from the compiled cache
+            reloaded = module.load_compiled_glossary(str(config), str(cache_dir))
+            self.assertEqual(reloaded.version, glossary.version)
+            self.assertEqual(reloaded.matcher.pattern, glossary.matcher.pattern)
+
+    def test_terminology_glossary_loaded_lazily(self):
+        """Test importing compiles nothing and the caches are not CWD-relative"""
+        original_cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                tempfile.TemporaryDirectory() as cache_dir:
+            os.chdir(temp_dir)
+            try:
+                module = self.load_module("check-terminology.py")
+                module.GLOSSARY_CACHE_DIR = cache_dir
+                self.assertIsNone(module._glossary)
+                self.assertIn('workflow', module.FRENCH_TERMINOLOGY)
+                self.assertIsNotNone(module._glossary)
+                self.assertFalse(os.path.exists(os.path.join(temp_dir, '.claude')))
+                self.assertTrue(any(name.startswith('glossary-') for name in os.listdir(cache_dir)))
+            finally:
+                os.chdir(original_cwd)
+        cache_root = (self.project_root / '.claude' / 'cache').resolve()
+        self.assertEqual(Path(module.CACHE_DIR).resolve(), cache_root)
+        self.assertEqual(Path(module.DEFAULT_CACHE_FILE).resolve().parent, cache_root)
+
+    def test_terminology_document_cache(self):
+        """Test read-once document cache shared by checks and usage analysis"""
+        module = self.load_module("check-terminology.py")
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as f:
+            f.write("# Configuration\nLa Configuration et la sécurité.\n`métriques`\n")
+            temp_file = f.name
+
+        try:
+            cache = module.DocumentCache()
+            document = cache.get(temp_file)
+            self.assertIs(cache.get(temp_file), document)
+            self.assertIsNone(cache.get("/non/existent/file.md"))
+
+            self.assertEqual(document.term_count("configuration"), 2)
+            self.assertEqual(document.term_count("Sécurité"), 1)
+            self.assertEqual(document.term_count("qualité"), 0)
+
+            is_valid, messages = module.check_terminology_in_file(temp_file, cache)
+            self.assertTrue(is_valid)
+            self.assertTrue(any("qualité" in message for message in messages))
+
+            # The usage analysis reuses the cached document
+            os.unlink(temp_file)
+            usage = module.analyze_terminology_usage([temp_file], cache)
+            self.assertEqual(usage["configuration"], 2)
+            self.assertEqual(usage["métriques"], 1)
+        finally:
+            if os.path.exists(temp_file):
+                os.unlink(temp_file)
+
+    def test_terminology_parallel_incremental_validation(self):
+        """Test process-pool validation and the content-hash result cache"""
+        module = self.load_module("check-terminology.py")
+        # Workers import the worker function by module name
+        sys.modules[module.__name__] = module
+        self.addCleanup(sys.modules.pop, module.__name__, None)
+
+        submitted = []
+
+        class RecordingPool(module.ProcessPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                future = super().submit(fn, *args, **kwargs)
+                submitted.append(future)
+                return future
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            files = []
+            for index in range(3):
+                doc = temp_path / f"DOC{index}-FR.md"
+                doc.write_text(f"# Titre {index}\nLa configuration du workflow.\n", encoding='utf-8')
+                files.append(str(doc))
+            cache_file = temp_path / "cache" / "terminology.json"
+
+            cache = module.ResultCache(str(cache_file))
+            with mock.patch.object(module, 'ProcessPoolExecutor', RecordingPool):
+                results, hits = module.validate_files(files, jobs=2, result_cache=cache)
+            cache.save()
+            self.assertEqual(len(submitted), 3)
+            self.assertTrue(all(future.exception() is None for future in submitted))
+            self.assertEqual(hits, 0)
+            self.assertEqual(len(results), 3)
+            self.assertFalse(results[files[0]]["valid"])
+
+            # The pool gives the same results as the serial path
+            serial_results, _ = module.validate_files(files, jobs=1)
+            self.assertEqual(results, serial_results)
+            self.assertEqual(module.merge_term_usage(results), module.merge_term_usage(serial_results))
+            self.assertEqual(module.merge_term_usage(results)["configuration"], 3)
+
+            # Unchanged files are served from the persisted cache
+            cache = module.ResultCache(str(cache_file))
+            results_again, hits = module.validate_files(files, jobs=1, result_cache=cache)
+            self.assertEqual(hits, 3)
+            self.assertEqual(results_again, results)
+
+            # Content changes and glossary changes both invalidate entries
+            Path(files[1]).write_text("# Titre\nLa configuration.\n", encoding='utf-8')
+            results_changed, hits = module.validate_files(files, jobs=1, result_cache=cache)
+            self.assertEqual(hits, 2)
+            self.assertTrue(results_changed[files[1]]["valid"])
+
+            stale = module.ResultCache(str(cache_file), version="other-glossary")
+            self.assertEqual(stale.entries, {})
+
     def test_scripts_main_functions(self):
         """Test main functions when they exist"""
         for script_name in ["check-internal-links.py", "check-terminology.py"]:
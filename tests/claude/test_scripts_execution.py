@@ -7,6 +7,7 @@ import sys
 import os
 import importlib.util
 import tempfile
+import shutil
 from pathlib import Path
 
 # Add scripts directory to Python path
@@ -29,7 +30,15 @@ class TestScriptsExecution(unittest.TestCase):
         )
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
+        if hasattr(module, 'GLOSSARY_CACHE_DIR'):
+            # Compiled glossaries go to a temporary directory, not the repo cache
+            module.GLOSSARY_CACHE_DIR = self.temp_cache_dir()
         return module
+
+    def temp_cache_dir(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        return cache_dir
     
     def test_check_internal_links_comprehensive(self):
         """Test check-internal-links.py comprehensively"""